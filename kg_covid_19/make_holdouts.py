@@ -11,6 +11,8 @@ import pandas as pd  # type: ignore
 from ensmallen import Graph
 from tqdm import tqdm  # type: ignore
 
+from kg_covid_19.utils.intern_utils import Interner
+
 
 def make_holdouts(
     nodes: str,
@@ -156,73 +158,75 @@ def _generate_negative_edges(
         random.seed(rseed)
 
     with tqdm(total=8) as pbar:
-        unique_nodes = list(
-            np.unique(np.concatenate((nodes_df.id, edges_df.subject, edges_df.object)))
+        # pairs of nodes are drawn, compared and deduplicated as interned
+        # codes. Ids are interned sorted, so the code of an id is its index
+        # among the sorted unique ids, which nodes have always been drawn from.
+        node_ids = Interner(
+            np.unique(
+                np.concatenate((nodes_df.id, edges_df.subject, edges_df.object))
+            ).tolist()
         )
+        subjects = node_ids.encode(edges_df.subject)
+        objects = node_ids.encode(edges_df.object)
+        num_nodes = len(node_ids)
+        num_edges = edges_df.shape[0]
         pbar.update()
 
         pbar.set_description("Making random pairs of nodes")
-        random_subjects = [
-            unique_nodes[random.randint(0, len(unique_nodes) - 1)]
-            for _ in range(2 * edges_df.shape[0])
-        ]
-        random_objects = [
-            unique_nodes[random.randint(0, len(unique_nodes) - 1)]
-            for _ in range(2 * edges_df.shape[0])
-        ]
-        possible_edges = pd.DataFrame(
-            {"subject": random_subjects, "object": random_objects}
+        # drawn one by one with random, so a seed gives the same edges as ever
+        random_subjects = np.array(
+            [random.randint(0, num_nodes - 1) for _ in range(2 * num_edges)],
+            dtype=np.int64,
+        )
+        random_objects = np.array(
+            [random.randint(0, num_nodes - 1) for _ in range(2 * num_edges)],
+            dtype=np.int64,
         )
+        # a pair of codes as one integer
+        pairs = random_subjects * num_nodes + random_objects
         pbar.update()
 
         pbar.set_description("Eliminating duplicated negative edges")
-        possible_edges.drop_duplicates(
-            subset=["subject", "object"], keep=False, inplace=True
-        )
+        _, inverse, counts = np.unique(pairs, return_inverse=True, return_counts=True)
+        keep = counts[inverse] == 1
         pbar.update()
 
         pbar.set_description("Eliminating positives edges")
-        negative_edges = possible_edges.merge(
-            edges_df.drop_duplicates(),
-            on=["subject", "object"],
-            how="left",
-            indicator=True,
-        )
-        negative_edges = negative_edges[negative_edges["_merge"] == "left_only"]
+        positive_pairs = subjects.astype(np.int64) * num_nodes + objects
+        keep &= ~np.isin(pairs, positive_pairs)
         pbar.update()
 
         pbar.set_description("Dropping reflexive edges")
-        negative_edges = negative_edges[
-            negative_edges["subject"] != negative_edges["object"]
-        ]
+        keep &= random_subjects != random_objects
         pbar.update()
 
-        pbar.set_description("Selecting %i edges..." % edges_df.shape[0])
+        pbar.set_description("Selecting %i edges..." % num_edges)
+        negative = np.flatnonzero(keep)
         # theoretically might not have enough edges here
-        if negative_edges.shape[0] < edges_df.shape[0]:
+        if negative.shape[0] < num_edges:
             warnings.warn(
                 "Couldn't generate %i negative edges - only %i edges left "
                 "after removing positives and reflexives"
-                % (edges_df.shape[0], negative_edges.shape[0]),
+                % (num_edges, negative.shape[0]),
                 stacklevel=2
             )
-            negative_edges = negative_edges.head(negative_edges.shape[0])
         else:
             # select only num_edges edges
-            negative_edges = negative_edges.head(edges_df.shape[0])
+            negative = negative[:num_edges]
         pbar.update()
 
         # only subject and object
         pbar.set_description("Making new dataframe")
-        negative_edges = negative_edges[["subject", "object"]]
+        negative_subjects = node_ids.decode(random_subjects[negative])
+        negative_objects = node_ids.decode(random_objects[negative])
         pbar.update()
 
         # add edge_label and relation
         negative_edges = pd.DataFrame(
             {
-                "subject": negative_edges["subject"],
+                "subject": negative_subjects,
                 "predicate": edge_label,
-                "object": negative_edges["object"],
+                "object": negative_objects,
                 "relation": relation,
             }
         )
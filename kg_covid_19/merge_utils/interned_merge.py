@@ -0,0 +1,102 @@
+"""In-memory merge of KGX node and edge files into integer-coded tables.
+
+Node ids and the values of every other column are interned as integer
+codes (see kg_covid_19.utils.intern_utils), so the merged graph is held as
+numpy arrays of codes plus one copy of each distinct string: an edge of the
+STRING graph costs a few int32 codes instead of repeating its CURIEs,
+predicate and provided_by as strings. Strings are only decoded again when
+the merged graph is written out.
+
+Sources are read, filtered and merged as by stream_merge, and the same
+destinations (tsv or parquet, optionally packed as tar.gz) are written.
+"""
+
+import logging
+from itertools import islice
+from typing import Iterator, NamedTuple
+
+import numpy as np  # type: ignore
+
+from kg_covid_19.merge_utils.stream_merge import (CORE_EDGE_PROPERTIES,
+                                                  CORE_NODE_PROPERTIES,
+                                                  RUN_CHUNK_RECORDS, Record,
+                                                  close_destinations,
+                                                  open_destinations,
+                                                  read_merge_config,
+                                                  source_columns,
+                                                  source_records,
+                                                  validate_sources)
+from kg_covid_19.utils.intern_utils import InternedTable, Interner
+
+EDGE_KEY_COLUMNS = ["subject", "predicate", "object"]
+
+
+class InternedGraph(NamedTuple):
+    """A merged graph of interned node and edge tables."""
+
+    nodes: InternedTable
+    edges: InternedTable
+    # codes of node ids, shared by the id of nodes and subject and object of edges
+    node_ids: Interner
+
+    def edge_array(self) -> np.ndarray:
+        """Get the edges as an array of (subject, object) node id codes."""
+        return np.stack(
+            [self.edges.column("subject"), self.edges.column("object")], axis=1
+        )
+
+
+def append_records(table: InternedTable, records: Iterator[Record]) -> int:
+    """Append records to a table in batches, and count them."""
+    count = 0
+    batch = list(islice(records, RUN_CHUNK_RECORDS))
+    while batch:
+        table.append(batch)
+        count += len(batch)
+        batch = list(islice(records, RUN_CHUNK_RECORDS))
+    return count
+
+
+def interned_merge(yaml_file: str) -> InternedGraph:
+    """Merge the sources of a KGX merge config into interned tables.
+
+    Args:
+        yaml_file: A string pointing to a KGX compatible config YAML.
+    Returns:
+        The merged graph, which has also been written to the destinations.
+    """
+    output_directory, destinations, sources = read_merge_config(yaml_file)
+    validate_sources(sources)
+    node_columns, edge_columns = source_columns(sources)
+
+    node_ids = Interner([""])
+    nodes = InternedTable({"id": node_ids})
+    edges = InternedTable({"subject": node_ids, "object": node_ids})
+    nodes_read = edges_read = 0
+    for name, source in sources.items():
+        logging.info(f"Reading {name}")
+        node_records, edge_records = source_records(name, source)
+        # nodes first, edge category filters need the source's nodes
+        nodes_read += append_records(nodes, node_records)
+        edges_read += append_records(edges, edge_records)
+
+    graph = InternedGraph(
+        nodes.merge_duplicates(["id"], CORE_NODE_PROPERTIES),
+        edges.merge_duplicates(EDGE_KEY_COLUMNS, CORE_EDGE_PROPERTIES),
+        node_ids,
+    )
+
+    writers = open_destinations(
+        output_directory, destinations, node_columns, edge_columns
+    )
+    for _, _, node_writer, edge_writer in writers:
+        node_writer.write_batch(graph.nodes.rows(node_columns))
+        edge_writer.write_batch(graph.edges.rows(edge_columns))
+    close_destinations(writers)
+
+    logging.info(
+        f"Merged {nodes_read} node and {edges_read} edge records into "
+        f"{len(graph.nodes)} nodes and {len(graph.edges)} edges, "
+        f"with {len(node_ids) - 1} distinct node ids"
+    )
+    return graph
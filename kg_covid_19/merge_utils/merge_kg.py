@@ -1,10 +1,19 @@
 """Functions for graph merging."""
-from typing import Dict
+
+import tempfile
+from typing import Dict, Optional, Union
 
 import networkx as nx
 import yaml
 from kgx.cli.cli_utils import merge
 
+from kg_covid_19.merge_utils.interned_merge import (InternedGraph,
+                                                    interned_merge)
+from kg_covid_19.merge_utils.stream_merge import (prepare_merge_config,
+                                                  stream_merge)
+
+MERGE_ENGINES = ["kgx", "stream", "interned"]
+
 
 def parse_load_config(yaml_file: str) -> Dict:
     """Parse load config YAML.
@@ -19,16 +28,35 @@ def parse_load_config(yaml_file: str) -> Dict:
     return config
 
 
-def load_and_merge(yaml_file: str, processes: int = 1) -> nx.MultiDiGraph:
+def load_and_merge(
+    yaml_file: str, processes: int = 1, engine: str = "kgx"
+) -> Optional[Union[nx.MultiDiGraph, InternedGraph]]:
     """Load and merge sources defined in the config YAML.
 
     Args:
         yaml_file: A string pointing to a KGX compatible config YAML.
-        processes: Number of processes to use.
+        processes: Number of processes to use; the stream engine reads and
+            sorts each source in its own process.
+        engine: "kgx" to merge in a networkx graph with KGX, "stream" to
+            merge TSV files with an external sort-merge in bounded memory, or
+            "interned" to merge them into tables of integer codes.
 
     Returns:
-        networkx.MultiDiGraph: The merged graph.
+        networkx.MultiDiGraph: The merged graph, an InternedGraph for the
+        interned engine, or None for the stream engine.
 
     """
-    merged_graph = merge(yaml_file, processes=processes)
+    if engine == "stream":
+        stream_merge(yaml_file, processes=processes)
+        return None
+    if engine == "interned":
+        return interned_merge(yaml_file)
+    if engine != "kgx":
+        raise ValueError(f"Unknown merge engine {engine}")
+    # source operations with a streaming implementation, like the remapping
+    # of STRING protein ids, run on the files instead of the networkx graph
+    with tempfile.TemporaryDirectory() as prepared_dir:
+        merged_graph = merge(
+            prepare_merge_config(yaml_file, prepared_dir), processes=processes
+        )
     return merged_graph
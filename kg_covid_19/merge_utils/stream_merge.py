@@ -0,0 +1,842 @@
+"""Streaming external sort-merge of KGX node and edge TSV files.
+
+An alternative to kgx.cli.cli_utils.merge, which loads every source into one
+networkx MultiDiGraph before writing the merged graph. Here the nodes and
+edges of all sources are streamed through filters into sorted runs on disk,
+and the runs are k-way merged by node id and by (subject, predicate, object),
+so only one buffer of records and one group of duplicates are in memory at a
+time.
+
+Records are merged the way KGX merges nodes and edges with preserve=True:
+- core properties (id and name of nodes; id, subject, predicate and object of
+  edges) keep the first value seen,
+- other properties collect the distinct values of all records, which TSV
+  output joins with "|" (the form KGX writes lists and preserved conflicts
+  in).
+Sources are merged in the order they are listed in, and the values of a
+property are kept in the order they were first seen.
+
+Sources and destinations can also be Parquet files as written by
+ParquetTableWriter. Those are memory-mapped and read a record batch at a
+time, and dictionary-encoded columns are decoded once per batch, so the
+rows of a batch share their category, predicate and provided_by strings.
+"""
+
+import gzip
+import heapq
+import logging
+import multiprocessing
+import os
+import pickle
+import tarfile
+import tempfile
+import time
+from itertools import islice
+from typing import (IO, Any, Callable, Dict, Iterable, Iterator, List,
+                    Optional, Tuple)
+
+import yaml
+
+from kg_covid_19.utils.transform_utils import peak_rss
+from kg_covid_19.utils.writer_utils import (PARQUET_SUFFIX, NodeEdgeWriter,
+                                            ParquetTableWriter, TableWriter)
+
+try:
+    import pyarrow  # type: ignore
+    import pyarrow.parquet  # type: ignore
+except ImportError:  # optional, only needed to merge .parquet files
+    pyarrow = None
+
+# records sorted in memory before they are spilled to a run on disk
+BUFFER_RECORDS = 500_000
+
+# records pickled together in a run file
+RUN_CHUNK_RECORDS = 10_000
+
+# formats of source and destination files, by suffix
+FILE_SUFFIXES = {"tsv": ".tsv", "parquet": PARQUET_SUFFIX}
+
+# columns a node or edge file must have
+REQUIRED_NODE_COLUMNS = ["id"]
+REQUIRED_EDGE_COLUMNS = ["subject", "object"]
+
+# sequence numbers of the records of a source start at its index times this,
+# so sorted runs of sources sorted apart still merge in source order
+SOURCE_SEQ_STRIDE = 1 << 40
+
+# properties that keep their first value when records are merged
+CORE_NODE_PROPERTIES = ["id", "name"]
+CORE_EDGE_PROPERTIES = ["id", "subject", "predicate", "object", "type"]
+
+# leading output columns, in KGX order, the others follow sorted
+NODE_COLUMNS = ["id", "category", "name", "description", "xref", "provided_by"]
+EDGE_COLUMNS = ["id", "subject", "predicate", "object", "relation", "provided_by"]
+
+LIST_DELIMITER = "|"
+
+# edge filters on the categories of the subject and object nodes of a source
+NODE_CATEGORY_FILTERS = {"subject_category": "subject", "object_category": "object"}
+
+# legacy names of edge properties in KGX filters
+EDGE_FILTER_ALIASES = {"edge_label": "predicate"}
+
+# streaming implementations of KGX source operations, by operation name; each
+# is called with the source's node and edge record iterators and the args of
+# the operation, and returns the transformed (nodes, edges) iterators
+STREAM_OPERATIONS: Dict[str, Callable] = {}
+
+Record = Dict[str, str]
+
+
+def open_tsv(filename: str) -> IO[str]:
+    """Open a (possibly gzipped) TSV file for reading."""
+    if filename.endswith(".gz"):
+        return gzip.open(filename, "rt")
+    return open(filename)
+
+
+def read_tsv_records(filename: str) -> Iterator[Record]:
+    """Read the rows of a KGX TSV file as records.
+
+    Args:
+        filename: Path to the TSV file.
+    Returns:
+        An iterator of dicts of column to its value, without the empty
+        columns of the row.
+    """
+    with open_tsv(filename) as f:
+        header = f.readline().rstrip("\n").split("\t")
+        for line in f:
+            yield {
+                column: value
+                for column, value in zip(header, line.rstrip("\n").split("\t"))
+                if value
+            }
+
+
+def record_values(record: Record, key: str) -> List[str]:
+    """Get the "|"-separated values of a property of a record."""
+    value = record.get(key)
+    return value.split(LIST_DELIMITER) if value else []
+
+
+def read_tsv_header(filename: str) -> List[str]:
+    """Read the header of a KGX TSV file."""
+    with open_tsv(filename) as f:
+        return f.readline().rstrip("\n").split("\t")
+
+
+def read_parquet_records(filename: str) -> Iterator[Record]:
+    """Read the rows of a Parquet node or edge file as records.
+
+    Args:
+        filename: Path to the Parquet file.
+    Returns:
+        An iterator of dicts of column to its value, without the empty
+        columns of the row.
+    """
+    if pyarrow is None:
+        raise ImportError("Merging Parquet files requires the pyarrow package")
+    parquet_file = pyarrow.parquet.ParquetFile(filename, memory_map=True)
+    header = parquet_file.schema_arrow.names
+    for batch in parquet_file.iter_batches():
+        columns = []
+        for column in batch.columns:
+            # converting through numpy is several times faster than to_pylist()
+            if pyarrow.types.is_dictionary(column.type) and not column.null_count:
+                values = column.dictionary.to_pylist()
+                indices = column.indices.to_numpy(zero_copy_only=False).tolist()
+                columns.append(list(map(values.__getitem__, indices)))
+            else:
+                columns.append(column.to_numpy(zero_copy_only=False).tolist())
+        for row in zip(*columns):
+            yield {column: value for column, value in zip(header, row) if value}
+
+
+def read_records(filename: str) -> Iterator[Record]:
+    """Read the rows of a node or edge file, TSV or Parquet, as records."""
+    if filename.endswith(PARQUET_SUFFIX):
+        return read_parquet_records(filename)
+    return read_tsv_records(filename)
+
+
+def read_header(filename: str) -> List[str]:
+    """Read the columns of a node or edge file, TSV or Parquet."""
+    if filename.endswith(PARQUET_SUFFIX):
+        if pyarrow is None:
+            raise ImportError("Merging Parquet files requires the pyarrow package")
+        return pyarrow.parquet.read_schema(filename).names
+    return read_tsv_header(filename)
+
+
+def merge_records(records: Iterable[Record], core: Iterable[str]) -> Record:
+    """Merge records of the same node or edge.
+
+    Args:
+        records: The records, in merge order.
+        core: Properties that keep their first value.
+    Returns:
+        The merged record.
+    """
+    core = set(core)
+    merged: Dict[str, Dict[str, None]] = {}
+    for record in records:
+        for key, value in record.items():
+            if key not in merged:
+                merged[key] = dict.fromkeys(value.split(LIST_DELIMITER))
+            elif key not in core:
+                merged[key].update(dict.fromkeys(value.split(LIST_DELIMITER)))
+    return {key: LIST_DELIMITER.join(values) for key, values in merged.items()}
+
+
+def record_filter(
+    filters: Optional[Dict[str, Iterable[str]]],
+    aliases: Optional[Dict[str, str]] = None,
+) -> Callable[[Record], bool]:
+    """Make a test of records against KGX property filters.
+
+    A record passes if, for every filtered property, one of its values is
+    one of the allowed values.
+    Args:
+        filters: Allowed values by property, as in KGX node_filters.
+        aliases: Property names for legacy filter names.
+    Returns:
+        A function of a record to whether it passes.
+    """
+    allowed = {
+        (aliases or {}).get(key, key): set(values)
+        for key, values in (filters or {}).items()
+    }
+
+    def passes(record: Record) -> bool:
+        return all(
+            not allowed_values.isdisjoint(record_values(record, key))
+            for key, allowed_values in allowed.items()
+        )
+
+    return passes
+
+
+class ExternalSorter:
+    """Sort records by key with bounded memory, spilling sorted runs to disk."""
+
+    def __init__(
+        self, tmp_dir: str, buffer_records: int = BUFFER_RECORDS, first_seq: int = 0
+    ):
+        """Initialize.
+
+        Args:
+            tmp_dir: Directory for the run files.
+            buffer_records: Records sorted in memory per run.
+            first_seq: Sequence number of the first record, which orders
+                records with equal keys across sorters whose runs are merged.
+        """
+        self.tmp_dir = tmp_dir
+        self.buffer_records = buffer_records
+        self.runs: List[str] = []
+        self._buffer: List[Tuple] = []
+        self._seq = first_seq
+
+    def add(self, key: Any, record: Record) -> None:
+        """Add a record, records with equal keys keep the order they came in."""
+        self._buffer.append((key, self._seq, record))
+        self._seq += 1
+        if len(self._buffer) >= self.buffer_records:
+            self.spill()
+
+    def spill(self) -> None:
+        """Sort the buffered records and write them to a new run file."""
+        if not self._buffer:
+            return
+        self._buffer.sort(key=lambda item: item[:2])
+        fd, path = tempfile.mkstemp(suffix=".run", dir=self.tmp_dir)
+        with os.fdopen(fd, "wb") as f:
+            for start in range(0, len(self._buffer), RUN_CHUNK_RECORDS):
+                pickle.dump(
+                    self._buffer[start : start + RUN_CHUNK_RECORDS],
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+        self.runs.append(path)
+        self._buffer = []
+
+    @staticmethod
+    def read_run(path: str) -> Iterator[Tuple]:
+        """Iterate over the records of a run file, one chunk in memory."""
+        with open(path, "rb") as f:
+            while True:
+                try:
+                    chunk = pickle.load(f)
+                except EOFError:
+                    return
+                yield from chunk
+
+    def sorted(self) -> Iterator[Tuple[Any, Record]]:
+        """Iterate over all records in key order, k-way merging the runs."""
+        if not self.runs:
+            # everything fits in memory
+            self._buffer.sort(key=lambda item: item[:2])
+            runs: List[Iterator[Tuple]] = [iter(self._buffer)]
+        else:
+            self.spill()
+            runs = [self.read_run(path) for path in self.runs]
+        for key, _, record in heapq.merge(*runs, key=lambda item: item[:2]):
+            yield key, record
+
+
+def node_key(record: Record) -> str:
+    """Sort key of a node record."""
+    return record["id"]
+
+
+def edge_key(record: Record) -> Tuple[str, str, str]:
+    """Sort key of an edge record."""
+    return (
+        record["subject"],
+        record.get("predicate", ""),
+        record["object"],
+    )
+
+
+def source_records(
+    name: str, source: Dict
+) -> Tuple[Iterator[Record], Iterator[Record]]:
+    """Read and filter the nodes and edges of a merge source.
+
+    Args:
+        name: Name of the source.
+        source: The source config, as in a KGX merge YAML.
+    Returns:
+        Iterators of the node records and of the edge records.
+    """
+    input_config = source["input"]
+    node_files = [f for f in input_config["filename"] if "nodes." in f]
+    edge_files = [f for f in input_config["filename"] if "edges." in f]
+
+    filters = source.get("filters") or {}
+    node_passes = record_filter(filters.get("node_filters"))
+    edge_filters = dict(filters.get("edge_filters") or {})
+    category_filters = {
+        NODE_CATEGORY_FILTERS[key]: set(edge_filters.pop(key))
+        for key in list(edge_filters)
+        if key in NODE_CATEGORY_FILTERS
+    }
+    edge_passes = record_filter(edge_filters, EDGE_FILTER_ALIASES)
+
+    # categories of the nodes of this source, only kept for category filters
+    node_categories: Dict[str, List[str]] = {}
+
+    def nodes() -> Iterator[Record]:
+        for node_file in node_files:
+            for record in read_records(node_file):
+                if category_filters:
+                    node_categories[node_key(record)] = record_values(
+                        record, "category"
+                    )
+                if node_passes(record):
+                    yield record
+
+    def edges() -> Iterator[Record]:
+        for edge_file in edge_files:
+            for record in read_records(edge_file):
+                if not edge_passes(record):
+                    continue
+                if any(
+                    allowed.isdisjoint(node_categories.get(record[end], ()))
+                    for end, allowed in category_filters.items()
+                ):
+                    continue
+                yield record
+
+    node_records, edge_records = nodes(), edges()
+    for operation in source.get("operations") or []:
+        node_records, edge_records = STREAM_OPERATIONS[operation["name"]](
+            node_records, edge_records, **(operation.get("args") or {})
+        )
+    return node_records, edge_records
+
+
+def alternative_id(
+    record: Record,
+    category: str,
+    alternative_property: str,
+    prefix: Optional[str] = None,
+) -> Optional[str]:
+    """Get the identifier a node is remapped to, as by remap_node_identifier.
+
+    Args:
+        record: The node record.
+        category: Only nodes of this category (or without one) are remapped.
+        alternative_property: Property with the alternative identifiers.
+        prefix: Take the first alternative containing this, like UniProtKB
+            [the first alternative].
+    Returns:
+        The new identifier, or None if the node keeps its own.
+    """
+    categories = record_values(record, "category")
+    if categories and category not in categories:
+        return None
+    for value in record_values(record, alternative_property):
+        if not prefix or prefix in value:
+            return value
+    return None
+
+
+def remap_node_identifier(
+    node_records: Iterator[Record],
+    edge_records: Iterator[Record],
+    category: str,
+    alternative_property: str,
+    prefix: Optional[str] = None,
+) -> Tuple[Iterator[Record], Iterator[Record]]:
+    """Replace node ids by an alternative id, like ENSEMBL: ids by UniProtKB: xrefs.
+
+    The streaming counterpart of kgx.utils.graph_utils.remap_node_identifier:
+    while the nodes pass through, the alternative ids are collected into a
+    map, which then rewrites the subject and object of the edges in the
+    same pass. As everywhere in the merge, the nodes of a source have to be
+    consumed before its edges.
+    Args:
+        node_records: The node records of a source.
+        edge_records: The edge records of the source.
+        category: Only nodes of this category (or without one) are remapped.
+        alternative_property: Property with the alternative identifiers.
+        prefix: Take the first alternative containing this [the first one].
+    Returns:
+        Iterators of the remapped node records and edge records.
+    """
+    mapping: Dict[str, str] = {}
+
+    def nodes() -> Iterator[Record]:
+        for record in node_records:
+            new_id = alternative_id(record, category, alternative_property, prefix)
+            if new_id:
+                mapping[record["id"]] = new_id
+                record["id"] = new_id
+            yield record
+
+    def edges() -> Iterator[Record]:
+        for record in edge_records:
+            if record["subject"] in mapping:
+                record["subject"] = mapping[record["subject"]]
+            if record["object"] in mapping:
+                record["object"] = mapping[record["object"]]
+            yield record
+
+    return nodes(), edges()
+
+
+STREAM_OPERATIONS["kgx.utils.graph_utils.remap_node_identifier"] = remap_node_identifier
+
+
+def validate_sources(sources: Dict[str, Dict]) -> None:
+    """Check that merge sources can be read, before any of them is.
+
+    Args:
+        sources: The sources of a merge config, by name.
+    """
+    for name, source in sources.items():
+        input_config = source["input"]
+        if input_config.get("format", "tsv") not in FILE_SUFFIXES:
+            raise UnsupportedMergeConfigError(
+                f"{name}: only tsv and parquet input can be merged by streaming"
+            )
+        for operation in source.get("operations") or []:
+            if operation["name"] not in STREAM_OPERATIONS:
+                raise UnsupportedMergeConfigError(
+                    f"{name}: operation {operation['name']} has no streaming "
+                    "implementation"
+                )
+        for filename in input_config["filename"]:
+            if "nodes." in filename:
+                required = REQUIRED_NODE_COLUMNS
+            elif "edges." in filename:
+                required = REQUIRED_EDGE_COLUMNS
+            else:
+                raise UnsupportedMergeConfigError(
+                    f"{name}: {filename} is neither a nodes. nor an edges. file"
+                )
+            if not os.path.exists(filename):
+                raise FileNotFoundError(f"{name}: {filename}")
+            missing = set(required) - set(read_header(filename))
+            if missing:
+                raise UnsupportedMergeConfigError(
+                    f"{name}: {filename} has no {', '.join(sorted(missing))} column"
+                )
+
+
+def add_source(
+    name: str, source: Dict, nodes: ExternalSorter, edges: ExternalSorter
+) -> Dict[str, Any]:
+    """Read and filter the records of a source into sorters.
+
+    Args:
+        name: Name of the source.
+        source: The source config, as in a KGX merge YAML.
+        nodes: Sorter of the node records.
+        edges: Sorter of the edge records.
+    Returns:
+        A dict with source, nodes_read, edges_read and wall_time (seconds).
+    """
+    start = time.perf_counter()
+    stats: Dict[str, Any] = {"source": name, "nodes_read": 0, "edges_read": 0}
+    node_records, edge_records = source_records(name, source)
+    # nodes first, edge category filters need the source's nodes
+    for record in node_records:
+        nodes.add(node_key(record), record)
+        stats["nodes_read"] += 1
+    for record in edge_records:
+        edges.add(edge_key(record), record)
+        stats["edges_read"] += 1
+    stats["wall_time"] = time.perf_counter() - start
+    return stats
+
+
+def sort_source(
+    name: str, source: Dict, index: int, run_dir: str, buffer_records: int
+) -> Dict[str, Any]:
+    """Read, filter and sort the records of a source into runs on disk.
+
+    Args:
+        name: Name of the source.
+        source: The source config, as in a KGX merge YAML.
+        index: Position of the source in the config.
+        run_dir: Directory for the run files.
+        buffer_records: Records sorted in memory per run.
+    Returns:
+        A dict with source, node_runs, edge_runs, nodes_read, edges_read,
+        wall_time (seconds) and peak_rss (MB, of this process).
+    """
+    first_seq = index * SOURCE_SEQ_STRIDE
+    nodes = ExternalSorter(run_dir, buffer_records, first_seq)
+    edges = ExternalSorter(run_dir, buffer_records, first_seq)
+    stats = add_source(name, source, nodes, edges)
+    nodes.spill()
+    edges.spill()
+    return {
+        **stats,
+        "node_runs": nodes.runs,
+        "edge_runs": edges.runs,
+        "peak_rss": peak_rss(),
+    }
+
+
+def _sort_source(args: Tuple) -> Dict[str, Any]:
+    return sort_source(*args)
+
+
+def sort_sources_parallel(
+    sources: Dict[str, Dict], run_dir: str, buffer_records: int, processes: int
+) -> List[Dict[str, Any]]:
+    """Sort each source into runs in a worker process, largest first.
+
+    Args:
+        sources: The sources of a merge config, by name.
+        run_dir: Directory for the run files.
+        buffer_records: Records sorted in memory per run.
+        processes: Number of worker processes.
+    Returns:
+        The stats of sort_source() for each source, in config order.
+    """
+    names = list(sources)
+    sizes = {
+        name: sum(os.path.getsize(f) for f in sources[name]["input"]["filename"])
+        for name in names
+    }
+    tasks = [
+        (name, sources[name], names.index(name), run_dir, buffer_records)
+        for name in sorted(names, key=sizes.__getitem__, reverse=True)
+    ]
+    results = {}
+    # a fresh process per source, so peak RSS is that of the source
+    with multiprocessing.Pool(processes, maxtasksperchild=1) as pool:
+        for stats in pool.imap_unordered(_sort_source, tasks):
+            results[stats["source"]] = stats
+            logging.info(
+                f"Sorted {stats['source']} ({len(results)}/{len(names)}): "
+                f"{stats['nodes_read']} node and {stats['edges_read']} edge records "
+                f"in {stats['wall_time']:.1f}s, peak RSS {stats['peak_rss']:.1f} MB"
+            )
+    return [results[name] for name in names]
+
+
+def merged_rows(
+    sorter: ExternalSorter, core: Iterable[str]
+) -> Iterator[Dict[str, str]]:
+    """Merge the sorted records of each key into an output row.
+
+    Args:
+        sorter: The sorter holding the records.
+        core: Properties that keep their first value.
+    Returns:
+        An iterator of dicts of column to its value, in key order.
+    """
+    group: List[Record] = []
+    group_key = None
+    for key, record in sorter.sorted():
+        if group and key != group_key:
+            # most keys have a single record, which needs no merging
+            yield group[0] if len(group) == 1 else merge_records(group, core)
+            group = []
+        group_key = key
+        group.append(record)
+    if group:
+        yield group[0] if len(group) == 1 else merge_records(group, core)
+
+
+def output_columns(columns: Iterable[str], leading: List[str]) -> List[str]:
+    """Order columns the KGX way: known leading columns, then the rest sorted."""
+    columns = set(columns)
+    return [c for c in leading if c in columns] + sorted(columns - set(leading))
+
+
+def read_merge_config(
+    yaml_file: str,
+) -> Tuple[Optional[str], Dict[str, Dict], Dict[str, Dict]]:
+    """Read a KGX merge config, checking it can be merged without KGX.
+
+    Args:
+        yaml_file: A string pointing to a KGX compatible config YAML.
+    Returns:
+        The output directory, the destinations and the sources, by name.
+    """
+    with open(yaml_file) as f:
+        config = yaml.load(f, Loader=yaml.FullLoader)
+    output_directory = (config.get("configuration") or {}).get("output_directory")
+    merged_graph = config["merged_graph"]
+    destinations = merged_graph.get("destination") or {}
+    if "format" in destinations:
+        destinations = {"destination": destinations}
+    for name, destination in destinations.items():
+        if destination.get("format", "tsv") not in FILE_SUFFIXES:
+            raise UnsupportedMergeConfigError(
+                f"{name}: only tsv and parquet output can be written by streaming"
+            )
+    for operation in merged_graph.get("operations") or []:
+        logging.warning(f"Skipping graph operation {operation['name']}")
+    return output_directory, destinations, merged_graph["source"]
+
+
+def source_columns(sources: Dict[str, Dict]) -> Tuple[List[str], List[str]]:
+    """Get the output node and edge columns of merged sources.
+
+    Args:
+        sources: The sources of a merge config, by name.
+    Returns:
+        The node columns and the edge columns, in output order.
+    """
+    node_columns = set(NODE_COLUMNS[:2])
+    edge_columns = set(EDGE_COLUMNS[:4])
+    for source in sources.values():
+        for filename in source["input"]["filename"]:
+            if "nodes." in filename:
+                node_columns.update(read_header(filename))
+            elif "edges." in filename:
+                edge_columns.update(read_header(filename))
+    return (
+        output_columns(node_columns, NODE_COLUMNS),
+        output_columns(edge_columns, EDGE_COLUMNS),
+    )
+
+
+def open_destinations(
+    output_directory: Optional[str],
+    destinations: Dict[str, Dict],
+    node_columns: List[str],
+    edge_columns: List[str],
+) -> List[Tuple[Dict, str, TableWriter, TableWriter]]:
+    """Open the node and edge writers of merge destinations.
+
+    Args:
+        output_directory: Directory of the destination files, if any.
+        destinations: The destinations of a merge config, by name.
+        node_columns: Columns of the node files.
+        edge_columns: Columns of the edge files.
+    Returns:
+        The destination, its filename, and its node and edge writers, for
+        each destination.
+    """
+    writers = []
+    for destination in destinations.values():
+        filename = destination["filename"]
+        if output_directory:
+            os.makedirs(output_directory, exist_ok=True)
+            filename = os.path.join(output_directory, filename)
+        suffix = FILE_SUFFIXES[destination.get("format", "tsv")]
+        writer_class = ParquetTableWriter if suffix == PARQUET_SUFFIX else TableWriter
+        writers.append(
+            (
+                destination,
+                filename,
+                writer_class(f"{filename}_nodes{suffix}", node_columns),
+                writer_class(f"{filename}_edges{suffix}", edge_columns),
+            )
+        )
+    return writers
+
+
+def close_destinations(
+    writers: List[Tuple[Dict, str, TableWriter, TableWriter]],
+) -> None:
+    """Close the writers of merge destinations, and archive those asked to be."""
+    for destination, filename, node_writer, edge_writer in writers:
+        node_writer.close()
+        edge_writer.close()
+        if destination.get("compression") == "tar.gz":
+            archive_destination(
+                filename, FILE_SUFFIXES[destination.get("format", "tsv")]
+            )
+
+
+def stream_merge(
+    yaml_file: str,
+    tmp_dir: Optional[str] = None,
+    buffer_records: int = BUFFER_RECORDS,
+    processes: int = 1,
+) -> Dict[str, Any]:
+    """Merge the sources of a KGX merge config with an external sort-merge.
+
+    Args:
+        yaml_file: A string pointing to a KGX compatible config YAML.
+        tmp_dir: Directory for sorted runs [system temp dir].
+        buffer_records: Records sorted in memory per run.
+        processes: Number of worker processes to sort sources in [1].
+            With more than one, every source is read, filtered and sorted
+            into runs in its own process, and the runs of all sources are
+            merged in this one.
+    Returns:
+        Counts of merged nodes and edges, and of the records read, and
+        per-source stats under "sources".
+    """
+    output_directory, destinations, sources = read_merge_config(yaml_file)
+    validate_sources(sources)
+    node_columns, edge_columns = source_columns(sources)
+
+    stats: Dict[str, Any] = {"nodes_read": 0, "edges_read": 0, "nodes": 0, "edges": 0}
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as run_dir:
+        nodes = ExternalSorter(run_dir, buffer_records)
+        edges = ExternalSorter(run_dir, buffer_records)
+        if processes > 1:
+            stats["sources"] = sort_sources_parallel(
+                sources, run_dir, buffer_records, processes
+            )
+            for source_stats in stats["sources"]:
+                nodes.runs.extend(source_stats["node_runs"])
+                edges.runs.extend(source_stats["edge_runs"])
+        else:
+            stats["sources"] = []
+            for name, source in sources.items():
+                logging.info(f"Reading {name}")
+                source_stats = add_source(name, source, nodes, edges)
+                logging.info(
+                    f"Read {name}: {source_stats['nodes_read']} node and "
+                    f"{source_stats['edges_read']} edge records "
+                    f"in {source_stats['wall_time']:.1f}s"
+                )
+                stats["sources"].append(source_stats)
+        for source_stats in stats["sources"]:
+            stats["nodes_read"] += source_stats["nodes_read"]
+            stats["edges_read"] += source_stats["edges_read"]
+
+        writers = open_destinations(
+            output_directory, destinations, node_columns, edge_columns
+        )
+        start = time.perf_counter()
+        for kind, sorter, core in [
+            ("nodes", nodes, CORE_NODE_PROPERTIES),
+            ("edges", edges, CORE_EDGE_PROPERTIES),
+        ]:
+            rows = merged_rows(sorter, core)
+            batch = list(islice(rows, RUN_CHUNK_RECORDS))
+            while batch:
+                for _, _, node_writer, edge_writer in writers:
+                    writer = node_writer if kind == "nodes" else edge_writer
+                    writer.write_dicts(batch)
+                stats[kind] += len(batch)
+                batch = list(islice(rows, RUN_CHUNK_RECORDS))
+        close_destinations(writers)
+
+    logging.info(
+        f"Merged {stats['nodes_read']} node and {stats['edges_read']} edge records "
+        f"into {stats['nodes']} nodes and {stats['edges']} edges "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+    return stats
+
+
+def prepare_source(name: str, source: Dict, output_dir: str) -> Dict:
+    """Apply the filters and operations of a source, as a pre-merge stage.
+
+    Args:
+        name: Name of the source.
+        source: The source config, as in a KGX merge YAML.
+        output_dir: Directory to write the node and edge files of the source to.
+    Returns:
+        The config of the prepared source, without filters and operations.
+    """
+    start = time.perf_counter()
+    node_columns, edge_columns = source_columns({name: source})
+    node_file = os.path.join(output_dir, f"{name}_nodes.tsv")
+    edge_file = os.path.join(output_dir, f"{name}_edges.tsv")
+    with NodeEdgeWriter(node_file, edge_file, node_columns, edge_columns) as writer:
+        node_records, edge_records = source_records(name, source)
+        # nodes first, edge category filters and remapping need the nodes
+        writer.write_node_dicts(node_records)
+        writer.write_edge_dicts(edge_records)
+    logging.info(f"Prepared {name} in {time.perf_counter() - start:.1f}s")
+    prepared = {
+        key: value
+        for key, value in source.items()
+        if key not in ("input", "filters", "operations")
+    }
+    prepared["input"] = {"format": "tsv", "filename": [node_file, edge_file]}
+    return prepared
+
+
+def prepare_merge_config(yaml_file: str, output_dir: str) -> str:
+    """Run the source operations of a merge config that can be streamed.
+
+    Sources with operations that all have a streaming implementation are
+    filtered and transformed into files in output_dir, so a merge of the
+    returned config, e.g. by KGX, no longer has to run them on a graph.
+    Args:
+        yaml_file: A string pointing to a KGX compatible config YAML.
+        output_dir: Directory for the prepared files and config.
+    Returns:
+        The path of the prepared config YAML, or yaml_file if no source
+        needed preparing.
+    """
+    with open(yaml_file) as f:
+        config = yaml.load(f, Loader=yaml.FullLoader)
+    sources = config["merged_graph"]["source"]
+    streamable = {
+        name: source
+        for name, source in sources.items()
+        if source.get("operations")
+        and all(op["name"] in STREAM_OPERATIONS for op in source["operations"])
+    }
+    if not streamable:
+        return yaml_file
+    validate_sources(streamable)
+    for name, source in streamable.items():
+        sources[name] = prepare_source(name, source, output_dir)
+    prepared_file = os.path.join(output_dir, os.path.basename(yaml_file))
+    with open(prepared_file, "w") as f:
+        yaml.dump(config, f, sort_keys=False)
+    return prepared_file
+
+
+def archive_destination(filename: str, suffix: str = ".tsv") -> None:
+    """Pack the node and edge files of a destination into filename.tar.gz."""
+    members = [f"{filename}_nodes{suffix}", f"{filename}_edges{suffix}"]
+    with tarfile.open(f"{filename}.tar.gz", "w:gz") as tar:
+        for member in members:
+            tar.add(member, arcname=os.path.basename(member))
+    for member in members:
+        os.remove(member)
+
+
+class UnsupportedMergeConfigError(Exception):
+    """Error for merge configs the streaming merge can't carry out."""
+
+    pass
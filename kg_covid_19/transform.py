@@ -1,7 +1,12 @@
 """Top-level functions for transforming data."""
 
 import logging
-from typing import List, Optional
+import multiprocessing
+import os
+import time
+from multiprocessing.connection import wait
+from queue import Empty
+from typing import Any, Dict, List, Optional
 
 from kg_covid_19.transform_utils.chembl.chembl_transform import ChemblTransform
 from kg_covid_19.transform_utils.drug_central.drug_central import \
@@ -19,6 +24,11 @@ from kg_covid_19.transform_utils.string_ppi import StringTransform
 from kg_covid_19.transform_utils.ttd.ttd import TTDTransform
 from kg_covid_19.transform_utils.zhou_host_proteins.zhou_transform import \
     ZhouTransform
+from kg_covid_19.utils.manifest_utils import (MANIFEST_FILE,
+                                              fingerprint_inputs,
+                                              is_up_to_date, load_manifest,
+                                              save_manifest)
+from kg_covid_19.utils.transform_utils import TransformError, peak_rss
 
 DATA_SOURCES = {
     "ZhouTransform": ZhouTransform,
@@ -39,28 +49,317 @@ DATA_SOURCES = {
 
 
 def transform(
-    input_dir: str, output_dir: str, sources: Optional[List[str]] = None
-) -> None:
+    input_dir: str,
+    output_dir: str,
+    sources: Optional[List[str]] = None,
+    jobs: int = 1,
+    incremental: bool = False,
+    output_format: str = "tsv",
+    processes: int = 1,
+) -> List[Dict[str, Any]]:
     """Call scripts in kg_covid_19/transform/[source name]/ to transform data.
 
     KGX can ingest each directly, in either TSV or JSON format.
+    Every successful transform is recorded in a manifest in output_dir,
+    along with a fingerprint of the raw inputs it read.
     Args:
         input_dir: A string pointing to the directory to import data from.
         output_dir: A string pointing to the directory to output data to.
         sources: A list of sources to transform.
+        jobs: Number of worker processes to run transforms in [1].
+            With more than one job, independent sources are transformed
+            concurrently, one process per source group.
+        incremental: Skip sources whose raw inputs and transform version
+            are unchanged since their last recorded run [False].
+        output_format: Format of the node and edge files, tsv or parquet
+            [tsv]. Sources that can only write tsv still do.
+        processes: Number of worker processes each source that can parse in a
+            process pool (see Transform.PARALLEL) uses [1]. With more than one
+            job, up to jobs * processes processes run at once.
 
     Returns:
-        None.
+        A list of dicts with per-source wall time and peak RSS.
     """
     if not sources:
         # run all sources
         sources = list(DATA_SOURCES.keys())
+    sources = [source for source in sources if source in DATA_SOURCES]
+
+    manifest_file = os.path.join(output_dir, MANIFEST_FILE)
+    manifest = load_manifest(manifest_file)
+    entries = {
+        source: manifest_entry(input_dir, source, manifest.get(source), output_format)
+        for source in sources
+    }
+
+    results: Dict[str, Dict[str, Any]] = {}
+    if incremental:
+        for source in sources:
+            if is_up_to_date(manifest.get(source), entries[source]):
+                logging.info(f"Skipping {source}, raw inputs are unchanged")
+                results[source] = {
+                    "source": source,
+                    "status": "up to date",
+                    "wall_time": 0.0,
+                    "peak_rss": 0.0,
+                }
+    stale = [source for source in sources if source not in results]
+
+    try:
+        if jobs > 1:
+            for s in transform_parallel(
+                input_dir, output_dir, stale, jobs, output_format, processes
+            ):
+                results[s["source"]] = s
+        else:
+            for source in stale:
+                results[source] = run_source(
+                    input_dir, output_dir, source, output_format, processes
+                )
+    finally:
+        for source in stale:
+            if source in results and results[source]["status"] == "ok":
+                manifest[source] = dict(
+                    entries[source], outputs=results[source]["outputs"]
+                )
+        save_manifest(manifest_file, manifest)
+
+    stats = [results[source] for source in sources]
+    failed = [s["source"] for s in stats if s["status"] not in ("ok", "up to date")]
+    if failed:
+        logging.error(format_transform_stats(stats))
+        raise TransformError(f"Transform failed for: {', '.join(failed)}")
+
+    return stats
+
+
+def manifest_entry(
+    input_dir: str,
+    source: str,
+    previous: Optional[Dict] = None,
+    output_format: str = "tsv",
+) -> Dict[str, Any]:
+    """Describe the transform and raw inputs of a source for the manifest.
+
+    Args:
+        input_dir: A string pointing to the directory to import data from.
+        source: A key of DATA_SOURCES.
+        previous: The manifest entry of the source from an earlier run.
+        output_format: Format of the node and edge files [tsv].
+
+    Returns:
+        A dict with transform name, version, the format it writes and
+        fingerprints of the raw inputs and map files.
+    """
+    transform_class = DATA_SOURCES[source]
+    if source in ONTOLOGIES:
+        input_files = [ONTOLOGIES[source]]
+    else:
+        input_files = transform_class.INPUT_FILES
+    if output_format not in transform_class.OUTPUT_FORMATS:
+        # the transform writes tsv instead
+        output_format = "tsv"
+    previous_inputs = previous.get("inputs") if previous else None
+    inputs = fingerprint_inputs(input_dir, input_files, previous_inputs)
+    # map files are not in input_dir, their paths are kept as they are
+    inputs.update(fingerprint_inputs("", transform_class.MAP_FILES, previous_inputs))
+    return {
+        "transform": transform_class.__name__,
+        "version": transform_class.VERSION,
+        "output_format": output_format,
+        "inputs": inputs,
+    }
 
+
+def run_source(
+    input_dir: str,
+    output_dir: str,
+    source: str,
+    output_format: str = "tsv",
+    processes: int = 1,
+) -> Dict[str, Any]:
+    """Transform a single source and measure how long it took.
+
+    Peak RSS is that of the calling process, so it is only specific to
+    this source when run in a fresh worker process.
+    Args:
+        input_dir: A string pointing to the directory to import data from.
+        output_dir: A string pointing to the directory to output data to.
+        source: A key of DATA_SOURCES.
+        output_format: Format of the node and edge files [tsv].
+        processes: Number of worker processes to parse in, if the transform
+            can [1].
+
+    Returns:
+        A dict with source, status, wall_time (seconds), peak_rss (MB) and
+        the node and edge files written (outputs).
+    """
+    logging.info(f"Parsing {source}")
+    start = time.perf_counter()
+    t = DATA_SOURCES[source](input_dir, output_dir)
+    if output_format != "tsv":
+        t.set_output_format(output_format)
+    if source in ONTOLOGIES.keys():
+        t.run(ONTOLOGIES[source])
+    elif t.PARALLEL and processes > 1:
+        t.run(processes=processes)  # type: ignore[call-arg]
+    else:
+        t.run()
+    return {
+        "source": source,
+        "status": "ok",
+        "wall_time": time.perf_counter() - start,
+        "peak_rss": peak_rss(),
+        "outputs": t.output_files(),
+    }
+
+
+def group_sources(sources: List[str]) -> List[List[str]]:
+    """Group sources that have to be transformed in the same process.
+
+    Sources sharing a transform class also share its output directory,
+    so they are kept together and run one after another. The ontology keys
+    are the exception: each writes its own files in OntologyTransform's
+    directory, so each gets a group, and with jobs > 1 its own worker.
+    Args:
+        sources: A list of keys of DATA_SOURCES.
+
+    Returns:
+        A list of source groups, in order of first appearance.
+    """
+    groups: Dict[Any, List[str]] = {}
     for source in sources:
-        if source in DATA_SOURCES:
-            logging.info(f"Parsing {source}")
-            t = DATA_SOURCES[source](input_dir, output_dir)
-            if source in ONTOLOGIES.keys():
-                t.run(ONTOLOGIES[source])
-            else:
-                t.run()
+        key = source if source in ONTOLOGIES else DATA_SOURCES[source]
+        groups.setdefault(key, []).append(source)
+    return list(groups.values())
+
+
+class _SourceLogFilter(logging.Filter):
+    """Tag log records with the source currently being transformed."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        super().__init__()
+        self.source = ""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Add the current source name to the record."""
+        record.source = self.source
+        return True
+
+
+def _transform_worker(
+    input_dir: str,
+    output_dir: str,
+    group: List[str],
+    queue: Any,
+    output_format: str,
+    processes: int,
+) -> None:
+    """Transform a group of sources and report stats for each on the queue."""
+    source_filter = _SourceLogFilter()
+    handler = logging.StreamHandler()
+    handler.addFilter(source_filter)
+    handler.setFormatter(
+        logging.Formatter("%(asctime)s [%(source)s] %(levelname)s: %(message)s")
+    )
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(logging.INFO)
+
+    for source in group:
+        source_filter.source = source
+        start = time.perf_counter()
+        try:
+            stats = run_source(input_dir, output_dir, source, output_format, processes)
+        except Exception as e:
+            logging.exception(f"Transform of {source} failed")
+            stats = {
+                "source": source,
+                "status": f"failed: {e!r}",
+                "wall_time": time.perf_counter() - start,
+                "peak_rss": peak_rss(),
+            }
+        queue.put(stats)
+
+
+def transform_parallel(
+    input_dir: str,
+    output_dir: str,
+    sources: List[str],
+    jobs: int,
+    output_format: str = "tsv",
+    processes: int = 1,
+) -> List[Dict[str, Any]]:
+    """Transform sources concurrently, one worker process per source group.
+
+    Each group gets a fresh process, so peak RSS is reported per group,
+    and a failing source doesn't take down the others.
+    Args:
+        input_dir: A string pointing to the directory to import data from.
+        output_dir: A string pointing to the directory to output data to.
+        sources: A list of keys of DATA_SOURCES.
+        jobs: Maximum number of worker processes running at once.
+        output_format: Format of the node and edge files [tsv].
+        processes: Number of processes each source may parse in [1].
+
+    Returns:
+        A list of dicts with per-source stats, in the order of sources.
+    """
+    queue: Any = multiprocessing.Queue()
+    pending = group_sources(sources)
+    running: Dict[Any, Any] = {}
+    results: Dict[str, Dict[str, Any]] = {}
+    started: Dict[Any, float] = {}
+
+    while pending or running:
+        while pending and len(running) < jobs:
+            group = pending.pop(0)
+            p = multiprocessing.Process(
+                target=_transform_worker,
+                args=(input_dir, output_dir, group, queue, output_format, processes),
+                name="+".join(group),
+            )
+            p.start()
+            running[p.sentinel] = (p, group)
+            started[p.sentinel] = time.perf_counter()
+
+        for sentinel in wait(list(running.keys())):
+            p, group = running.pop(sentinel)
+            # drain what the worker reported before it exited; stats from
+            # other workers may be interleaved, they are keyed by source
+            while not all(source in results for source in group):
+                try:
+                    stats = queue.get(timeout=1)
+                except Empty:
+                    break
+                results[stats["source"]] = stats
+            p.join()
+            for source in group:
+                if source not in results:
+                    results[source] = {
+                        "source": source,
+                        "status": f"failed: worker exited with code {p.exitcode}",
+                        "wall_time": time.perf_counter() - started[sentinel],
+                        "peak_rss": 0.0,
+                    }
+
+    return [results[source] for source in sources]
+
+
+def format_transform_stats(stats: List[Dict[str, Any]]) -> str:
+    """Format per-source transform stats as a table.
+
+    Args:
+        stats: A list of dicts as returned by transform().
+
+    Returns:
+        A multi-line string.
+    """
+    lines = [f"{'source':<24} {'wall time (s)':>14} {'peak RSS (MB)':>14}  status"]
+    for s in stats:
+        lines.append(
+            f"{s['source']:<24} {s['wall_time']:>14.1f} "
+            f"{s['peak_rss']:>14.1f}  {s['status']}"
+        )
+    return "\n".join(lines)
@@ -1,20 +1,193 @@
 """Transform class for CHEMBL data."""
 
 import json
-from typing import Dict, List, Optional, Set
+import logging
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, Optional,
+                    Set, Tuple)
 
 from kg_covid_19.transform_utils.transform import Transform
-from kg_covid_19.utils import normalize_curies, write_node_edge_item
+from kg_covid_19.utils import NodeEdgeWriter, NormalizationMap
+from kg_covid_19.utils.normalize_utils import DRUGCENTRAL_MAP
+
+try:
+    import ijson  # type: ignore
+except ImportError:  # a dependency, but records can still be loaded without it
+    ijson = None
 
 TAXON_MAP = {
     "Severe acute respiratory syndrome coronavirus 2": "NCBITaxon:2697049",
     "SARS-CoV-2": "NCBITaxon:2697049",
 }
 
+# properties parsed from each kind of record, and their column names if renamed
+ACTIVITY_PROPERTIES = {
+    "assay_organism",
+    "assay_chembl_id",
+    "document_chembl_id",
+    "target_chembl_id",
+    "target_organism",
+    "target_pref_name",
+    "molecule_chembl_id",
+    "standard_units",
+    "standard_type",
+    "standard_relation",
+    "standard_value",
+    "uo_units",
+}
+ACTIVITY_REMAP = {
+    "molecule_chembl_id": "subject",
+    "target_chembl_id": "object",
+    "document_chembl_id": "publications",
+    "assay_chembl_id": "assay",
+}
+MOLECULE_PROPERTIES = {
+    "molecule_type",
+    "polymer_flag",
+    "inorganic_flag",
+    "natural_product",
+    "synonyms",
+    "molecule_properties",
+    "canonical_smiles",
+    "full_molformula",
+    "pref_name",
+}
+MOLECULE_REMAP = {
+    "pref_name": "name",
+    "full_molformula": "molecular_formula",
+    "synonyms": "synonym",
+}
+ASSAY_PROPERTIES = {
+    "assay_type",
+    "assay_tax_id",
+    "assay_cell_type",
+    "assay_tissue",
+    "assay_strain",
+    "description",
+    "assay_chembl_id",
+    "document_chembl_id",
+    "tissue_chembl_id",
+    "confidence_score",
+    "bao_format",
+    "bao_label",
+}
+ASSAY_REMAP = {
+    "assay_cell_type": "cell_type",
+    "assay_tissue": "tissue",
+    "assay_strain": "strain",
+    "assay_tax_id": "in_taxon",
+    "document_chembl_id": "publications",
+}
+DOCUMENT_PROPERTIES = {"title", "pubmed_id", "doi"}
+DOCUMENT_REMAP: Dict = {}
+
+# what a flattening plan does with a key of a dict, given the type of its value
+EMIT, EXPAND, DESCEND, DESCEND_LIST = range(4)
+
+
+class FlatteningPlan:
+    """Flatten records of one kind to properties, like parse_doc_fields().
+
+    ChEMBL records of a kind share a handful of shapes. The steps for a dict
+    are compiled once per shape (its keys and the types of their values) and
+    reused, so scalars that are not parsed are skipped without being looked at,
+    and no intermediate dicts are built for nested records.
+    """
+
+    def __init__(self, allowed_properties: Set[str], remap: Optional[Dict] = None):
+        """Initialize.
+
+        Args:
+            allowed_properties: properties that are to be parsed
+            remap: properties that are to be remapped from one name to another
+        """
+        self.remap: Dict = remap if remap else {}
+        self.names = {k: self.remap.get(k, k) for k in allowed_properties}
+        self.steps: Dict[Tuple, List[Tuple[str, int, str]]] = {}
+
+    def __call__(self, record: Dict) -> Dict:
+        """Flatten a record.
+
+        Args:
+            record: The record or document from the API
+
+        Returns:
+            A dict of properties, the same as parse_doc_fields() gives
+
+        """
+        values: List[Tuple[str, Any]] = []
+        self.flatten(record, values.append)
+
+        properties: Dict = {}
+        for key, value in values:
+            if key in properties:
+                if isinstance(properties[key], str):
+                    properties[key] = [properties[key]]
+                properties[key].append(value)
+            else:
+                properties[key] = value
+
+        for k, v in properties.items():
+            if isinstance(v, list):
+                properties[k] = "|".join(v)
+
+        return properties
+
+    def flatten(self, d: Dict, emit: Callable[[Tuple[str, Any]], None]) -> None:
+        """Emit (property, value) pairs of a dict, in document order."""
+        shape = (tuple(d), tuple(map(type, d.values())))
+        steps = self.steps.get(shape)
+        if steps is None:
+            steps = self.compile(shape)
+        for k, op, name in steps:
+            v = d[k]
+            if op is EMIT:
+                emit((name, str(v) if v else ""))
+            elif op is EXPAND:
+                remap = self.remap
+                for k2, v2 in v.items():
+                    emit((remap.get(k2, k2), v2))
+            elif op is DESCEND:
+                self.flatten(v, emit)
+            elif v and isinstance(v[0], dict):
+                for x in v:
+                    self.flatten(x, emit)
+
+    def compile(self, shape: Tuple) -> List[Tuple[str, int, str]]:
+        """Compile the steps for dicts of a shape.
+
+        Args:
+            shape: The keys of a dict, and the types of their values
+
+        Returns:
+            A list of (key, operation, property name or "" if it emits none)
+
+        """
+        steps: List[Tuple[str, int, str]] = []
+        for k, t in zip(*shape):
+            if k in self.names:
+                if issubclass(t, dict):
+                    steps.append((k, EXPAND, ""))
+                else:
+                    steps.append((k, EMIT, self.names[k]))
+            elif issubclass(t, dict):
+                steps.append((k, DESCEND, ""))
+            elif issubclass(t, list):
+                steps.append((k, DESCEND_LIST, ""))
+        self.steps[shape] = steps
+        return steps
+
 
 class ChemblTransform(Transform):
     """Parse ChEMBL and transform into a property graph representation."""
 
+    INPUT_FILES = [
+        "chembl_molecule_records.json",
+        "chembl_assay_records.json",
+        "chembl_document_records.json",
+        "chembl_activity_records.json",
+    ]
+    MAP_FILES = [DRUGCENTRAL_MAP]
+
     def __init__(
         self, input_dir: Optional[str] = None, output_dir: Optional[str] = None
     ):
@@ -25,6 +198,13 @@ class ChemblTransform(Transform):
         self._end = None
         self._node_header: Set = set()
         self._edge_header: Set = set()
+        # the assay properties are parsed without their remap, as they always were
+        self.plans = {
+            "molecule": FlatteningPlan(MOLECULE_PROPERTIES, MOLECULE_REMAP),
+            "assay": FlatteningPlan(ASSAY_PROPERTIES),
+            "document": FlatteningPlan(DOCUMENT_PROPERTIES),
+            "activity": FlatteningPlan(ACTIVITY_PROPERTIES, ACTIVITY_REMAP),
+        }
 
     def run(
         self, data_file: Optional[str] = None, chembl_data_files: Optional[dict] = None
@@ -60,21 +240,66 @@ class ChemblTransform(Transform):
                 "activity_data": "data/raw/chembl_activity_records.json",
             }
 
-        # ChEMBL molecules
-        molecules_data = self.read_json(chembl_data_files["molecules_data"])
-        molecule_nodes = self.parse_chembl_molecules(molecules_data)
+        node_header, edge_header = self.headers()
+        with NodeEdgeWriter(
+            self.output_node_file, self.output_edge_file, node_header, edge_header
+        ) as writer:
+            # records are streamed from the files and written as they are parsed,
+            # molecule ids are normalized on the way with the shared map
+            norm_map = NormalizationMap.load()
+
+            # the writers project the dicts to rows in header order
+            writer.write_node_dicts(
+                map(
+                    norm_map.normalize_entry,
+                    map(
+                        self.molecule_to_node,
+                        self.iter_json(chembl_data_files["molecules_data"]),
+                    ),
+                )
+            )
+            writer.write_node_dicts(
+                map(self.assay_to_node, self.iter_json(chembl_data_files["assay_data"]))
+            )
+            writer.write_node_dicts(
+                map(
+                    self.document_to_node,
+                    self.iter_json(chembl_data_files["document_data"]),
+                )
+            )
 
-        # ChEMBL assay
-        assays_data = self.read_json(chembl_data_files["assay_data"])
-        assay_nodes = self.parse_chembl_assay(assays_data)
+            # write node for organisms in TAXON_MAP
+            writer.write_node_dicts(
+                {
+                    "id": org_curie,
+                    "name": org_name,
+                    "category": "biolink:OrganismTaxon",
+                }
+                for org_curie, org_name in {v: k for k, v in TAXON_MAP.items()}.items()
+            )
 
-        # ChEMBL document
-        documents_data = self.read_json(chembl_data_files["document_data"])
-        document_nodes = self.parse_chembl_document(documents_data)
+            writer.write_edge_dicts(
+                map(
+                    self.activity_to_edge,
+                    self.iter_json(chembl_data_files["activity_data"]),
+                )
+            )
 
-        # ChEMBL activity
-        activities_data = self.read_json(chembl_data_files["activity_data"])
-        activity_edges = self.parse_chembl_activity(activities_data)
+    def headers(self) -> Tuple[List[str], List[str]]:
+        """Get the node and edge headers, before any record is parsed.
+
+        The columns only depend on the properties parsed from each kind of
+        record, so the files can be written while records are streamed.
+        Returns:
+            The sorted node header and edge header.
+        """
+        for properties, remap in [
+            (MOLECULE_PROPERTIES, MOLECULE_REMAP),
+            (ASSAY_PROPERTIES, ASSAY_REMAP),
+            (DOCUMENT_PROPERTIES, DOCUMENT_REMAP),
+        ]:
+            self._node_header.update(remap.get(x, x) for x in properties)
+        self._edge_header.update(ACTIVITY_REMAP.get(x, x) for x in ACTIVITY_PROPERTIES)
 
         self.node_header.extend(
             [x for x in self._node_header if x not in self.node_header]
@@ -82,54 +307,9 @@ class ChemblTransform(Transform):
         self.edge_header.extend(
             [x for x in self._edge_header if x not in self.edge_header]
         )
+        return sorted(self.node_header), sorted(self.edge_header)
 
-        node_handle = open(self.output_node_file, "w")
-        edge_handle = open(self.output_edge_file, "w")
-        node_handle.write("\t".join(sorted(self.node_header)) + "\n")
-        edge_handle.write("\t".join(sorted(self.edge_header)) + "\n")
-
-        molecule_nodes = normalize_curies(
-            map_path="./maps/drugcentral-maps-kg_covid_19-0.1.sssom.tsv",
-            entries=molecule_nodes,
-        )
-
-        for n in molecule_nodes:
-            write_node_edge_item(
-                fh=node_handle,
-                header=sorted(self.node_header),
-                data=[n[x] if x in n else "" for x in sorted(self.node_header)],
-            )
-        for n in assay_nodes:
-            write_node_edge_item(
-                fh=node_handle,
-                header=sorted(self.node_header),
-                data=[n[x] if x in n else "" for x in sorted(self.node_header)],
-            )
-
-        for n in document_nodes:
-            write_node_edge_item(
-                fh=node_handle,
-                header=sorted(self.node_header),
-                data=[n[x] if x in n else "" for x in sorted(self.node_header)],
-            )
-
-        # write node for organisms in TAXON_MAP
-        for org_curie, org_name in {v: k for k, v in TAXON_MAP.items()}.items():
-            o = {"id": org_curie, "name": org_name, "category": "biolink:OrganismTaxon"}
-            write_node_edge_item(
-                fh=node_handle,
-                header=sorted(self.node_header),
-                data=[o[x] if x in o else "" for x in sorted(self.node_header)],
-            )
-
-        for e in activity_edges:
-            write_node_edge_item(
-                fh=edge_handle,
-                header=sorted(self.edge_header),
-                data=[e[x] if x in e else "" for x in sorted(self.edge_header)],
-            )
-
-    def parse_chembl_activity(self, data: List):
+    def parse_chembl_activity(self, data: Iterable[Dict]) -> List[Dict]:
         """Parse ChEMBL Activity records.
 
         An activity document links 4 entities,
@@ -144,197 +324,150 @@ class ChemblTransform(Transform):
         The edge will also have measurements as edge properties that describe the
         activity/interaction further.
         Args:
-            data: A list of ChEMBL Activity records
+            data: ChEMBL Activity records
 
         Returns:
             A list
 
         """
-        edge_label = "biolink:interacts_with"
-        relation = "RO:0002436"
-        allowed_properties = {
-            "assay_organism",
-            "assay_chembl_id",
-            "document_chembl_id",
-            "target_chembl_id",
-            "target_organism",
-            "target_pref_name",
-            "molecule_chembl_id",
-            "standard_units",
-            "standard_type",
-            "standard_relation",
-            "standard_value",
-            "uo_units",
-        }
-        remap = {
-            "molecule_chembl_id": "subject",
-            "target_chembl_id": "object",
-            "document_chembl_id": "publications",
-            "assay_chembl_id": "assay",
-        }
-        self._edge_header.update(
-            [remap[x] if x in remap else x for x in allowed_properties]
-        )
+        self._edge_header.update(ACTIVITY_REMAP.get(x, x) for x in ACTIVITY_PROPERTIES)
+        return [self.activity_to_edge(record) for record in data]
 
-        edges = []
-        for record in data:
-            activity_id = record["_source"]["activity_id"]
-            edge_properties = self.parse_doc_fields(
-                record["_source"], allowed_properties, remap
-            )
-            edge_properties["id"] = str(activity_id)
-            edge_properties["predicate"] = edge_label
-            edge_properties["relation"] = relation
-            edge_properties["subject"] = f"CHEMBL.COMPOUND:{edge_properties['subject']}"
-            edge_properties["object"] = f"CHEMBL.TARGET:{edge_properties['object']}"
-            if "target_organism" in edge_properties:
-                # remap CHEMBL.TARGET that are just references to SARS-CoV-2
-                if edge_properties["target_organism"] in TAXON_MAP:
-                    edge_properties["object"] = TAXON_MAP[
-                        edge_properties["target_organism"]
-                    ]
-            edge_properties["assay"] = f"CHEMBL.ASSAY:{edge_properties['assay']}"
-            if edge_properties["uo_units"]:
-                edge_properties["uo_units"] = edge_properties["uo_units"].replace(
-                    "_", ":"
-                )
-            edge_properties["provided_by"] = f"{self.source_name} {self.subset}"
-            edge_properties["type"] = "biolink:Association"
-            edges.append(edge_properties)
-        return edges
+    def activity_to_edge(self, record: Dict) -> Dict:
+        """Parse a ChEMBL Activity record to an edge.
+
+        Args:
+            record: A ChEMBL Activity record
 
-    def parse_chembl_molecules(self, data: List):
+        Returns:
+            A dict of edge properties
+
+        """
+        edge_label = "biolink:interacts_with"
+        relation = "RO:0002436"
+        activity_id = record["_source"]["activity_id"]
+        edge_properties = self.plans["activity"](record["_source"])
+        edge_properties["id"] = str(activity_id)
+        edge_properties["predicate"] = edge_label
+        edge_properties["relation"] = relation
+        edge_properties["subject"] = f"CHEMBL.COMPOUND:{edge_properties['subject']}"
+        edge_properties["object"] = f"CHEMBL.TARGET:{edge_properties['object']}"
+        if "target_organism" in edge_properties:
+            # remap CHEMBL.TARGET that are just references to SARS-CoV-2
+            if edge_properties["target_organism"] in TAXON_MAP:
+                edge_properties["object"] = TAXON_MAP[
+                    edge_properties["target_organism"]
+                ]
+        edge_properties["assay"] = f"CHEMBL.ASSAY:{edge_properties['assay']}"
+        if edge_properties["uo_units"]:
+            edge_properties["uo_units"] = edge_properties["uo_units"].replace("_", ":")
+        edge_properties["provided_by"] = f"{self.source_name} {self.subset}"
+        edge_properties["type"] = "biolink:Association"
+        return edge_properties
+
+    def parse_chembl_molecules(self, data: Iterable[Dict]) -> List[Dict]:
         """Parse ChEMBL Molecule records.
 
         Args:
-            data: A list of ChEMBL Molecule records
+            data: ChEMBL Molecule records
         Returns:
             A list
         """
-        node_category = ["biolink:Drug"]
-        allowed_properties = {
-            "molecule_type",
-            "polymer_flag",
-            "inorganic_flag",
-            "natural_product",
-            "synonyms",
-            "molecule_properties",
-            "canonical_smiles",
-            "full_molformula",
-            "pref_name",
-        }
-        remap = {
-            "pref_name": "name",
-            "full_molformula": "molecular_formula",
-            "synonyms": "synonym",
-        }
-        self._node_header.update(
-            [remap[x] if x in remap else x for x in allowed_properties]
-        )
+        self._node_header.update(MOLECULE_REMAP.get(x, x) for x in MOLECULE_PROPERTIES)
+        return [self.molecule_to_node(record) for record in data]
 
-        nodes = []
-        for record in data:
-            molecule_id = record["_source"]["molecule_chembl_id"]
-            node_properties = self.parse_doc_fields(
-                record["_source"], allowed_properties, remap
-            )
-            node_properties["category"] = "|".join(node_category)
-            node_properties["id"] = f"CHEMBL.COMPOUND:{molecule_id}"
-            node_properties["provided_by"] = f"{self.source_name} {self.subset}"
-            nodes.append(node_properties)
-        return nodes
+    def molecule_to_node(self, record: Dict) -> Dict:
+        """Parse a ChEMBL Molecule record to a node.
 
-    def parse_chembl_assay(self, data: List):
+        Args:
+            record: A ChEMBL Molecule record
+        Returns:
+            A dict of node properties
+        """
+        node_category = ["biolink:Drug"]
+        molecule_id = record["_source"]["molecule_chembl_id"]
+        node_properties = self.plans["molecule"](record["_source"])
+        node_properties["category"] = "|".join(node_category)
+        node_properties["id"] = f"CHEMBL.COMPOUND:{molecule_id}"
+        node_properties["provided_by"] = f"{self.source_name} {self.subset}"
+        return node_properties
+
+    def parse_chembl_assay(self, data: Iterable[Dict]) -> List[Dict]:
         """Parse ChEMBL Assay records.
 
         Args:
-            data: A list of ChEMBL Assay records
+            data: ChEMBL Assay records
 
         Returns:
             A list
         """
+        self._node_header.update(ASSAY_REMAP.get(x, x) for x in ASSAY_PROPERTIES)
+        return [self.assay_to_node(record) for record in data]
+
+    def assay_to_node(self, record: Dict) -> Dict:
+        """Parse a ChEMBL Assay record to a node.
+
+        Args:
+            record: A ChEMBL Assay record
+
+        Returns:
+            A dict of node properties
+        """
         node_category = ["biolink:Assay"]
         node_type = "SIO:001007"
-        allowed_properties = {
-            "assay_type",
-            "assay_tax_id",
-            "assay_cell_type",
-            "assay_tissue",
-            "assay_strain",
-            "description",
-            "assay_chembl_id",
-            "document_chembl_id",
-            "tissue_chembl_id",
-            "confidence_score",
-            "bao_format",
-            "bao_label",
-        }
-        remap = {
-            "assay_cell_type": "cell_type",
-            "assay_tissue": "tissue",
-            "assay_strain": "strain",
-            "assay_tax_id": "in_taxon",
-            "document_chembl_id": "publications",
-        }
-        self._node_header.update(
-            [remap[x] if x in remap else x for x in allowed_properties]
-        )
-
-        nodes = []
-        for record in data:
-            assay_id = record["_source"]["assay_chembl_id"]
-            node_properties = self.parse_doc_fields(
-                record["_source"], allowed_properties
+        assay_id = record["_source"]["assay_chembl_id"]
+        node_properties = self.plans["assay"](record["_source"])
+        node_properties["id"] = f"CHEMBL.ASSAY:{assay_id}"
+        node_properties["category"] = "|".join(node_category)
+        node_properties["node_type"] = node_type
+        if node_properties["bao_format"]:
+            node_properties["bao_format"] = node_properties["bao_format"].replace(
+                "_", ":"
             )
-            node_properties["id"] = f"CHEMBL.ASSAY:{assay_id}"
-            node_properties["category"] = "|".join(node_category)
-            node_properties["node_type"] = node_type
-            if node_properties["bao_format"]:
-                node_properties["bao_format"] = node_properties["bao_format"].replace(
-                    "_", ":"
-                )
-            node_properties["provided_by"] = f"{self.source_name} {self.subset}"
-            nodes.append(node_properties)
-        return nodes
+        node_properties["provided_by"] = f"{self.source_name} {self.subset}"
+        return node_properties
 
-    def parse_chembl_document(self, data: List):
+    def parse_chembl_document(self, data: Iterable[Dict]) -> List[Dict]:
         """Parse ChEMBL Document records.
 
         Args:
-            data: A list of ChEMBL Document records
+            data: ChEMBL Document records
 
         Returns:
             A list
         """
-        node_category = ["biolink:Publication"]
-        allowed_properties = {"title", "pubmed_id", "doi"}
-        remap: Dict = {}
-        self._node_header.update(
-            [remap[x] if x in remap else x for x in allowed_properties]
-        )
+        self._node_header.update(DOCUMENT_REMAP.get(x, x) for x in DOCUMENT_PROPERTIES)
+        return [self.document_to_node(record) for record in data]
 
-        nodes = []
-        for record in data:
-            document_id = record["_source"]["document_chembl_id"]
-            node_properties = self.parse_doc_fields(
-                record["_source"], allowed_properties
-            )
-            if node_properties["pubmed_id"]:
-                node_properties["id"] = f"PMID:{node_properties['pubmed_id']}"
-            elif node_properties["doi"]:
-                node_properties["id"] = f"DOI:{node_properties['doi']}"
-            else:
-                node_properties["id"] = f"CHEMBL.DOCUMENT:{document_id}"
-            node_properties["category"] = "|".join(node_category)
-            node_properties["provided_by"] = f"{self.source_name} {self.subset}"
-            nodes.append(node_properties)
-        return nodes
+    def document_to_node(self, record: Dict) -> Dict:
+        """Parse a ChEMBL Document record to a node.
+
+        Args:
+            record: A ChEMBL Document record
+
+        Returns:
+            A dict of node properties
+        """
+        node_category = ["biolink:Publication"]
+        document_id = record["_source"]["document_chembl_id"]
+        node_properties = self.plans["document"](record["_source"])
+        if node_properties["pubmed_id"]:
+            node_properties["id"] = f"PMID:{node_properties['pubmed_id']}"
+        elif node_properties["doi"]:
+            node_properties["id"] = f"DOI:{node_properties['doi']}"
+        else:
+            node_properties["id"] = f"CHEMBL.DOCUMENT:{document_id}"
+        node_properties["category"] = "|".join(node_category)
+        node_properties["provided_by"] = f"{self.source_name} {self.subset}"
+        return node_properties
 
     def parse_doc_fields(
         self, record: dict, allowed_properties: set, remap: Optional[dict] = None
     ):
         """Parse a record from the API.
 
+        The transform itself parses records with a FlatteningPlan per kind of
+        record, which gives the same properties.
         Args:
             record: The record or document from the API
             allowed_properties: properties that are to be parsed
@@ -402,3 +535,23 @@ class ChemblTransform(Transform):
         """
         with open(json_file, "r") as f:
             return json.load(f)
+
+    def iter_json(self, json_file: str) -> Iterator[Dict]:
+        """Iterate over the records of a json file, one at a time.
+
+        With ijson installed the file is parsed incrementally, so a record
+        file is never held in memory in full. Without it, the whole file is
+        loaded, with a warning.
+        Args:
+            json_file: json file with a list of records
+        Returns:
+            An iterator of records
+        """
+        with open(json_file, "rb") as f:
+            if ijson is None:
+                logging.warning(
+                    f"ijson is not installed, loading all of {json_file} in memory"
+                )
+                yield from json.load(f)
+            else:
+                yield from ijson.items(f, "item", use_float=True)
@@ -7,11 +7,11 @@ from collections import defaultdict
 from typing import Dict, List, Optional
 
 from kg_covid_19.transform_utils.transform import Transform
+from kg_covid_19.utils import NodeEdgeWriter
 from kg_covid_19.utils.transform_utils import (ItemInDictNotFoundError,
                                                data_to_dict,
                                                get_item_by_priority,
-                                               parse_header,
-                                               write_node_edge_item)
+                                               parse_header)
 
 """
 Ingest drug - drug target interactions from Drug Central.
@@ -26,6 +26,8 @@ And extracts Drug -> Protein interactions.
 class DrugCentralTransform(Transform):
     """Transform DrugCentral interaction data."""
 
+    INPUT_FILES = ["drug.target.interaction.tsv.gz"]
+
     def __init__(
         self, input_dir: Optional[str] = None, output_dir: Optional[str] = None
     ) -> None:
@@ -63,12 +65,12 @@ class DrugCentralTransform(Transform):
             "type",
         ]
 
-        with open(self.output_node_file, "w") as node, open(
-            self.output_edge_file, "w"
-        ) as edge, gzip.open(interactions_file, "rt") as interactions:
-
-            node.write("\t".join(self.node_header) + "\n")
-            edge.write("\t".join(self.edge_header) + "\n")
+        with NodeEdgeWriter(
+            self.output_node_file,
+            self.output_edge_file,
+            self.node_header,
+            self.edge_header,
+        ) as writer, gzip.open(interactions_file, "rt") as interactions:
 
             header_items = parse_header(interactions.readline())
 
@@ -100,10 +102,8 @@ class DrugCentralTransform(Transform):
 
                 # Write drug node
                 if drug_id not in seen_drugs:
-                    write_node_edge_item(
-                        fh=node,
-                        header=self.node_header,
-                        data=[
+                    writer.write_node(
+                        [
                             drug_id,
                             items_dict["DRUG_NAME"],
                             drug_node_type,
@@ -117,10 +117,8 @@ class DrugCentralTransform(Transform):
                     protein_id = uniprot_curie_prefix + uniprot_id
 
                     if protein_id not in seen_proteins:
-                        write_node_edge_item(
-                            fh=node,
-                            header=self.node_header,
-                            data=[
+                        writer.write_node(
+                            [
                                 protein_id,
                                 name,
                                 protein_node_type,
@@ -131,10 +129,8 @@ class DrugCentralTransform(Transform):
                         seen_proteins[protein_id] += 1
 
                     # WRITE EDGES
-                    write_node_edge_item(
-                        fh=edge,
-                        header=self.edge_header,
-                        data=[
+                    writer.write_edge(
+                        [
                             drug_id,
                             drug_protein_edge_label,
                             protein_id,
@@ -18,12 +18,19 @@ class GocamTransform(Transform):
     RDF edge project (REP) pattern.
     """
 
+    INPUT_FILES = ["lifted-go-cams-20200619.nt"]
+    # KGX writes the TSV files
+    OUTPUT_FORMATS = ["tsv"]
+
     def __init__(
         self, input_dir: Optional[str] = None, output_dir: Optional[str] = None
     ):
         """Initialize."""
         source_name = "GOCAMs"
         super().__init__(source_name, input_dir, output_dir)
+        # the files KGX writes
+        self.output_node_file = os.path.join(self.output_dir, "GOCAMs_nodes.tsv")
+        self.output_edge_file = os.path.join(self.output_dir, "GOCAMs_edges.tsv")
 
     def run(self, data_file: Optional[str] = None, **kwargs) -> None:
         """Perform transformations to process GO-CAMs.
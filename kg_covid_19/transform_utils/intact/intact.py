@@ -2,16 +2,17 @@
 
 import fnmatch
 import logging
+import multiprocessing
 import os
 import re
-import tempfile
 from collections import defaultdict
-from typing import Dict, List, Optional, Union
-from xml.dom import minidom  # type: ignore
+from itertools import repeat
+from typing import IO, Dict, Iterator, List, Optional, Set, Tuple, Union
+from xml.etree.ElementTree import Element, iterparse
+from zipfile import ZipFile
 
 from kg_covid_19.transform_utils.transform import Transform
-from kg_covid_19.utils.transform_utils import (unzip_to_tempdir,
-                                               write_node_edge_item)
+from kg_covid_19.utils import NodeEdgeWriter
 
 """
 Ingest IntAct protein/protein interaction data
@@ -27,10 +28,16 @@ Each XML file is an miXML following this spec:
 https://github.com/HUPO-PSI/miXML
 """
 
+# elements parse_xml_to_nodes_edges() streams, cleared once they are parsed
+MIXML_TAGS = {"interactor", "experimentDescription", "interaction"}
+
 
 class IntAct(Transform):
     """Transform IntAct PPI data."""
 
+    PARALLEL = True
+    INPUT_FILES = ["intact_coronavirus.zip"]
+
     def __init__(
         self, input_dir: Optional[str] = None, output_dir: Optional[str] = None
     ) -> None:
@@ -79,8 +86,13 @@ class IntAct(Transform):
             "obj_exp_role",
         ]
 
-    def run(self, data_file: Optional[str] = None):
-        """Run transform to ingest data from IntAct for viral/human PPIs."""
+    def run(self, data_file: Optional[str] = None, processes: int = 1):
+        """Run transform to ingest data from IntAct for viral/human PPIs.
+
+        Args:
+            data_file: Path to the zip file of miXML files [intact_coronavirus.zip].
+            processes: Number of processes to parse XML files in [1].
+        """
         data_files = list()
         if not data_file:
             data_files.append(
@@ -91,97 +103,136 @@ class IntAct(Transform):
 
         zip_file = data_files[0]
 
-        # for tsv output:
-        output_node_file = os.path.join(self.output_dir, "nodes.tsv")
-        output_edge_file = os.path.join(self.output_dir, "edges.tsv")
-
         # make directory in data/transformed
         os.makedirs(self.output_dir, exist_ok=True)
 
-        with open(output_node_file, "w") as node, open(output_edge_file, "w") as edge:
-            # write node.tsv header
-            node.write("\t".join(self.node_header) + "\n")
-            edge.write("\t".join(self.edge_header) + "\n")
-
-            xml_tempdir = tempfile.mkdtemp()
-            unzip_to_tempdir(zip_file, xml_tempdir)
-
-            extracted_base_dir_list = os.listdir(xml_tempdir)
-            file_path = os.path.join(xml_tempdir, extracted_base_dir_list[0])
-            for file in os.listdir(file_path):
-                if not fnmatch.fnmatch(file, "*.xml"):
-                    logging.warning("Skipping non-xml file %s" % file)
-
-                nodes_edges = self.parse_xml_to_nodes_edges(
-                    os.path.join(file_path, file)
-                )
+        # XML files are parsed straight from the zip, in the order they are stored
+        with ZipFile(zip_file, "r") as zipfilehandler:
+            names = self.xml_members(zipfilehandler)
+
+            with NodeEdgeWriter(
+                self.output_node_file,
+                self.output_edge_file,
+                self.node_header,
+                self.edge_header,
+            ) as writer:
+                if processes > 1:
+                    # files are independent, results come back in file order
+                    with multiprocessing.Pool(
+                        processes, initializer=_init_intact_worker, initargs=(self,)
+                    ) as pool:
+                        results = pool.imap(
+                            _parse_intact_member, zip(repeat(zip_file), names)
+                        )
+                        for nodes_edges in results:
+                            writer.write_nodes(nodes_edges["nodes"])
+                            writer.write_edges(nodes_edges["edges"])
+                else:
+                    for name in names:
+                        with zipfilehandler.open(name) as xml_file:
+                            nodes_edges = self.parse_xml_to_nodes_edges(xml_file)
+                        writer.write_nodes(nodes_edges["nodes"])
+                        writer.write_edges(nodes_edges["edges"])
+
+    @staticmethod
+    def xml_members(zipfilehandler: ZipFile) -> List[str]:
+        """List the XML files in a zip file, warning about anything else.
+
+        Args:
+            zipfilehandler: The open zip file.
+        Returns:
+            Names of the XML members, in the order they are stored.
+        """
+        names = []
+        for member in zipfilehandler.infolist():
+            if member.is_dir():
+                continue
+            if not fnmatch.fnmatch(os.path.basename(member.filename), "*.xml"):
+                logging.warning("Skipping non-xml file %s" % member.filename)
+                continue
+            names.append(member.filename)
+        return names
 
-                # write out nodes
-                for this_node in nodes_edges["nodes"]:
-                    write_node_edge_item(
-                        fh=node, header=self.node_header, data=this_node
-                    )
-                # write out edges
-                for this_edge in nodes_edges["edges"]:
-                    write_node_edge_item(
-                        fh=edge, header=self.edge_header, data=this_edge
-                    )
+    def parse_xml_to_nodes_edges(self, xml_file: Union[str, IO[bytes]]) -> dict:
+        """Parse XML to nodes and edges.
 
-    def parse_xml_to_nodes_edges(self, xml_file: str) -> dict:
-        """Parse XML to nodes and edges."""
+        The miXML file is streamed, so only one interactor, experiment or
+        interaction is held as XML at a time. Interactions are reduced to small
+        records and turned into edges at the end of the file, once every
+        interactor and experiment they can refer to has been seen.
+        """
         parsed: Dict[str, list] = dict()
-        parsed["nodes"] = []
-        parsed["edges"] = []
-
-        xmldoc = minidom.parse(xml_file)
-
-        # nodes
 
         # store by interactor id, since this is what is referenced in edges
-        nodes_dict = dict()
-        for interactor in xmldoc.getElementsByTagName("interactor"):
-            (int_id, node_data) = self.interactor_to_node(interactor)
-            nodes_dict[int_id] = node_data
-
-        experiment_dict = self.parse_experiment_info(xmldoc)
-
-        # write nodes
-        for _, value in nodes_dict.items():
-            parsed["nodes"].append(value)
-
-        #
-        # edges
-        #
-        for interaction in xmldoc.getElementsByTagName("interaction"):
-            edges = self.interaction_to_edge(interaction, nodes_dict, experiment_dict)
-            for edge in edges:
-                parsed["edges"].append(edge)
+        nodes_dict: Dict[str, list] = dict()
+        exp_dict: dict = defaultdict(lambda: defaultdict(str))
+        records: List[Optional[tuple]] = []
+        for tag, element in iter_mixml(xml_file, MIXML_TAGS):
+            if tag == "interactor":
+                int_id, node_data = self.interactor_to_node(element)
+                nodes_dict[int_id] = node_data
+            elif tag == "experimentDescription":
+                self.add_experiment_info(exp_dict, element)
+            else:
+                records.append(self.interaction_to_record(element))
 
+        parsed["nodes"] = list(nodes_dict.values())
+        parsed["edges"] = [
+            edge
+            for record in records
+            for edge in self.record_to_edges(record, nodes_dict, exp_dict)
+        ]
         return parsed
 
     def interaction_to_edge(
-        self, interaction: minidom.Element, nodes_dict: dict, exp_dict: dict
+        self, interaction: Element, nodes_dict: dict, exp_dict: dict
     ) -> list:
         """Parse an interaction to an edge."""
-        edges: List[list] = []
+        record = self.interaction_to_record(interaction)
+        return self.record_to_edges(record, nodes_dict, exp_dict)
+
+    def interaction_to_record(self, interaction: Element) -> Optional[tuple]:
+        """Reduce an interaction to the data its edges are made from.
+
+        :param interaction: an interaction element
+        :return: (interaction type, experiment ref, [(interactor ref, experimental
+            role) per participant]), or None if the interaction gives no edges
+        """
         try:
-            interaction_type = interaction.getElementsByTagName("interactionType")
-            interaction_type_str = (
-                interaction_type[0]
-                .getElementsByTagName("shortLabel")[0]
-                .firstChild._data  # type: ignore
+            interaction_type_str = first_text(
+                interaction, "interactionType", "shortLabel"
             )
 
-            participants = interaction.getElementsByTagName("participant")
+            participants = list(interaction.iter("participant"))
             # skip interactions with < 2 or > 3 participants
             if len(participants) not in [2, 3]:
-                return edges
+                return None
 
-            experiment_ref = (
-                interaction.getElementsByTagName("experimentRef")[0].childNodes[0].data
-            )
-        except (KeyError, IndexError, AttributeError) as e:
+            experiment_ref = first_text(interaction, "experimentRef")
+        except (KeyError, IndexError) as e:
             logging.warning("Problem getting interactors from interaction: %s" % e)
+            return None
+
+        return (
+            interaction_type_str,
+            experiment_ref,
+            [
+                (
+                    self.participant_interactor_ref(participant),
+                    self.participant_experimental_role(participant),
+                )
+                for participant in participants
+            ],
+        )
+
+    def record_to_edges(
+        self, record: Optional[tuple], nodes_dict: dict, exp_dict: dict
+    ) -> list:
+        """Make the edges of an interaction record."""
+        edges: List[list] = []
+        if record is None:
+            return edges
+        interaction_type_str, experiment_ref, participants = record
 
         detection_method = ""
         publication = ""
@@ -195,20 +246,14 @@ class IntAct(Transform):
 
         # write out an edge for every pairwise combination of participants (1 per pair)
         for i in range(0, len(participants)):
-            for j in range(i, len(participants)):
-                participant1 = participants[i]
-                participant2 = participants[j]
-                if participant1 == participant2:
-                    continue
-                p1_exp_role = self.participant_experimental_role(participant1)
-                p2_exp_role = self.participant_experimental_role(participant2)
-
-                node1: Union[str, None] = self.participant_to_node(
-                    participant1, nodes_dict
-                )
-                node2: Union[str, None] = self.participant_to_node(
-                    participant2, nodes_dict
+            for j in range(i + 1, len(participants)):
+                (ref1, p1_exp_role), (ref2, p2_exp_role) = (
+                    participants[i],
+                    participants[j],
                 )
+
+                node1: Union[str, None] = self.interactor_ref_to_node(ref1, nodes_dict)
+                node2: Union[str, None] = self.interactor_ref_to_node(ref2, nodes_dict)
                 if None not in [node1, node2]:
                     edges.append(
                         [
@@ -229,48 +274,49 @@ class IntAct(Transform):
 
         return edges
 
-    def participant_experimental_role(self, participant: minidom.Element) -> str:
+    def participant_experimental_role(self, participant: Element) -> str:
         """Parse an experimental role."""
         try:
-            # xml why are you like this
-            role = (
-                participant.getElementsByTagName("experimentalRole")[0]  # type: ignore
-                .getElementsByTagName("shortLabel")[0]
-                .firstChild.data
-            )
-            return role
-        except (KeyError, IndexError, AttributeError):
+            return first_text(participant, "experimentalRole", "shortLabel")
+        except IndexError:
             return ""
 
+    def participant_interactor_ref(self, participant: Element) -> Union[str, None]:
+        """Parse the id of the interactor an interaction participant refers to."""
+        try:
+            return first_text(participant, "interactorRef")
+        except IndexError:
+            return None
+
+    def interactor_ref_to_node(
+        self, interact_ref: Union[str, None], nodes_dict: dict
+    ) -> Union[str, None]:
+        """Look up the node id of an interactor ref."""
+        if interact_ref not in nodes_dict:
+            return None
+        return nodes_dict[interact_ref][0]
+
     def participant_to_node(
-        self, participant: minidom.Element, nodes_dict: dict
+        self, participant: Element, nodes_dict: dict
     ) -> Union[str, None]:
         """Parse an interation participant as a node."""
-        try:
-            interact_ref = (
-                participant.getElementsByTagName("interactorRef")[0]  # type: ignore
-                .childNodes[0]
-                .data
-            )
-            node = nodes_dict[interact_ref][0]
-            return node
-        except (KeyError, IndexError, AttributeError):
-            return None
+        return self.interactor_ref_to_node(
+            self.participant_interactor_ref(participant), nodes_dict
+        )
 
-    def interactor_to_node(self, interactor: minidom.Element) -> List[Union[int, list]]:
-        """Parse an interactor as a list of nodes."""
-        interactor_id = interactor.attributes["id"].value
+    def interactor_to_node(self, interactor: Element) -> Tuple[str, list]:
+        """Parse an interactor as its id and node."""
+        interactor_id = interactor.attrib["id"]
 
         this_id = ""
         try:
-            xrefs = interactor.getElementsByTagName("xref")
-            pr = xrefs[0].getElementsByTagName("primaryRef")
-            db = pr[0].attributes["db"].value
+            pr = first_element(interactor, "xref", "primaryRef")
+            db = pr.attrib["db"]
 
             prefix = ""
             if db in self.db_to_prefix:
                 prefix = self.db_to_prefix[db]
-            id_val = pr[0].attributes["id"].value
+            id_val = pr.attrib["id"]
 
             # chebi ids (and only these) are already prepended with
             # prefix for some reason
@@ -279,86 +325,158 @@ class IntAct(Transform):
             else:
                 this_id = ":".join([prefix, id_val])
 
-        except (KeyError, IndexError, AttributeError) as e:
+        except (KeyError, IndexError) as e:
             logging.warning("Problem parsing id in xref interaction %s" % e)
 
         name = ""
 
         try:
-            tax_id = (
-                interactor.getElementsByTagName("organism")[0]
-                .attributes["ncbiTaxId"]
-                .value
-            )
-        except (KeyError, IndexError, AttributeError):
+            tax_id = first_element(interactor, "organism").attrib["ncbiTaxId"]
+        except (KeyError, IndexError):
             tax_id = "NA"
 
         try:
-            # xml parsing amirite
-            name = (
-                interactor.getElementsByTagName("names")[0]
-                .getElementsByTagName("shortLabel")[0]
-                .childNodes[0]
-                .data
-            )
-        except (KeyError, IndexError, AttributeError) as e:
+            name = first_text(interactor, "names", "shortLabel")
+        except IndexError as e:
             logging.warning("Problem parsing name in xref interaction %s" % e)
 
         category = "biolink:Protein"
         try:
-            type = (
-                interactor.getElementsByTagName("interactorType")[0]
-                .getElementsByTagName("shortLabel")[0]
-                .childNodes[0]
-                .data
-            )
-            type = type.lower()
-            if type == "small molecule":
-                pass
+            type = first_text(interactor, "interactorType", "shortLabel").lower()
             if type in self.type_to_biolink_category:
                 category = self.type_to_biolink_category[type]
-        except (KeyError, IndexError, AttributeError) as e:
+        except IndexError as e:
             logging.warning("Problem parsing name in xref interaction %s" % e)
 
-        return [interactor_id, [this_id, name, category, tax_id, self.source_name]]
+        return interactor_id, [this_id, name, category, tax_id, self.source_name]
 
-    def parse_experiment_info(self, xmldoc: minidom.Document) -> Dict[int, str]:
-        """Extract info about experiment from miXML doc.
+    def parse_experiment_info(self, xml_file: str) -> Dict[int, str]:
+        """Extract info about experiments from a miXML file.
 
         :param self: IntAct instance
-        :param xmldoc: a minidom object containing a miXML doc
+        :param xml_file: path to a miXML file
         :return: dictionary with parsed info about experiments (publication, exp type)
         """
         exp_dict: dict = defaultdict(lambda: defaultdict(str))
-        for experiment in xmldoc.getElementsByTagName("experimentDescription"):
-            if experiment.hasAttribute("id"):
-                exp_id = experiment.getAttribute("id")
-            else:
-                continue
+        for _, experiment in iter_mixml(xml_file, {"experimentDescription"}):
+            self.add_experiment_info(exp_dict, experiment)
+        return exp_dict
 
-            # get pub data
-            bibref = experiment.getElementsByTagName("bibref")
-            if bibref and bibref[0].getElementsByTagName("primaryRef"):
-                p_ref = bibref[0].getElementsByTagName("primaryRef")
-                try:
-                    db = p_ref[0].attributes["db"].value
-                    this_id = p_ref[0].attributes["id"].value
-                    if db in self.db_to_prefix:
-                        db = self.db_to_prefix[db]
-                    exp_dict[exp_id]["publication"] = ":".join([db, this_id])
-                except (KeyError, IndexError, AttributeError):
-                    pass
-
-            # interaction detection method
-            try:
-                method = experiment.getElementsByTagName("interactionDetectionMethod")
-                label = (
-                    method[0]
-                    .getElementsByTagName("shortLabel")[0]
-                    .firstChild.data  # type: ignore
-                )
-                exp_dict[exp_id]["detection_method"] = label
-            except (KeyError, IndexError, AttributeError):
-                pass
+    def add_experiment_info(self, exp_dict: dict, experiment: Element) -> None:
+        """Add info about an experiment to a dictionary of experiments.
 
-        return exp_dict
+        :param self: IntAct instance
+        :param exp_dict: dictionary of experiment id to parsed info
+        :param experiment: an experimentDescription element
+        :return: None
+        """
+        if "id" in experiment.attrib:
+            exp_id = experiment.attrib["id"]
+        else:
+            return
+
+        # get pub data
+        try:
+            p_ref = first_element(experiment, "bibref", "primaryRef")
+            db = p_ref.attrib["db"]
+            this_id = p_ref.attrib["id"]
+            if db in self.db_to_prefix:
+                db = self.db_to_prefix[db]
+            exp_dict[exp_id]["publication"] = ":".join([db, this_id])
+        except (KeyError, IndexError):
+            pass
+
+        # interaction detection method
+        try:
+            label = first_text(experiment, "interactionDetectionMethod", "shortLabel")
+            exp_dict[exp_id]["detection_method"] = label
+        except IndexError:
+            pass
+
+
+def iter_mixml(
+    xml_file: Union[str, IO[bytes]], tags: Set[str]
+) -> Iterator[Tuple[str, Element]]:
+    """Stream elements of a miXML file, without building the whole tree.
+
+    Tags are stripped of their namespace, so elements are found by their plain
+    miXML names. Interactors, experiments and interactions are cleared once the
+    caller is done with them, and so are the lists holding them.
+
+    :param xml_file: path to, or binary file object of, a miXML file
+    :param tags: names of the elements to yield
+    :return: iterator of (tag, element), in the order the elements end
+    """
+    depth = 0
+    for event, element in iterparse(xml_file, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            continue
+        depth -= 1
+        tag = element.tag.rpartition("}")[2]
+        element.tag = tag
+        if tag in tags:
+            yield tag, element
+        # entrySet, entry and the lists in an entry end at depth <= 2
+        if tag in MIXML_TAGS or depth <= 2:
+            element.clear()
+
+
+def first_element(element: Element, *tags: str) -> Element:
+    """Follow a path of first descendants with the given tags.
+
+    Like chaining minidom's getElementsByTagName(tag)[0] down the path, the
+    element itself is not a match for the first tag.
+
+    :param element: element to start from
+    :param tags: tags of the elements along the path
+    :return: the element at the end of the path
+    :raises IndexError: if any element along the path is missing
+    """
+    for tag in tags:
+        descendants = element.iter(tag)
+        found = next(descendants, None)
+        if found is element:
+            found = next(descendants, None)
+        if found is None:
+            raise IndexError(f"no {tag} element")
+        element = found
+    return element
+
+
+def first_text(element: Element, *tags: str) -> str:
+    """Get the text of the element at the end of a path of first descendants.
+
+    :param element: element to start from
+    :param tags: tags of the elements along the path
+    :return: the text of the element at the end of the path
+    :raises IndexError: if any element along the path, or the text, is missing
+    """
+    found = first_element(element, *tags)
+    if not found.text:
+        raise IndexError(f"no text in {found.tag} element")
+    return found.text
+
+
+# the transform in a worker process, and its open zip files
+_worker_transform: Optional[IntAct] = None
+_worker_zip_files: Dict[str, ZipFile] = {}
+
+
+def _init_intact_worker(transform: IntAct) -> None:
+    """Keep the transform for this worker process."""
+    global _worker_transform
+    _worker_transform = transform
+
+
+def _parse_intact_member(member: Tuple[str, str]) -> dict:
+    """Parse nodes and edges from an XML file in a zip file.
+
+    :param member: (path to the zip file, name of the XML file in it)
+    :return: the parse_xml_to_nodes_edges() result for the XML file
+    """
+    zip_file, name = member
+    if zip_file not in _worker_zip_files:
+        _worker_zip_files[zip_file] = ZipFile(zip_file, "r")
+    with _worker_zip_files[zip_file].open(name) as xml_file:
+        return _worker_transform.parse_xml_to_nodes_edges(xml_file)  # type: ignore
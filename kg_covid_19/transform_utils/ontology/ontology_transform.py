@@ -1,13 +1,25 @@
 """Transform an ontology in Obograph JSON format."""
 
-import csv
+import gzip
+import hashlib
+import logging
+import multiprocessing
 import os
+import shutil
+import time
 import uuid
-from typing import Optional
+from importlib import metadata
+from typing import Any, Dict, List, Optional
 
 from kgx.cli.cli_utils import transform  # type: ignore
 
 from kg_covid_19.transform_utils.transform import Transform
+from kg_covid_19.utils import NormalizationMap
+from kg_covid_19.utils.file_utils import atomic_write
+from kg_covid_19.utils.manifest_utils import file_fingerprint
+from kg_covid_19.utils.normalize_utils import DRUGCENTRAL_MAP
+from kg_covid_19.utils.transform_utils import peak_rss
+from kg_covid_19.utils.writer_utils import dict_to_row
 
 ONTOLOGIES = {
     "HpTransform": "hp.json",
@@ -16,34 +28,126 @@ ONTOLOGIES = {
     "ChebiTransform": "chebi.json.gz",
 }
 
+# files written by a KGX conversion, as suffixes of the ontology name
+KGX_OUTPUT_SUFFIXES = ["_nodes.tsv", "_edges.tsv"]
+
+GZIP_LEVEL = 6
+
+# namespace of the uuid5 ids of edges added for mappings
+MAPPING_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "https://drugcentral.org/")
+
 
 class OntologyTransform(Transform):
     """Parse an Obograph JSON form of an Ontology into nodes and edges."""
 
+    VERSION = "2"
+    INPUT_FILES = list(ONTOLOGIES.values())
+    # read to add the DrugCentral mappings of chebi
+    MAP_FILES = [DRUGCENTRAL_MAP]
+    # KGX writes the TSV files
+    OUTPUT_FORMATS = ["tsv"]
+
+    DEFAULT_CACHE_DIR = os.path.join("data", "cache", "ontologies")
+
     def __init__(
-        self, input_dir: Optional[str] = None, output_dir: Optional[str] = None
+        self,
+        input_dir: Optional[str] = None,
+        output_dir: Optional[str] = None,
+        cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
     ):
-        """Initialize."""
+        """Initialize.
+
+        Args:
+            input_dir: Directory of the ontology files.
+            output_dir: Directory to write the ontologies directory to.
+            cache_dir: Directory of compressed KGX conversions, keyed by the
+                content hash of their input and the KGX version. None
+                disables the cache [data/cache/ontologies].
+        """
         source_name = "ontologies"
         super().__init__(source_name, input_dir, output_dir)
+        self.cache_dir = cache_dir
+        self.stats: List[Dict[str, Any]] = []
 
-    def run(self, data_file: Optional[str] = None) -> None:
+    def run(self, data_file: Optional[str] = None, processes: int = 1) -> None:
         """Perform transformations to process an ontology.
 
         Args:
             data_file: data file to parse
+            processes: Number of worker processes to convert ontologies in,
+                when all are converted [1]. Each ontology gets a fresh process.
+                The pipeline converts one ontology per call instead, and runs
+                them in separate workers with transform(jobs=...).
         Returns:
             None.
         """
         if data_file:
             k = data_file.split(".")[0]
             data_file = os.path.join(self.input_base_dir, data_file)
-            self.parse(k, data_file, k)
+            self.stats = [self.timed_parse(k, data_file, k)]
         else:
             # load all ontologies
-            for k in ONTOLOGIES.keys():
-                data_file = os.path.join(self.input_base_dir, ONTOLOGIES[k])
-                self.parse(k, data_file, k)
+            names = [k.split(".")[0] for k in ONTOLOGIES.values()]
+            data_files = [
+                os.path.join(self.input_base_dir, k) for k in ONTOLOGIES.values()
+            ]
+            if processes > 1:
+                # largest first, so the slowest conversions start earliest
+                order = sorted(
+                    range(len(names)),
+                    key=lambda i: -os.path.getsize(data_files[i]),
+                )
+                # one task per child, so peak RSS is that of a single ontology
+                with multiprocessing.Pool(processes, maxtasksperchild=1) as pool:
+                    stats = pool.starmap(
+                        self.timed_parse,
+                        [(names[i], data_files[i], names[i]) for i in order],
+                        chunksize=1,
+                    )
+                by_name = {s["ontology"]: s for s in stats}
+                self.stats = [by_name[name] for name in names]
+            else:
+                self.stats = [
+                    self.timed_parse(name, data_file, name)
+                    for name, data_file in zip(names, data_files)
+                ]
+        for s in self.stats:
+            logging.info(
+                f"Converted {s['ontology']} in {s['wall_time']:.1f}s, "
+                f"peak RSS {s['peak_rss']:.1f} MB"
+            )
+
+    def output_files(self) -> List[str]:
+        """Get the node and edge files of the ontologies converted by run().
+
+        Returns:
+            A list of paths.
+        """
+        return [
+            os.path.join(self.output_dir, s["ontology"] + suffix)
+            for s in self.stats
+            for suffix in KGX_OUTPUT_SUFFIXES
+        ]
+
+    def timed_parse(self, name: str, data_file: str, source: str) -> Dict[str, Any]:
+        """Process the data_file, and measure how long it took.
+
+        Peak RSS is that of the calling process, so it is only specific to
+        this ontology when run in a fresh worker process.
+        Args:
+            name: Name of the ontology
+            data_file: data file to parse
+            source: Source name
+        Returns:
+            A dict with ontology, wall_time (seconds) and peak_rss (MB).
+        """
+        start = time.perf_counter()
+        self.parse(name, data_file, source)
+        return {
+            "ontology": name,
+            "wall_time": time.perf_counter() - start,
+            "peak_rss": peak_rss(),
+        }
 
     def parse(self, name: str, data_file: str, source: str) -> None:
         """Process the data_file.
@@ -62,61 +166,155 @@ class OntologyTransform(Transform):
         else:
             compression = None
 
-        transform(
-            inputs=[data_file],
-            input_format="obojson",
-            input_compression=compression,
-            output=os.path.join(self.output_dir, name),
-            output_format="tsv",
-        )
+        key = self.cache_key(data_file) if self.cache_dir else None
+        if key and self.restore_cached(name, key):
+            logging.info(f"Restored the conversion of {data_file} from the cache")
+        else:
+            transform(
+                inputs=[data_file],
+                input_format="obojson",
+                input_compression=compression,
+                output=os.path.join(self.output_dir, name),
+                output_format="tsv",
+            )
+            if key:
+                self.store_cached(name, key)
 
         # Extra step here to add extra nodes+edges for mappings
         if name == "chebi":
-            edgefile_name = name + "_edges.tsv"
-            nodefile_name = name + "_nodes.tsv"
-
-            # Retrieve all node ids
-            all_node_ids = []
-            with open(os.path.join(self.output_dir, nodefile_name)) as nodefile:
-                node_rows = csv.DictReader(nodefile, delimiter="\t")
-                for row in node_rows:
-                    all_node_ids.append(row["id"])
-                all_node_ids = list(set(all_node_ids))
-
-            # Get mappings for each node id
-            node_mappings = {}
-            with open("./maps/drugcentral-maps-kg_covid_19-0.1.sssom.tsv") as map_file:
-
-                for _ in range(11):
-                    next(map_file)
-                norm_map = csv.DictReader(map_file, delimiter="\t")
-
-                for row in norm_map:
-                    if row["subject_id"] in all_node_ids and row["object_id"] != "":
-                        node_mappings[row["subject_id"]] = row["object_id"]
-
-            # For each node id with a mapping, build a new relation
-            # and its corresponding nodes
-            new_match_relations = []
-            all_map_nodes = []
-            for subject, object in node_mappings.items():
-                urn = "urn:uuid:" + str(uuid.uuid1())
-                new_relation = f"{urn}\t{subject}\tbiolink:exact_match\t{object}\tskos:exactMatch\tchebi.json.gz\n"  # noqa: E501
-                new_match_relations.append(new_relation)
-                object_iri = (
-                    "https://drugcentral.org/drugcard/" + (object.split(":"))[1]
-                )
-                new_map_node = (
-                    f"{object}\tbiolink:Drug\t\t\t\t\t\t{object_iri}\t\t\t\t\t\t\t\n"
-                )
-                all_map_nodes.append(new_map_node)
+            self.add_mapping_nodes_edges(
+                os.path.join(self.output_dir, name + "_nodes.tsv"),
+                os.path.join(self.output_dir, name + "_edges.tsv"),
+            )
+
+    @staticmethod
+    def cache_key(data_file: str) -> Optional[str]:
+        """Key the KGX conversion of a file by its content and the KGX version.
+
+        Args:
+            data_file: The ontology file.
+        Returns:
+            A hex digest, or None if the file is missing.
+        """
+        fingerprint = file_fingerprint(data_file)
+        if fingerprint is None:
+            return None
+        key = f"{fingerprint['sha256']}\tkgx {kgx_version()}"
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def cached_files(self, name: str, key: str) -> Dict[str, str]:
+        """Get the cached file of each KGX output file of an ontology."""
+        return {
+            os.path.join(self.output_dir, name + suffix): os.path.join(
+                self.cache_dir, f"{name}-{key}{suffix}.gz"  # type: ignore
+            )
+            for suffix in KGX_OUTPUT_SUFFIXES
+        }
+
+    def restore_cached(self, name: str, key: str) -> bool:
+        """Decompress the cached KGX output of an ontology, if there is one.
+
+        Args:
+            name: Name of the ontology
+            key: The cache key of the ontology file
+        Returns:
+            True if the output was restored.
+        """
+        cached_files = self.cached_files(name, key)
+        if not all(map(os.path.exists, cached_files.values())):
+            return False
+        for output_file, cached_file in cached_files.items():
+            with gzip.open(cached_file, "rb") as src, open(output_file, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+        return True
+
+    def store_cached(self, name: str, key: str) -> None:
+        """Compress the KGX output of an ontology into the cache.
+
+        Args:
+            name: Name of the ontology
+            key: The cache key of the ontology file
+        Returns:
+            None.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)  # type: ignore
+        for output_file, cached_file in self.cached_files(name, key).items():
+            with open(output_file, "rb") as src, atomic_write(
+                cached_file, "wb", gzip.open, compresslevel=GZIP_LEVEL
+            ) as dst:
+                shutil.copyfileobj(src, dst)
+
+    @staticmethod
+    def add_mapping_nodes_edges(
+        node_file: str, edge_file: str, norm_map: Optional[NormalizationMap] = None
+    ) -> None:
+        """Add exact_match edges, and their Drug nodes, for mapped node ids.
+
+        The node ids are read into a set in one pass over the node file, and
+        joined with the map rows. Edge ids are derived from the subject and
+        object, so repeated builds give the same ids.
+
+        Args:
+            node_file: KGX node TSV, appended to.
+            edge_file: KGX edge TSV, appended to.
+            norm_map: Map of node ids to DrugCentral ids [the DrugCentral map].
+        Returns:
+            None.
+        """
+        if norm_map is None:
+            norm_map = NormalizationMap.load()
+
+        # Retrieve all node ids
+        with open(node_file) as nodefile:
+            node_header = nodefile.readline().rstrip("\n").split("\t")
+            id_column = node_header.index("id")
+            all_node_ids = {
+                line.rstrip("\n").split("\t", id_column + 1)[id_column]
+                for line in nodefile
+            }
+        with open(edge_file) as edgefile:
+            edge_header = edgefile.readline().rstrip("\n").split("\t")
+
+        # Get mappings for each node id, later map rows win
+        node_mappings = {}
+        for subject, object in norm_map.pairs():
+            if subject in all_node_ids and object != "":
+                node_mappings[subject] = object
+
+        # For each node id with a mapping, build a new relation
+        # and its corresponding nodes
+        node_to_row = dict_to_row(node_header)
+        edge_to_row = dict_to_row(edge_header)
+        new_match_relations = []
+        all_map_nodes = []
+        for subject, object in node_mappings.items():
+            edge_id = uuid.uuid5(MAPPING_NAMESPACE, f"{subject}\t{object}")
+            edge = {
+                "id": f"urn:uuid:{edge_id}",
+                "subject": subject,
+                "predicate": "biolink:exact_match",
+                "object": object,
+                "relation": "skos:exactMatch",
+                "provided_by": "chebi.json.gz",
+            }
+            new_match_relations.append("\t".join(edge_to_row(edge)) + "\n")
+            node = {
+                "id": object,
+                "category": "biolink:Drug",
+                "iri": "https://drugcentral.org/drugcard/" + (object.split(":"))[1],
+            }
+            all_map_nodes.append("\t".join(node_to_row(node)) + "\n")
+
+        # Write all relations and mapped ids in one write each
+        with open(edge_file, "a") as edgefile:
+            edgefile.write("".join(new_match_relations))
+        with open(node_file, "a") as nodefile:
+            nodefile.write("".join(all_map_nodes))
 
-            # Write all relations to the edge file
-            with open(os.path.join(self.output_dir, edgefile_name), "a") as edgefile:
-                for relation in new_match_relations:
-                    edgefile.write(relation)
 
-            # Write all mapped ids to the node file
-            with open(os.path.join(self.output_dir, nodefile_name), "a") as nodefile:
-                for node in all_map_nodes:
-                    nodefile.write(node)
+def kgx_version() -> str:
+    """Get the installed KGX version, which the cache keys depend on."""
+    try:
+        return metadata.version("kgx")
+    except metadata.PackageNotFoundError:
+        return "unknown"
@@ -5,15 +5,15 @@ import os
 import re
 import tempfile
 from collections import defaultdict
-from typing import Optional, TextIO
+from typing import Optional
 
 from kg_covid_19.transform_utils.transform import Transform
-from kg_covid_19.utils import load_ids_from_map, normalize_curies
+from kg_covid_19.utils import NodeEdgeWriter, NormalizationMap
+from kg_covid_19.utils.normalize_utils import DRUGCENTRAL_MAP
 from kg_covid_19.utils.transform_utils import (ItemInDictNotFoundError,
                                                data_to_dict,
                                                get_item_by_priority,
-                                               parse_header, unzip_to_tempdir,
-                                               write_node_edge_item)
+                                               parse_header, unzip_to_tempdir)
 
 """
 Ingest PharmGKB drug -> drug target info
@@ -25,6 +25,9 @@ GitHub Issue: https://github.com/Knowledge-Graph-Hub/kg-covid-19/issues/7
 class PharmGKB(Transform):
     """Class for PharmGKB transformation."""
 
+    INPUT_FILES = ["relationships.zip", "pharmgkb_genes.zip", "pharmgkb_drugs.zip"]
+    MAP_FILES = [DRUGCENTRAL_MAP]
+
     def __init__(
         self, input_dir: Optional[str] = None, output_dir: Optional[str] = None
     ):
@@ -97,12 +100,12 @@ class PharmGKB(Transform):
         #
         # read in and transform relationship.tsv
         #
-        with open(relationship_file_path) as relationships, open(
-            self.output_node_file, "w"
-        ) as node, open(self.output_edge_file, "w") as edge:
-            # write headers (change default node/edge headers if necessary
-            node.write("\t".join(self.node_header) + "\n")
-            edge.write("\t".join(self.edge_header) + "\n")
+        with open(relationship_file_path) as relationships, NodeEdgeWriter(
+            self.output_node_file,
+            self.output_edge_file,
+            self.node_header,
+            self.edge_header,
+        ) as writer:
 
             rel_header = parse_header(relationships.readline())
 
@@ -110,34 +113,24 @@ class PharmGKB(Transform):
             # this gets converted to a flat dict in the end
             # We need to add DrugBank IDs here too, as PharmGKB has xrefs to those
             # same for CHEBI IDs
+            norm_map = NormalizationMap.load()
             all_pharmgkb_drugs = []
             for line in relationships:
                 line_data = self.parse_pharmgkb_line(line, rel_header)
                 if line_data["Entity1_type"] == "Chemical":
-                    this_drug_curie = "pharmgkb.drug:" + line_data["Entity1_id"]
                     all_pharmgkb_drugs.append(
-                        {"orig_id": this_drug_curie, "id": this_drug_curie}
+                        "pharmgkb.drug:" + line_data["Entity1_id"]
                     )
                 if line_data["Entity2_type"] == "Chemical":
-                    this_drug_curie = "pharmgkb.drug:" + line_data["Entity2_id"]
                     all_pharmgkb_drugs.append(
-                        {"orig_id": this_drug_curie, "id": this_drug_curie}
+                        "pharmgkb.drug:" + line_data["Entity2_id"]
                     )
             # Add the DrugBank and CHEBI IDs here
             for prefix in ["DRUGBANK", "CHEBI"]:
-                drugbank_ids = load_ids_from_map(
-                    map_path="./maps/drugcentral-maps-kg_covid_19-0.1.sssom.tsv",
-                    prefix=prefix,
-                )
-                for id in drugbank_ids:
-                    all_pharmgkb_drugs.append({"orig_id": id, "id": id})
+                all_pharmgkb_drugs.extend(norm_map.subjects_with_prefix(prefix))
 
-            normalized_pharmgkb_drugs = normalize_curies(
-                map_path="./maps/drugcentral-maps-kg_covid_19-0.1.sssom.tsv",
-                entries=all_pharmgkb_drugs,
-            )
             pharmgkb_drug_map = {
-                entry["orig_id"]: entry["id"] for entry in normalized_pharmgkb_drugs
+                curie: norm_map.normalize(curie) for curie in all_pharmgkb_drugs
             }
 
             relationships.seek(0)
@@ -165,14 +158,14 @@ class PharmGKB(Transform):
                     ]:
                         if entity_type == "Gene":
                             self.make_pharmgkb_gene_node(
-                                fh=node,
+                                writer=writer,
                                 this_id=entity_id,
                                 name=entity_name,
                                 biolink_type=self.gene_node_type,
                             )
                         elif entity_type == "Chemical":
                             self.make_pharmgkb_chemical_node(
-                                fh=node,
+                                writer=writer,
                                 chem_id=entity_id,
                                 name=entity_name,
                                 biolink_type=self.drug_node_type,
@@ -186,7 +179,7 @@ class PharmGKB(Transform):
                     #
                     # Make edge
                     #
-                    self.make_pharmgkb_edge(fh=edge, line_data=line_data)
+                    self.make_pharmgkb_edge(writer=writer, line_data=line_data)
 
     def make_preferred_drug_id(
         self,
@@ -252,7 +245,7 @@ class PharmGKB(Transform):
 
         return preferred_id
 
-    def make_pharmgkb_edge(self, fh: TextIO, line_data: dict) -> None:
+    def make_pharmgkb_edge(self, writer: NodeEdgeWriter, line_data: dict) -> None:
         """Produce a single edge from PharmGKB relation."""
         if set(self.edge_of_interest) != set(
             [line_data["Entity1_type"], line_data["Entity2_type"]]
@@ -286,15 +279,15 @@ class PharmGKB(Transform):
             evidence,
         ]
 
-        write_node_edge_item(fh=fh, header=self.edge_header, data=data)
+        writer.write_edge(data)
 
     def make_pharmgkb_gene_node(
-        self, fh: TextIO, this_id: str, name: str, biolink_type: str
+        self, writer: NodeEdgeWriter, this_id: str, name: str, biolink_type: str
     ) -> None:
         """
         Write out node for a gene.
 
-        :param fh: file handle to write out gene
+        :param writer: NodeEdgeWriter to write out gene
         :param this_id: pharmgkb gene id
         :param name: gene name
         :param biolink_type: biolink type for Gene
@@ -303,7 +296,7 @@ class PharmGKB(Transform):
         """
         gene_id = self.get_uniprot_id(this_id=this_id)
         data = [gene_id, name, biolink_type, self.source_name]
-        write_node_edge_item(fh=fh, header=self.node_header, data=data)
+        writer.write_node(data)
 
     def get_uniprot_id(self, this_id: str, pharmgkb_prefix: str = "PHARMGKB"):
         """Retrieve a UniProtKB ID for a PharmGKB gene ID."""
@@ -317,12 +310,17 @@ class PharmGKB(Transform):
         return gene_id
 
     def make_pharmgkb_chemical_node(
-        self, fh: TextIO, chem_id: str, name: str, biolink_type: str, norm_map: dict
+        self,
+        writer: NodeEdgeWriter,
+        chem_id: str,
+        name: str,
+        biolink_type: str,
+        norm_map: dict,
     ) -> None:
         """
         Write out node for a drug/chemical.
 
-        :param fh: file handle to write out drug/chemical
+        :param writer: NodeEdgeWriter to write out drug/chemical
         :param id: pharmgkb drug id
         :param name: drug name
         :param biolink_type: biolink type for Chemical
@@ -345,7 +343,7 @@ class PharmGKB(Transform):
             pass
 
         data = [preferred_drug_id, name, biolink_type, self.source_name]
-        write_node_edge_item(fh=fh, header=self.node_header, data=data)
+        writer.write_node(data)
 
     def parse_pharmgkb_line(self, this_line: str, header_items) -> dict:
         """
@@ -5,7 +5,7 @@ import os
 from typing import Generator, List, Optional, TextIO
 
 from kg_covid_19.transform_utils.transform import Transform
-from kg_covid_19.utils import write_node_edge_item
+from kg_covid_19.utils import NodeEdgeWriter
 from kg_covid_19.utils.transform_utils import (ItemInDictNotFoundError,
                                                get_item_by_priority,
                                                guess_bl_category)
@@ -19,6 +19,8 @@ each gene -> annotation described in GPA.
 class SARSCoV2GeneAnnot(Transform):
     """Transform for SARS-CoV-2 gene annotations."""
 
+    INPUT_FILES = ["uniprot_sars-cov-2.gpi", "uniprot_sars-cov-2.gpa"]
+
     def __init__(
         self, input_dir: Optional[str] = None, output_dir: Optional[str] = None
     ):
@@ -72,19 +74,18 @@ class SARSCoV2GeneAnnot(Transform):
         gpi_file = os.path.join(self.input_base_dir, "uniprot_sars-cov-2.gpi")
         gpa_file = os.path.join(self.input_base_dir, "uniprot_sars-cov-2.gpa")
 
-        with open(self.output_node_file, "w") as node, open(
-            self.output_edge_file, "w"
-        ) as edge:
-
-            # write headers
-            node.write("\t".join(self.node_header) + "\n")
-            edge.write("\t".join(self.edge_header) + "\n")
+        with NodeEdgeWriter(
+            self.output_node_file,
+            self.output_edge_file,
+            self.node_header,
+            self.edge_header,
+        ) as writer:
             seen = set()
             with open(gpi_file, "r") as gpi_fh:
                 for rec in _gpi12iterator(gpi_fh):
                     node_data = self.gpi_to_gene_node_data(rec)
                     seen.add(node_data[0])
-                    write_node_edge_item(node, self.node_header, node_data)
+                    writer.write_node(node_data)
 
             with open(gpa_file, "r") as gpa_fh:
                 for rec in _gpa11iterator(gpa_fh):
@@ -96,7 +97,7 @@ class SARSCoV2GeneAnnot(Transform):
                             + [""] * 4
                             + [self.source_name]
                         )
-                        write_node_edge_item(node, self.node_header, subject_node_data)
+                        writer.write_node(subject_node_data)
                         seen.add(subject_node)
                     object_node = edge_data[2]
                     if object_node not in seen:
@@ -105,10 +106,10 @@ class SARSCoV2GeneAnnot(Transform):
                             + [""] * 4
                             + [self.source_name]
                         )
-                        write_node_edge_item(node, self.node_header, object_node_data)
+                        writer.write_node(object_node_data)
                         seen.add(object_node)
 
-                    write_node_edge_item(edge, self.edge_header, edge_data)
+                    writer.write_edge(edge_data)
 
     def gpa_to_edge_data(self, rec: dict) -> list:
         """Return an edge with annotations given a parsed gpa entry.
@@ -168,7 +169,7 @@ class SARSCoV2GeneAnnot(Transform):
         return this_id
 
     def gpi_to_gene_node_data(self, rec: dict) -> list:
-        """Return node that can be passed to write_node_edge_item().
+        """Return node that can be passed to NodeEdgeWriter.write_node().
 
         Uses a parsed gpi entry.
         :param rec: record from gpi iterator
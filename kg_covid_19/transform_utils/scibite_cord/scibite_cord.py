@@ -1,20 +1,27 @@
 """The SciBite CORD transform."""
 
-import gzip
 import json
+import logging
+import multiprocessing
 import os
 import re
-import tempfile
-from typing import IO, Any, Dict, List, Optional, Set
-from zipfile import ZipFile
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from zipfile import ZipFile, ZipInfo
 
+import numpy as np  # type: ignore
 import pandas as pd  # type: ignore
-from prefixcommons import contract_uri  # type: ignore
 from tqdm import tqdm  # type: ignore
 
 from kg_covid_19.transform_utils.transform import Transform
-from kg_covid_19.utils import write_node_edge_item
-from kg_covid_19.utils.transform_utils import unzip_to_tempdir
+from kg_covid_19.utils import NodeEdgeWriter
+from kg_covid_19.utils.curie_utils import PrefixTrie
+from kg_covid_19.utils.gene_info_utils import GeneInfoIndex
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # optional, faster parsing of the annotation documents
+    orjson = None  # type: ignore
 
 CUSTOM_CMAP = {
     "CHEMBL.COMPOUND": "https://www.ebi.ac.uk/chembl/compound_report_card/",
@@ -24,10 +31,32 @@ CUSTOM_CMAP = {
     "WD": "http://www.wikidata.org/entity/",
 }
 
+DEFAULT_PREFIXES = PrefixTrie()
+CUSTOM_PREFIXES = PrefixTrie([CUSTOM_CMAP])
+
+# distinct IRIs remembered by contract_uri
+CURIE_CACHE_SIZE = 500_000
+
+json_loads = orjson.loads if orjson else json.loads
+
+# documents handed to a worker process at a time
+SHARD_SIZE = 100
+
 
 class ScibiteCordTransform(Transform):
     """Parse the SciBite annotations on CORD-19 dataset."""
 
+    VERSION = "2"
+    PARALLEL = True
+    INPUT_FILES = [
+        "pdf_json_part_1.zip",
+        "pdf_json_part_2.zip",
+        "pmc_json.zip",
+        "cv19_scc_1_2.zip",
+        "gene_info.gz",
+        "wikidata_country_codes.tsv",
+    ]
+
     def __init__(
         self, input_dir: Optional[str] = None, output_dir: Optional[str] = None
     ):
@@ -36,8 +65,10 @@ class ScibiteCordTransform(Transform):
         super().__init__(source_name, input_dir, output_dir)
         self.concept_name_map: Dict = {}
         self.seen: Set = set()
-        self.gene_info_map: Dict = {}
         self.country_code_map: Dict = {}
+        self.curie_cache: OrderedDict = OrderedDict()
+        self.curie_cache_hits = 0
+        self.curie_cache_misses = 0
         self.load_gene_info(self.input_base_dir, self.output_dir, ["9606"])
         self.load_country_code(self.input_base_dir, self.output_dir)
 
@@ -47,6 +78,7 @@ class ScibiteCordTransform(Transform):
         pdf_zipfile_2: Optional[str] = None,
         pmc_zipfile: Optional[str] = None,
         co_occur_zipfile: Optional[str] = None,
+        processes: int = 1,
     ) -> None:
         """Perform transformations to process annotations from SciBite CORD-19.
 
@@ -55,6 +87,7 @@ class ScibiteCordTransform(Transform):
             pdf_zipfile_2: PDF zip file part 2 [pdf_json_part_1.zip]
             pmc_zipfile: pmc zipfile [pmc_json.zip]
             co_occur_zipfile: coocurrence data zipfile [cv19_scc_1_2.zip]
+            processes: Number of processes to parse documents in [1].
 
         Returns:
             None.
@@ -77,78 +110,171 @@ class ScibiteCordTransform(Transform):
             "provided_by",
             "type",
         ]
-        node_handle = open(self.output_node_file, "w")
-        edge_handle = open(self.output_edge_file, "w")
-        node_handle.write("\t".join(self.node_header) + "\n")
-        edge_handle.write("\t".join(self.edge_header) + "\n")
-        self.parse_annotations(
-            node_handle, edge_handle, pdf_zipfile_1, pdf_zipfile_2, pmc_zipfile
-        )
+        with NodeEdgeWriter(
+            self.output_node_file,
+            self.output_edge_file,
+            self.node_header,
+            self.edge_header,
+        ) as writer:
+            self.parse_annotations(
+                writer, pdf_zipfile_1, pdf_zipfile_2, pmc_zipfile, processes
+            )
 
-        node_handle = open(
-            os.path.join(self.output_dir, "entity_cooccurrence_nodes.tsv"), "w"
-        )
-        edge_handle = open(
-            os.path.join(self.output_dir, "entity_cooccurrence_edges.tsv"), "w"
-        )
-        node_handle.write("\t".join(self.node_header) + "\n")
-        edge_handle.write("\t".join(self.edge_header) + "\n")
-        self.parse_cooccurrence(node_handle, edge_handle, co_occur_zipfile)
+        node_file, edge_file = self.cooccurrence_files()
+        with NodeEdgeWriter(
+            node_file,
+            edge_file,
+            self.node_header,
+            self.edge_header,
+        ) as writer:
+            self.parse_cooccurrence(writer, co_occur_zipfile)
+        logging.info(f"contract_uri cache: {self.curie_cache_info()}")
+
+    def cooccurrence_files(self) -> List[str]:
+        """Get the co-occurrence node and edge files.
+
+        They are written in the format of the other node and edge files.
+        Returns:
+            A list of the node and the edge file.
+        """
+        suffix = os.path.splitext(self.output_node_file)[1]
+        return [
+            os.path.join(self.output_dir, "entity_cooccurrence_nodes" + suffix),
+            os.path.join(self.output_dir, "entity_cooccurrence_edges" + suffix),
+        ]
+
+    def output_files(self) -> List[str]:
+        """Get the node and edge files the transform writes.
+
+        Returns:
+            A list of paths.
+        """
+        return super().output_files() + self.cooccurrence_files()
 
     def parse_annotations(
         self,
-        node_handle: IO,
-        edge_handle: IO,
+        writer: NodeEdgeWriter,
         data_file1: str,
         data_file2: str,
         data_file3: str,
+        processes: int = 1,
     ) -> None:
         """Parse annotations from CORD-19_1_5.zip.
 
         Args:
-            node_handle: File handle for nodes.csv.
-            edge_handle: File handle for edges.csv.
+            writer: NodeEdgeWriter for nodes.tsv and edges.tsv.
             data_file1: Path to pdf_json_part_1.zip
             data_file2: Path to pdf_json_part_2.zip
-            data_file2: Path to pmc_json.zip
+            data_file3: Path to pmc_json.zip
+            processes: Number of processes to parse documents in [1].
         Returns:
              None.
         """
-        pbar = tqdm(total=3, desc="Unzipping files")
-
-        # unzip to tmpdir, remove after use, to avoid cluttering raw/ with processed
-        # data
-        with tempfile.TemporaryDirectory(dir=self.input_base_dir) as tmpdir:
-            unzip_to_tempdir(data_file1, tmpdir)
-            pbar.update(1)
-            unzip_to_tempdir(data_file2, tmpdir)
-            pbar.update(1)
-            unzip_to_tempdir(data_file3, tmpdir)
-            pbar.update(1)
-            pbar.close()
-
-            subsets = ["pmc_json", "pdf_json_part_1", "pdf_json_part_2"]
-            for subset in subsets:
-                subset_dir = os.path.join(tmpdir, subset)
-                for filename in tqdm(os.listdir(subset_dir)):
-                    if filename.startswith("."):
-                        print(f"skipping file {filename}")
-                        continue
-                    file = os.path.join(subset_dir, filename)
-                    doc = json.load(open(file))
-                    self.parse_annotation_doc(node_handle, edge_handle, doc)
+        # documents are parsed straight from the compressed zip members, in the
+        # order the subsets were always read: pmc_json, then the two pdf_json parts
+        zip_files = [data_file3, data_file1, data_file2]
+        if processes > 1:
+            self.parse_annotations_parallel(writer, zip_files, processes)
+        else:
+            for doc in self.iter_annotation_docs(zip_files):
+                self.parse_annotation_doc(writer, doc)
+
+    def parse_annotations_parallel(
+        self, writer: NodeEdgeWriter, zip_files: List[str], processes: int
+    ) -> None:
+        """Parse annotations with a process pool, writing the same output as serially.
+
+        Documents are sharded across workers, which decode them and extract
+        their terms. Results come back in document order and are reduced here,
+        so node deduplication and the concept name map see the documents in
+        the same order as the serial parse.
+        Args:
+            writer: NodeEdgeWriter for nodes.tsv and edges.tsv.
+            zip_files: Paths to zip files of JSON documents, in parsing order.
+            processes: Number of worker processes.
+        Returns:
+             None.
+        """
+        shards: List[Tuple[str, List[str]]] = []
+        for zip_file in zip_files:
+            with ZipFile(zip_file, "r") as zipfilehandler:
+                names = [m.filename for m in self.annotation_members(zipfilehandler)]
+            shards.extend(
+                (zip_file, names[i : i + SHARD_SIZE])
+                for i in range(0, len(names), SHARD_SIZE)
+            )
+
+        with multiprocessing.Pool(
+            processes, initializer=_init_annotation_worker, initargs=(self,)
+        ) as pool:
+            for results, concept_names in tqdm(
+                pool.imap(_extract_annotation_shard, shards),
+                total=len(shards),
+                desc="Parsing documents",
+            ):
+                for term, name in concept_names.items():
+                    self.concept_name_map.setdefault(term, name)
+                for paper_id, title, terms in results:
+                    self.write_annotation_doc(writer, paper_id, title, terms)
+
+    def iter_annotation_docs(self, zip_files: List[str]) -> Iterator[Dict]:
+        """Iterate over the JSON documents in zip files, without extracting them.
 
-    def parse_annotation_doc(self, node_handle, edge_handle, doc: Dict) -> None:
+        Args:
+            zip_files: Paths to zip files of JSON documents, one per member.
+        Returns:
+            Iterator of JSON documents as dicts.
+        """
+        for zip_file in zip_files:
+            with ZipFile(zip_file, "r") as zipfilehandler:
+                members = self.annotation_members(zipfilehandler)
+                for member in tqdm(members, desc=os.path.basename(zip_file)):
+                    yield json_loads(zipfilehandler.read(member))
+
+    @staticmethod
+    def annotation_members(zipfilehandler: ZipFile) -> List[ZipInfo]:
+        """List the document members of a zip file, skipping dotfiles.
+
+        Args:
+            zipfilehandler: An open zip file.
+        Returns:
+            List of ZipInfo, in zip order.
+        """
+        members = []
+        for member in zipfilehandler.infolist():
+            if member.is_dir():
+                continue
+            filename = os.path.basename(member.filename)
+            if filename.startswith("."):
+                print(f"skipping file {filename}")
+                continue
+            members.append(member)
+        return members
+
+    def parse_annotation_doc(self, writer: NodeEdgeWriter, doc: Dict) -> None:
         """Parse a JSON document corresponding to a publication.
 
         Args:
-            node_handle: File handle for nodes.csv.
-            edge_handle: File handle for edges.csv.
+            writer: NodeEdgeWriter for nodes.tsv and edges.tsv.
             doc: JSON document as dict.
-            subset: The subset name for this dataset.
         Returns:
             None.
         """
+        self.write_annotation_doc(writer, *self.extract_annotation_doc(doc))
+
+    def extract_annotation_doc(
+        self, doc: Dict
+    ) -> Tuple[str, Optional[str], List[Tuple[str, str, Any, str]]]:
+        """Extract a publication and the terms it mentions from a JSON document.
+
+        Apart from recording term names in concept_name_map, this depends on
+        the document only, so it can run in worker processes.
+        Args:
+            doc: JSON document as dict.
+        Returns:
+            Paper id, title and a list of (term, curie, name, category), sorted
+            by term.
+        """
         terms = set()
         paper_id = doc["paper_id"]
         title = None
@@ -170,13 +296,56 @@ class ScibiteCordTransform(Transform):
             for x in body_text:
                 terms.update(self.extract_termite_hits(x))
 
+        term_data = [(t, *self.resolve_term(t)) for t in sorted(terms)]
+        return paper_id, title, term_data
+
+    def resolve_term(self, t: str) -> Tuple[str, Any, str]:
+        """Resolve a term from a TERMite hit to a node.
+
+        Args:
+            t: The term, an IRI, CURIE or country code.
+        Returns:
+            Curie, name and category for the term.
+        """
+        if len(t) == 2:
+            # country code
+            if t in self.country_code_map:
+                mapped_t = self.country_code_map[t][0]
+                name = self.country_code_map[t][1]
+                curie = self.contract_uri(mapped_t)
+            else:
+                name = ""
+                curie = self.contract_uri(t)
+            category = "biolink:NamedThing"
+        else:
+            category = "biolink:OntologyClass"
+            curie = self.contract_uri(t)
+            name = (self.concept_name_map[t] if t in self.concept_name_map else "",)
+        return curie, name, category
+
+    def write_annotation_doc(
+        self,
+        writer: NodeEdgeWriter,
+        paper_id: str,
+        title: Optional[str],
+        terms: List[Tuple[str, str, Any, str]],
+    ) -> None:
+        """Write the nodes and edges for a publication and the terms it mentions.
+
+        Args:
+            writer: NodeEdgeWriter for nodes.tsv and edges.tsv.
+            paper_id: The paper id.
+            title: The paper title.
+            terms: List of (term, curie, name, category) from
+                extract_annotation_doc().
+        Returns:
+            None.
+        """
         provided_by = f"{self.source_name}"
 
         # add a biolink:Publication for each paper
-        write_node_edge_item(
-            fh=node_handle,
-            header=self.node_header,
-            data=[
+        writer.write_node(
+            [
                 f"CORD:{paper_id}",
                 f"{title}",
                 "biolink:Publication",
@@ -186,28 +355,11 @@ class ScibiteCordTransform(Transform):
         )
         self.seen.add(paper_id)
 
-        for t in terms:
-            if len(t) == 2:
-                # country code
-                if t in self.country_code_map:
-                    mapped_t = self.country_code_map[t][0]
-                    name = self.country_code_map[t][1]
-                    curie = self.contract_uri(mapped_t)
-                else:
-                    name = ""
-                    curie = self.contract_uri(t)
-                category = "biolink:NamedThing"
-            else:
-                category = "biolink:OntologyClass"
-                curie = self.contract_uri(t)
-                name = (self.concept_name_map[t] if t in self.concept_name_map else "",)
-
+        for t, curie, name, category in terms:
             if t not in self.seen:
                 # add a biolink:OntologyClass node for each term
-                write_node_edge_item(
-                    fh=node_handle,
-                    header=self.node_header,
-                    data=[
+                writer.write_node(
+                    [
                         f"{curie}",
                         name if isinstance(name, str) else "",
                         category,
@@ -218,10 +370,8 @@ class ScibiteCordTransform(Transform):
                 self.seen.add(curie)
 
             # add has_annotation edge between OntologyClass and Publication
-            write_node_edge_item(
-                fh=edge_handle,
-                header=self.edge_header,
-                data=[
+            writer.write_edge(
+                [
                     f"CORD:{paper_id}",
                     "biolink:mentions",
                     f"{curie}",
@@ -231,113 +381,105 @@ class ScibiteCordTransform(Transform):
                 ],
             )
 
-    def parse_cooccurrence(
-        self, node_handle: Any, edge_handle: Any, data_file: str
-    ) -> None:
+    def parse_cooccurrence(self, writer: NodeEdgeWriter, data_file: str) -> None:
         """Parse term co-occurrences from cv19_scc.zip.
 
+        The table is processed column-wise: entity_uris are split and exploded
+        to one row per (document, term) and each distinct term is resolved
+        once. Nodes and edges are then written in table order, with the terms
+        of a document in sorted order.
         Args:
-            node_handle: File handle for nodes.csv.
-            edge_handle: File handle for edges.csv.
+            writer: NodeEdgeWriter for the co-occurrence nodes and edges.
             data_file: Path to cv19_scc.zip.
         Returns:
              None.
         """
-        with ZipFile(data_file, "r") as zipfilehandler, tempfile.TemporaryDirectory(
-            dir=self.input_base_dir
-        ) as tmpdir:
-            zipfilehandler.extractall(path=tmpdir)
-            df = pd.read_csv(
-                os.path.join(tmpdir, "cv19_scc.tsv"), delimiter="\t", encoding="utf-8"
-            )
-        for _, row in df.iterrows():
-            self.parse_cooccurrence_record(node_handle, edge_handle, row)
+        with ZipFile(data_file, "r") as zipfilehandler:
+            with zipfilehandler.open("cv19_scc.tsv") as data:
+                df = pd.read_csv(
+                    data,
+                    delimiter="\t",
+                    encoding="utf-8",
+                    usecols=["document_id", "entity_uris"],
+                    dtype=str,
+                )
+        df = df[df["entity_uris"].notna()]
+        provided_by = f"{self.source_name} co-occurrences"
 
-    def parse_cooccurrence_record(
-        self, node_handle: Any, edge_handle: Any, record: Dict
-    ) -> None:
-        """Parse term-cooccurrences.
+        paper_ids = df["document_id"]
+        paper_ids = paper_ids.where(
+            ~paper_ids.str.endswith(".xml"),
+            paper_ids.str.replace(".xml", "", regex=False),
+        )
+        terms = (
+            pd.DataFrame(
+                {
+                    "row": np.arange(len(df)),
+                    "paper_id": paper_ids.to_numpy(),
+                    "term": df["entity_uris"].str.split("|").to_numpy(),
+                }
+            )
+            .explode("term")
+            .drop_duplicates(["row", "term"])
+            .sort_values(["row", "term"], kind="stable")
+            .reset_index(drop=True)
+        )
 
-        Args:
-            node_handle: File handle for nodes.csv.
-            edge_handle: File handle for edges.csv.
-            record: A dictionary corresponding to a row from a table.
-        Returns:
-             None.
-        """
-        terms = set()
-        paper_id = record["document_id"]
-        if not pd.isna(record["entity_uris"]):
-            terms.update(record["entity_uris"].split("|"))
-            # add a biolink:Publication for each paper
-            if paper_id.endswith(".xml"):
-                paper_id = paper_id.replace(".xml", "")
-            paper_curie = f"CORD:{paper_id}"
-            if paper_id not in self.seen:
-                write_node_edge_item(
-                    fh=node_handle,
-                    header=self.node_header,
-                    data=[
+        resolved = {}
+        for t in terms["term"].unique():
+            curie, name, category = self.resolve_term(t)
+            resolved[t] = (curie, name if isinstance(name, str) else "", category)
+        terms = terms.join(
+            pd.DataFrame.from_dict(
+                resolved, orient="index", columns=["curie", "name", "category"]
+            ),
+            on="term",
+        )
+        terms["paper_curie"] = "CORD:" + terms["paper_id"]
+
+        # nodes and edges are deduplicated against self.seen, shared with the
+        # annotation pass, exactly as the row by row parse did: a term is only
+        # written while the term itself (not its curie) is unseen, which for
+        # terms that are IRIs is every time
+        seen = self.seen
+        nodes = []
+        edges = []
+        for paper_id, paper_curie, t, curie, name, category in zip(
+            terms["paper_id"].tolist(),
+            terms["paper_curie"].tolist(),
+            terms["term"].tolist(),
+            terms["curie"].tolist(),
+            terms["name"].tolist(),
+            terms["category"].tolist(),
+        ):
+            if paper_id not in seen:
+                # add a biolink:Publication for each paper
+                nodes.append((paper_curie, "", "biolink:Publication", "", provided_by))
+                seen.add(paper_id)
+            if t in seen:
+                continue
+            # add a node for each term
+            nodes.append((curie, name, category, "", provided_by))
+            seen.add(curie)
+
+            # simplified generation of edges between
+            # OntologyClass and the publication where
+            # OntologyClass -> correlated_with -> Publication
+            # with the edge having relation RO:0002610
+            if (curie, paper_curie) not in seen:
+                edges.append(
+                    (
+                        curie,
+                        "biolink:correlated_with",
                         paper_curie,
-                        "",
-                        "biolink:Publication",
-                        "",
-                        f"{self.source_name} co-occurrences",
-                    ],
-                )
-                self.seen.add(paper_id)
-
-            for t in terms:
-                if len(t) == 2:
-                    # country code
-                    if t in self.country_code_map:
-                        mapped_t = self.country_code_map[t][0]
-                        name = self.country_code_map[t][1]
-                        curie = self.contract_uri(mapped_t)
-                    else:
-                        name = ""
-                        curie = self.contract_uri(t)
-                    category = "biolink:NamedThing"
-                else:
-                    category = "biolink:OntologyClass"
-                    curie = self.contract_uri(t)
-                    name = (
-                        self.concept_name_map[t] if t in self.concept_name_map else "",
-                    )
-
-                if t not in self.seen:
-                    # add a biolink:OntologyClass node for each term
-                    write_node_edge_item(
-                        fh=node_handle,
-                        header=self.node_header,
-                        data=[
-                            f"{curie}",
-                            name if isinstance(name, str) else "",
-                            category,
-                            "",
-                            f"{self.source_name} co-occurrences",
-                        ],
+                        "RO:0002610",  # 'correlated with'
+                        provided_by,
+                        "biolink:Association",
                     )
-                    self.seen.add(curie)
-
-                    # simplified generation of edges between
-                    # OntologyClass and the publication where
-                    # OntologyClass -> correlated_with -> Publication
-                    # with the edge having relation RO:0002610
-                    if (curie, paper_curie) not in self.seen:
-                        write_node_edge_item(
-                            fh=edge_handle,
-                            header=self.edge_header,
-                            data=[
-                                f"{curie}",
-                                "biolink:correlated_with",
-                                f"{paper_curie}",
-                                "RO:0002610",  # 'correlated with'
-                                f"{self.source_name} co-occurrences",
-                                "biolink:Association",
-                            ],
-                        )
-                        self.seen.add((curie, paper_curie))
+                )
+                seen.add((curie, paper_curie))
+        writer.write_nodes(nodes)
+        writer.write_edges(edges)
 
     def extract_termite_hits(self, data: Dict) -> Set:
         """Parse termite hits.
@@ -359,6 +501,27 @@ class ScibiteCordTransform(Transform):
         return terms
 
     def contract_uri(self, iri) -> str:
+        """Contract a given IRI, memoized in a bounded LRU cache.
+
+        Args:
+            iri: IRI as string
+        Returns:
+            str.
+        """
+        try:
+            curie = self.curie_cache[iri]
+        except KeyError:
+            self.curie_cache_misses += 1
+            curie = self._contract_uri(iri)
+            self.curie_cache[iri] = curie
+            if len(self.curie_cache) > CURIE_CACHE_SIZE:
+                self.curie_cache.popitem(last=False)
+            return curie
+        self.curie_cache_hits += 1
+        self.curie_cache.move_to_end(iri)
+        return curie
+
+    def _contract_uri(self, iri) -> str:
         """Contract a given IRI.
 
         Contract a given IRI, with special parsing and transformations
@@ -371,21 +534,15 @@ class ScibiteCordTransform(Transform):
         curie = ""
         if "http://www.genenames.org/cgi-bin/gene_symbol_report?match=" in iri:
             identifier = iri.split("=")[-1]
-            if identifier in self.gene_info_map:
-                curie = f"NCBIGene:{self.gene_info_map[identifier]['NCBI']}"
+            gene = self.gene_info.by_symbol(identifier)
+            if gene:
+                curie = f"NCBIGene:{gene.ncbi}"
             else:
-                [curie] = contract_uri(iri, cmaps=[CUSTOM_CMAP])
+                [curie] = CUSTOM_PREFIXES.contract(iri)
         else:
             if self.is_iri(iri):
-                curie = contract_uri(iri)
-                if curie:
-                    curie = curie[0]
-                else:
-                    curie = contract_uri(iri, cmaps=[CUSTOM_CMAP])
-                    if curie:
-                        curie = curie[0]
-                    else:
-                        curie = iri
+                curies = DEFAULT_PREFIXES.contract(iri) or CUSTOM_PREFIXES.contract(iri)
+                curie = curies[0] if curies else iri
             elif self.is_curie(iri):
                 curie = iri
             else:
@@ -393,6 +550,14 @@ class ScibiteCordTransform(Transform):
 
         return curie
 
+    def curie_cache_info(self) -> Dict[str, int]:
+        """Get hit and miss counts of the contract_uri cache in this process."""
+        return {
+            "hits": self.curie_cache_hits,
+            "misses": self.curie_cache_misses,
+            "size": len(self.curie_cache),
+        }
+
     @staticmethod
     def is_curie(s: str) -> bool:
         """Check if a given string is a CURIE.
@@ -420,8 +585,10 @@ class ScibiteCordTransform(Transform):
     def load_gene_info(
         self, input_dir: str, output_dir: str, species_id: Optional[List] = None
     ) -> None:
-        """Load mappings from NCBI gene_info (gene_info.gz).
+        """Set up lookups of genes in NCBI gene_info (gene_info.gz).
 
+        The genes are read from a persisted index shared with other
+        transforms, which is opened (and built if needed) on first lookup.
         Args:
             input_dir: A string pointing to the directory to import data from.
             output_dir: A string pointing to the directory to output data to.
@@ -433,23 +600,7 @@ class ScibiteCordTransform(Transform):
             # default to just human
             species_id = ["9606"]
         file_path = os.path.join(self.input_base_dir, "gene_info.gz")
-
-        with gzip.open(file_path, "rt") as filehandler:
-            for line in tqdm(filehandler, desc="Loading gene info"):
-                records = line.split("\t")
-                if records[0] not in species_id:
-                    continue
-                ncbi_gene_identifier = records[1]
-                symbol = records[2]
-                hgnc_identifier = self.get_identifier_by_prefix(records[5], "HGNC:")
-                description = records[8]
-                if symbol not in self.gene_info_map:
-                    self.gene_info_map[symbol] = {
-                        "symbol": symbol,
-                        "description": description,
-                        "NCBI": ncbi_gene_identifier,
-                        "HGNC": hgnc_identifier,
-                    }
+        self.gene_info = GeneInfoIndex(file_path, species_id)
 
     def load_country_code(self, input_dir: str, output_dir: str) -> None:
         """Load Wikidata country codes."""
@@ -482,3 +633,35 @@ class ScibiteCordTransform(Transform):
             if "HGNC:HGNC:" in identifier:
                 identifier = ":".join(identifier.split(":")[1:])
         return identifier
+
+
+# the transform in a worker process, and its open zip files
+_worker_transform: Optional[ScibiteCordTransform] = None
+_worker_zip_files: Dict[str, ZipFile] = {}
+
+
+def _init_annotation_worker(transform: ScibiteCordTransform) -> None:
+    """Keep the transform for this worker process."""
+    global _worker_transform
+    _worker_transform = transform
+
+
+def _extract_annotation_shard(shard: Tuple[str, List[str]]) -> Tuple[List, Dict]:
+    """Extract publications and terms from a shard of documents in a zip file.
+
+    Returns:
+        The extract_annotation_doc() result for each document, and the concept
+        names first seen in this shard.
+    """
+    zip_file, names = shard
+    if zip_file not in _worker_zip_files:
+        _worker_zip_files[zip_file] = ZipFile(zip_file, "r")
+    zipfilehandler = _worker_zip_files[zip_file]
+    transform = _worker_transform
+    assert transform is not None, "worker was not initialized"
+    transform.concept_name_map = {}
+    results = [
+        transform.extract_annotation_doc(json_loads(zipfilehandler.read(name)))
+        for name in names
+    ]
+    return results, transform.concept_name_map
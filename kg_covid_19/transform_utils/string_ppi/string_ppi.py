@@ -1,17 +1,23 @@
 """Transform for STRING PPI."""
 
-import gzip
+import csv
 import logging
 import os
+from itertools import repeat
+from sys import intern
 from typing import Any, Dict, List, Optional, Set
 
 import compress_json  # type: ignore
+import numpy as np  # type: ignore
+import pandas as pd  # type: ignore
 
 from kg_covid_19.transform_utils.transform import Transform
-from kg_covid_19.utils.transform_utils import (collapse_uniprot_curie,
-                                               get_item_by_priority,
-                                               uniprot_make_name_to_id_mapping,
-                                               write_node_edge_item)
+from kg_covid_19.utils import NodeEdgeWriter
+from kg_covid_19.utils.gene_info_utils import GeneInfoIndex
+from kg_covid_19.utils.transform_utils import (ItemInDictNotFoundError,
+                                               collapse_uniprot_curie,
+                                               iter_taxon_lines,
+                                               uniprot_make_name_to_id_mapping)
 
 """
 Ingest protein-protein interactions from STRING DB.
@@ -39,10 +45,20 @@ GENE_INFO_FILE = "gene_info.gz"
 # make name to id map for uniprot names of human proteins
 UNIPROT_ID_MAPPING = "HUMAN_9606_idmapping.dat.gz"
 
+# number of interactions read and written per batch
+CHUNK_SIZE = 500_000
+
 
 class StringTransform(Transform):
     """Parse interactions from STRING DB into nodes and edges."""
 
+    INPUT_FILES = [
+        PROTEIN_MAPPING_FILE,
+        GENE_INFO_FILE,
+        UNIPROT_ID_MAPPING,
+        "9606.protein.links.full.v11.5.txt.gz",
+    ]
+
     def __init__(
         self, input_dir: Optional[str] = None, output_dir: Optional[str] = None
     ):
@@ -74,26 +90,22 @@ class StringTransform(Transform):
             # default to just human
             species_id = ["9606"]
         file_path = os.path.join(input_dir, PROTEIN_MAPPING_FILE)
-        with gzip.open(file_path, "rt") as filehandler:
-            for line in filehandler:
-                records = line.split("\t")
-                if records[0] not in species_id:
-                    continue
-                ncbi_gene_identifier = records[1]
-                ensembl_gene_identifier = records[2]
-                ensembl_protein_identifier = records[6].split(".")[0]
-                if ensembl_protein_identifier not in self.protein_gene_map:
-                    self.protein_gene_map[
-                        ensembl_protein_identifier
-                    ] = ensembl_gene_identifier
-                if ncbi_gene_identifier not in self.gene_info_map:
-                    self.gene_info_map[ncbi_gene_identifier] = {
-                        "ENSEMBL": ensembl_gene_identifier
-                    }
-                if ensembl_gene_identifier not in self.ensembl2ncbi_map:
-                    self.ensembl2ncbi_map[
-                        ensembl_gene_identifier
-                    ] = ncbi_gene_identifier
+        for line in iter_taxon_lines(file_path, species_id):
+            records = line.decode("utf-8").split("\t")
+            # identifiers are interned, so each is stored once across the maps
+            ncbi_gene_identifier = intern(records[1])
+            ensembl_gene_identifier = intern(records[2])
+            ensembl_protein_identifier = intern(records[6].split(".")[0])
+            if ensembl_protein_identifier not in self.protein_gene_map:
+                self.protein_gene_map[ensembl_protein_identifier] = (
+                    ensembl_gene_identifier
+                )
+            if ncbi_gene_identifier not in self.gene_info_map:
+                self.gene_info_map[ncbi_gene_identifier] = {
+                    "ENSEMBL": ensembl_gene_identifier
+                }
+            if ensembl_gene_identifier not in self.ensembl2ncbi_map:
+                self.ensembl2ncbi_map[ensembl_gene_identifier] = ncbi_gene_identifier
 
     def load_gene_info(
         self, input_dir: str, output_dir: str, species_id: Optional[List] = None
@@ -112,30 +124,29 @@ class StringTransform(Transform):
             species_id = ["9606"]
         file_path = os.path.join(self.input_base_dir, GENE_INFO_FILE)
 
-        with gzip.open(file_path, "rt") as filehandler:
-            for line in filehandler:
-                records = line.split("\t")
-                if records[0] not in species_id:
-                    continue
-                ncbi_gene_identifier = records[1]
-                symbol = records[2]
-                description = records[8]
-                if ncbi_gene_identifier not in self.gene_info_map:
-                    self.gene_info_map[ncbi_gene_identifier] = {
-                        "symbol": symbol,
-                        "description": description,
-                    }
-                else:
-                    self.gene_info_map[ncbi_gene_identifier]["symbol"] = symbol
-                    self.gene_info_map[ncbi_gene_identifier][
-                        "description"
-                    ] = description
-
-    def run(self, data_file: Optional[str] = None) -> None:
+        # read from the persisted index shared with other transforms, rather
+        # than decompressing gene_info.gz again
+        for gene in GeneInfoIndex(file_path, species_id):
+            ncbi_gene_identifier = intern(gene.ncbi)
+            if ncbi_gene_identifier not in self.gene_info_map:
+                self.gene_info_map[ncbi_gene_identifier] = {
+                    "symbol": gene.symbol,
+                    "description": gene.description,
+                }
+            else:
+                self.gene_info_map[ncbi_gene_identifier]["symbol"] = gene.symbol
+                self.gene_info_map[ncbi_gene_identifier][
+                    "description"
+                ] = gene.description
+
+    def run(
+        self, data_file: Optional[str] = None, chunk_size: int = CHUNK_SIZE
+    ) -> None:
         """Perform transformations to process protein-protein interactions.
 
         Args:
             data_file: data file to parse
+            chunk_size: number of interactions to process per batch
         Returns:
             None.
         """
@@ -166,21 +177,48 @@ class StringTransform(Transform):
             os.path.join(self.input_base_dir, UNIPROT_ID_MAPPING)
         )
 
-        with open(self.output_node_file, "w") as node, open(
-            self.output_edge_file, "w"
-        ) as edge, gzip.open(data_file, "rt") as interactions:
-
-            node.write("\t".join(self.node_header) + "\n")
-            edge.write("\t".join(self.edge_header) + "\n")
-
-            header_items = parse_header(interactions.readline())
-            for line in interactions:
-                items_dict = parse_stringdb_interactions(line, header_items)
-                proteins = []
-                for protein_name in ("protein1", "protein2"):
-                    nat_string_id = get_item_by_priority(items_dict, [protein_name])
+        with NodeEdgeWriter(
+            self.output_node_file,
+            self.output_edge_file,
+            self.node_header,
+            self.edge_header,
+        ) as writer:
+
+            # interactions are read and written in column batches; proteins are
+            # factorized so that per-protein work (node rows, gene and UniProt
+            # lookups) is done once per distinct protein rather than per line
+            for chunk in pd.read_csv(
+                data_file,
+                sep=" ",
+                dtype=str,
+                na_filter=False,
+                quoting=csv.QUOTE_NONE,
+                chunksize=chunk_size,
+            ):
+                chunk.columns = [c.replace('"', "") for c in chunk.columns]
+
+                # proteins in order of appearance: protein1, protein2 of row 0,
+                # then of row 1, etc. - the order the row-wise parse visited them
+                occurrences = np.empty(2 * len(chunk), dtype=object)
+                occurrences[0::2] = chunk["protein1"].to_numpy()
+                occurrences[1::2] = chunk["protein2"].to_numpy()
+                codes, nat_string_ids = pd.factorize(occurrences)
+                _, first_positions = np.unique(codes, return_index=True)
+
+                curies = np.empty(len(nat_string_ids), dtype=object)
+                node_lines = []
+                # gene edges, keyed by the row whose interaction edge they precede
+                gene_edge_rows: Dict[int, List[List[str]]] = {}
+                for i, nat_string_id in enumerate(nat_string_ids):
+                    if not nat_string_id:
+                        raise ItemInDictNotFoundError(
+                            f"Can't find protein in a line of {data_file}"
+                        )
                     protein = ".".join(nat_string_id.split(".")[1:])
-                    proteins.append(protein)
+                    curies[i] = f"ENSEMBL:{protein}"
+                    if protein in seen_proteins:
+                        continue
+                    seen_proteins.add(protein)
 
                     if protein in self.protein_gene_map:
                         gene = self.protein_gene_map[protein]
@@ -190,22 +228,19 @@ class StringTransform(Transform):
                             gene_informations = self.gene_info_map[
                                 self.ensembl2ncbi_map[gene]
                             ]
-                            write_node_edge_item(
-                                fh=node,
-                                header=self.node_header,
-                                data=[
+                            node_lines.append(
+                                [
                                     ensemble_gene,
                                     gene_informations["symbol"],
                                     "biolink:Gene",
                                     gene_informations["description"],
                                     f"NCBIGene:{self.ensembl2ncbi_map[gene]}",
                                     self.source_name,
-                                ],
+                                ]
                             )
-                            write_node_edge_item(
-                                fh=edge,
-                                header=self.edge_header,
-                                data=[
+                            row = first_positions[i] // 2
+                            gene_edge_rows.setdefault(row, []).append(
+                                [
                                     ensemble_gene,
                                     "biolink:has_gene_product",
                                     f"ENSEMBL:{protein}",
@@ -213,80 +248,54 @@ class StringTransform(Transform):
                                     "NCBI",
                                     "",
                                 ]
-                                + self.extra_header,
+                                + self.extra_header
                             )
 
-                    # write node data
-                    if protein not in seen_proteins:
-                        seen_proteins.add(protein)
-
-                        # if we have an equivalent Uniprot ID for this Ensembl protein
-                        # ID make an xref edge, and a node for the Uniprot ID
-                        uniprot_curie = ""
-                        if protein in string_to_uniprot_id_map:
-                            uniprot_curie = (
-                                f"UniProtKB:{string_to_uniprot_id_map[protein]}"
-                            )
-                            uniprot_curie = collapse_uniprot_curie(uniprot_curie)
-
-                        write_node_edge_item(
-                            fh=node,
-                            header=self.node_header,
-                            data=[
-                                f"ENSEMBL:{protein}",
-                                "",
-                                protein_node_type,
-                                "",
-                                uniprot_curie,  # xref
-                                self.source_name,
-                            ],
-                        )
+                    # if we have an equivalent Uniprot ID for this Ensembl protein
+                    # ID make an xref edge, and a node for the Uniprot ID
+                    uniprot_curie = ""
+                    if protein in string_to_uniprot_id_map:
+                        uniprot_curie = f"UniProtKB:{string_to_uniprot_id_map[protein]}"
+                        uniprot_curie = collapse_uniprot_curie(uniprot_curie)
+
+                    node_lines.append(
+                        [
+                            f"ENSEMBL:{protein}",
+                            "",
+                            protein_node_type,
+                            "",
+                            uniprot_curie,  # xref
+                            self.source_name,
+                        ]
+                    )
+
+                writer.write_nodes(node_lines)
 
                 # write edge data
-                write_node_edge_item(
-                    fh=edge,
-                    header=self.edge_header,
-                    data=[
-                        f"ENSEMBL:{proteins[0]}",
-                        edge_label,
-                        f"ENSEMBL:{proteins[1]}",
-                        relation,
-                        "STRING",
-                        "biolink:Association",
-                        items_dict["combined_score"],
-                    ]
-                    + [
-                        items_dict.get(header, "") for header in edge_additional_headers
-                    ],
+                n_rows = len(chunk)
+                edge_rows = list(
+                    zip(
+                        curies[codes[0::2]].tolist(),
+                        repeat(edge_label, n_rows),
+                        curies[codes[1::2]].tolist(),
+                        repeat(relation, n_rows),
+                        repeat("STRING", n_rows),
+                        repeat("biolink:Association", n_rows),
+                        chunk["combined_score"].tolist(),
+                        *[
+                            (
+                                chunk[header].tolist()
+                                if header in chunk
+                                else repeat("", n_rows)
+                            )
+                            for header in edge_additional_headers
+                        ],
+                    )
                 )
 
-
-def parse_stringdb_interactions(this_line: str, header_items: List) -> Dict:
-    """Process a line of text from STRING.
-
-    That is, a STRING string.
-    Args:
-        this_line: A string containing a line of text.
-        header_items: A list of header items.
-
-    Returns:
-        item_dict: A dictionary of header items and a processed string.
-    """
-    items = this_line.strip().split(" ")
-    item_dict = dict(zip(header_items, items))
-    return item_dict
-
-
-def parse_header(header_string: str, sep: str = " ") -> List:
-    """Parse header data.
-
-    Args:
-        header_string: A string containing header items.
-        sep: A string containing a delimiter.
-
-    Returns:
-        A list of header items.
-    """
-    header = header_string.strip().split(sep)
-
-    return [i.replace('"', "") for i in header]
+                start = 0
+                for row in sorted(gene_edge_rows):
+                    writer.write_edges(edge_rows[start:row])
+                    writer.write_edges(gene_edge_rows[row])
+                    start = row
+                writer.write_edges(edge_rows[start:])
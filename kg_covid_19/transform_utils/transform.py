@@ -1,7 +1,11 @@
 """Defines the parent class for all transforms."""
 
+import logging
 import os
-from typing import Optional
+from typing import List, Optional
+
+# output formats of transforms, by the suffix of their node and edge files
+OUTPUT_FORMATS = {"tsv": ".tsv", "parquet": ".parquet"}
 
 
 class Transform:
@@ -10,6 +14,18 @@ class Transform:
     DEFAULT_INPUT_DIR = os.path.join("data", "raw")
     DEFAULT_OUTPUT_DIR = os.path.join("data", "transformed")
 
+    # bump when a change to the transform changes its output, so that
+    # incremental runs rebuild it even if the raw inputs didn't change
+    VERSION = "1"
+    # raw files read by the transform, relative to the input dir
+    INPUT_FILES: List[str] = []
+    # mapping files read by the transform, relative to the working directory
+    MAP_FILES: List[str] = []
+    # formats the transform can write its nodes and edges in
+    OUTPUT_FORMATS: List[str] = list(OUTPUT_FORMATS)
+    # whether run() takes a number of worker processes to parse in
+    PARALLEL = False
+
     def __init__(
         self,
         source_name,
@@ -33,6 +49,32 @@ class Transform:
         self.output_edge_file = os.path.join(self.output_dir, "edges.tsv")
         self.output_json_file = os.path.join(self.output_dir, "nodes_edges.json")
 
+    def set_output_format(self, output_format: str) -> None:
+        """Write nodes and edges in another format than TSV.
+
+        Transforms that can't write the format keep writing TSV.
+        Args:
+            output_format: A key of OUTPUT_FORMATS, like parquet.
+        """
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format {output_format}")
+        if output_format not in self.OUTPUT_FORMATS:
+            logging.warning(
+                f"{self.source_name} can't write {output_format}, writing tsv"
+            )
+            return
+        suffix = OUTPUT_FORMATS[output_format]
+        self.output_node_file = os.path.join(self.output_dir, "nodes" + suffix)
+        self.output_edge_file = os.path.join(self.output_dir, "edges" + suffix)
+
     def run(self, data_file: Optional[str] = None):
         """Run the transformation."""
         pass
+
+    def output_files(self) -> List[str]:
+        """Get the node and edge files the transform writes.
+
+        Returns:
+            A list of paths.
+        """
+        return [self.output_node_file, self.output_edge_file]
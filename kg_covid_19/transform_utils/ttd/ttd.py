@@ -4,10 +4,11 @@ import collections
 import logging
 import os
 import re
-from typing import List, Optional, Union
+from typing import List, Mapping, Optional, Union
 
 from kg_covid_19.transform_utils.transform import Transform
-from kg_covid_19.utils import normalize_curies, write_node_edge_item
+from kg_covid_19.utils import NodeEdgeWriter, NormalizationMap
+from kg_covid_19.utils.normalize_utils import DRUGCENTRAL_MAP
 from kg_covid_19.utils.transform_utils import (ItemInDictNotFoundError,
                                                get_item_by_priority,
                                                uniprot_make_name_to_id_mapping)
@@ -31,6 +32,9 @@ class TTDNotEnoughFieldsError(Exception):
 class TTDTransform(Transform):
     """Transforms TTD data."""
 
+    INPUT_FILES = ["P1-01-TTD_target_download.txt", "HUMAN_9606_idmapping.dat.gz"]
+    MAP_FILES = [DRUGCENTRAL_MAP]
+
     def __init__(
         self, input_dir: Optional[str] = None, output_dir: Optional[str] = None
     ):
@@ -68,17 +72,16 @@ class TTDTransform(Transform):
         name_2_id_map = uniprot_make_name_to_id_mapping(dat_gz_id_file)
 
         # transform data, something like:
-        with open(self.output_node_file, "w") as node, open(
-            self.output_edge_file, "w"
-        ) as edge:
-
-            # write headers (change default node/edge headers if necessary
-            node.write("\t".join(self.node_header) + "\n")
-            edge.write("\t".join(self.edge_header) + "\n")
+        with NodeEdgeWriter(
+            self.output_node_file,
+            self.output_edge_file,
+            self.node_header,
+            self.edge_header,
+        ) as writer:
 
             # Set up ID mapping for normalization
-            # this gets converted to a flat dict in the end
-            all_ttd_drugs = []
+            norm_map = NormalizationMap.load()
+            ttd_drug_map = {}
             for _, data in ttd_data.items():
                 if "UNIPROID" not in data:
                     continue
@@ -86,16 +89,7 @@ class TTDTransform(Transform):
                     continue
                 for this_drug in data["DRUGINFO"]:
                     this_drug_curie = drug_id_prefix + this_drug[0]
-                    all_ttd_drugs.append(
-                        {"orig_id": this_drug_curie, "id": this_drug_curie}
-                    )
-            normalized_ttd_drugs = normalize_curies(
-                map_path="./maps/drugcentral-maps-kg_covid_19-0.1.sssom.tsv",
-                entries=all_ttd_drugs,
-            )
-            ttd_drug_map = {
-                entry["orig_id"]: entry["id"] for entry in normalized_ttd_drugs
-            }
+                    ttd_drug_map[this_drug_curie] = norm_map.normalize(this_drug_curie)
 
             for target_id, data in ttd_data.items():
                 # WRITE NODES
@@ -117,10 +111,8 @@ class TTDTransform(Transform):
 
                 # gene - ['id', 'name', 'category', 'ttd id for this target']
                 for this_id in uniproids:
-                    write_node_edge_item(
-                        fh=node,
-                        header=self.node_header,
-                        data=[
+                    writer.write_node(
+                        [
                             this_id,
                             gene_name,
                             gene_node_type,
@@ -135,10 +127,8 @@ class TTDTransform(Transform):
                     #
                     # make node for drug
                     #
-                    write_node_edge_item(
-                        fh=node,
-                        header=self.node_header,
-                        data=[
+                    writer.write_node(
+                        [
                             this_drug_curie,
                             this_drug[1],
                             drug_node_type,
@@ -154,10 +144,8 @@ class TTDTransform(Transform):
 
                     # ['subject', 'edge_label', 'object', 'relation', 'comment']
                     for this_id in uniproids:
-                        write_node_edge_item(
-                            fh=edge,
-                            header=self.edge_header,
-                            data=[
+                        writer.write_edge(
+                            [
                                 this_drug_curie,
                                 drug_gene_edge_label,
                                 this_id,
@@ -169,7 +157,7 @@ class TTDTransform(Transform):
                         )
 
     def get_uniproids(
-        self, data: dict, name_2_id_map: dict, uniprot_curie_prefix: str
+        self, data: dict, name_2_id_map: Mapping, uniprot_curie_prefix: str
     ) -> List[str]:
         """Get a list of UniProtKB IDs from names."""
         ids = []
@@ -6,8 +6,8 @@ from typing import Optional
 from tabula import io  # type: ignore
 
 from kg_covid_19.transform_utils.transform import Transform
-from kg_covid_19.utils.transform_utils import (multi_page_table_to_list,
-                                               write_node_edge_item)
+from kg_covid_19.utils import NodeEdgeWriter
+from kg_covid_19.utils.transform_utils import multi_page_table_to_list
 
 """
 Ingest Covid-19 associated host proteins from Suppl Fig 3 of this paper:
@@ -30,6 +30,8 @@ gene:1234  contributes_to_condition    MONDO:0005002   RO:0003304
 class ZhouTransform(Transform):
     """Transform for Zhou host protein data."""
 
+    INPUT_FILES = ["41421_2020_153_MOESM1_ESM.pdf"]
+
     def __init__(
         self, input_dir: Optional[str] = None, output_dir: Optional[str] = None
     ) -> None:
@@ -71,10 +73,6 @@ class ZhouTransform(Transform):
             "MERS": {"taxon_id": 1335626},
         }
 
-        # for tsv output:
-        output_node_file = os.path.join(self.output_dir, "nodes.tsv")
-        output_edge_file = os.path.join(self.output_dir, "edges.tsv")
-
         # make directory in data/transformed
         os.makedirs(self.output_dir, exist_ok=True)
 
@@ -84,11 +82,12 @@ class ZhouTransform(Transform):
 
         fig_3_table = multi_page_table_to_list(fig_3_table_unformatted)
 
-        with open(output_node_file, "w") as node, open(output_edge_file, "w") as edge:
-
-            # write node.tsv header
-            node.write("\t".join(self.node_header) + "\n")
-            edge.write("\t".join(self.edge_header) + "\n")
+        with NodeEdgeWriter(
+            self.output_node_file,
+            self.output_edge_file,
+            self.node_header,
+            self.edge_header,
+        ) as writer:
 
             for row in fig_3_table:
 
@@ -104,10 +103,8 @@ class ZhouTransform(Transform):
 
                 # WRITE NODES
                 # virus
-                write_node_edge_item(
-                    fh=node,
-                    header=self.node_header,
-                    data=[
+                writer.write_node(
+                    [
                         gene_curie_prefix + row["Host Gene ID"],
                         row["Host Protein"],
                         gene_node_type,
@@ -116,10 +113,8 @@ class ZhouTransform(Transform):
                 )
 
                 # host gene
-                write_node_edge_item(
-                    fh=node,
-                    header=self.node_header,
-                    data=[
+                writer.write_node(
+                    [
                         corona_curie,
                         row["Coronavirus"],
                         virus_node_type,
@@ -128,10 +123,8 @@ class ZhouTransform(Transform):
                 )
 
                 # WRITE EDGES
-                write_node_edge_item(
-                    fh=edge,
-                    header=self.edge_header,
-                    data=[
+                writer.write_edge(
+                    [
                         gene_curie_prefix + row["Host Gene ID"],
                         host_gene_vgene_edge_label,
                         corona_curie,
@@ -1,13 +1,17 @@
 """Initialize utilities."""
 
 from .download_utils import download_from_yaml
-from .normalize_utils import load_ids_from_map, normalize_curies
+from .normalize_utils import (NormalizationMap, load_ids_from_map,
+                              normalize_curies)
 from .transform_utils import multi_page_table_to_list, write_node_edge_item
+from .writer_utils import NodeEdgeWriter
 
 __all__ = [
     "download_from_yaml",
     "multi_page_table_to_list",
     "write_node_edge_item",
+    "NodeEdgeWriter",
+    "NormalizationMap",
     "normalize_curies",
     "load_ids_from_map",
 ]
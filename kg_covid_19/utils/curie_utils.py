@@ -0,0 +1,81 @@
+"""Utilities for contracting IRIs to CURIEs."""
+
+from typing import Dict, List, Optional, Tuple
+
+from prefixcommons.curie_util import default_curie_maps  # type: ignore
+
+# key marking the end of an IRI base in a trie node
+_END = ""
+
+
+class PrefixTrie:
+    """A character trie of IRI bases, for contracting IRIs to CURIEs.
+
+    Looking up an IRI walks the trie once along the IRI, instead of testing
+    every base of every prefix map with startswith() as
+    prefixcommons.contract_uri() does.
+    """
+
+    def __init__(self, cmaps: Optional[List[Dict]] = None):
+        """Build the trie.
+
+        Args:
+            cmaps: List of prefix maps, of prefix to IRI base
+                [prefixcommons default maps].
+        """
+        if cmaps is None:
+            cmaps = default_curie_maps
+        self._root: Dict = {}
+        for cmap in cmaps:
+            for prefix, base in cmap.items():
+                if isinstance(base, str):
+                    self.add(prefix, base)
+
+    def add(self, prefix: str, base: str) -> None:
+        """Add a prefix and its IRI base.
+
+        Args:
+            prefix: The CURIE prefix, like GO.
+            base: The IRI base, like http://purl.obolibrary.org/obo/GO_
+        """
+        node = self._root
+        for char in base:
+            node = node.setdefault(char, {})
+        node.setdefault(_END, set()).add((prefix, base))
+
+    def matches(self, iri: str) -> List[Tuple[str, str]]:
+        """Find all (prefix, base) whose base the IRI starts with.
+
+        Args:
+            iri: The IRI.
+        Returns:
+            List of (prefix, base), shortest base first.
+        """
+        found: List[Tuple[str, str]] = []
+        node = self._root
+        for char in iri:
+            if _END in node:
+                found.extend(node[_END])
+            child: Optional[Dict] = node.get(char)
+            if child is None:
+                return found
+            node = child
+        if _END in node:
+            found.extend(node[_END])
+        return found
+
+    def contract(self, iri: str) -> List[str]:
+        """Contract an IRI to CURIEs.
+
+        Gives the same CURIEs as prefixcommons.contract_uri(iri, cmaps), in
+        sorted rather than arbitrary order.
+        Args:
+            iri: The IRI.
+        Returns:
+            List of the shortest possible CURIEs, empty if no base matches.
+        """
+        curies = {iri.replace(base, prefix + ":") for prefix, base in self.matches(iri)}
+        if len(curies) > 1:
+            shortest = min(len(curie) for curie in curies)
+            curies = {curie for curie in curies if len(curie) == shortest}
+        return sorted(curies)
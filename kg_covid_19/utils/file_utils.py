@@ -0,0 +1,50 @@
+"""Utilities for writing files that readers never see half-written."""
+
+import os
+from contextlib import contextmanager
+from typing import IO, Any, Callable, Iterator
+
+
+@contextmanager
+def atomic_path(path: str) -> Iterator[str]:
+    """Get a temp path to build a file at, and move it to path when done.
+
+    The temp file is <path>.<pid>.tmp, so concurrent builders of the same
+    file at worst duplicate work. If the block raises, the temp file is
+    removed and path is left as it was.
+
+    Args:
+        path: Path of the file to build.
+
+    Yields:
+        The temp path.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@contextmanager
+def atomic_write(
+    path: str, mode: str = "w", opener: Callable[..., IO] = open, **kwargs: Any
+) -> Iterator[IO]:
+    """Open a temp file for writing, and move it to path once it is closed.
+
+    Args:
+        path: Path of the file to write.
+        mode: Mode to open the temp file in [w].
+        opener: Function to open the temp file with, like gzip.open [open].
+        **kwargs: More arguments for opener.
+
+    Yields:
+        The open temp file.
+    """
+    with atomic_path(path) as tmp_path, opener(tmp_path, mode, **kwargs) as f:
+        yield f
@@ -0,0 +1,223 @@
+"""Persisted lookup index for NCBI gene_info files."""
+
+import logging
+import os
+import sqlite3
+from contextlib import closing
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from kg_covid_19.utils.file_utils import atomic_path
+from kg_covid_19.utils.manifest_utils import file_fingerprint
+from kg_covid_19.utils.transform_utils import iter_taxon_lines
+
+INDEX_SUFFIX = ".index.sqlite"
+
+BATCH_SIZE = 100_000
+
+# let SQLite serve lookups from a shared memory map of the index
+MMAP_SIZE = 1 << 32
+
+# gene_info columns
+NCBI_COLUMN = 1
+SYMBOL_COLUMN = 2
+DB_XREFS_COLUMN = 5
+DESCRIPTION_COLUMN = 8
+
+
+class GeneInfo(NamedTuple):
+    """A gene of NCBI gene_info."""
+
+    ncbi: str
+    symbol: str
+    description: str
+    hgnc: Optional[str]
+
+
+def hgnc_id(db_xrefs: str) -> Optional[str]:
+    """Get the HGNC id from the dbXrefs of a gene, like HGNC:5.
+
+    Args:
+        db_xrefs: The |-separated dbXrefs column of gene_info.
+    Returns:
+        The HGNC id, or None if the gene has none.
+    """
+    for xref in db_xrefs.split("|"):
+        if "HGNC:" in xref:
+            if "HGNC:HGNC:" in xref:
+                xref = ":".join(xref.split(":")[1:])
+            return xref
+    return None
+
+
+class GeneInfoIndex:
+    """Lookups of genes in NCBI gene_info by NCBI Gene id, symbol or HGNC id.
+
+    Given the gene_info.gz file,
+    https://ftp.ncbi.nlm.nih.gov/gene/DATA/gene_info.gz
+    the genes of the taxa are indexed once into an SQLite file next to it,
+    and the index is rebuilt only when the content hash of gene_info.gz
+    changes. The index is opened (and built if needed) on first use, and
+    since lookups go through a memory map, processes using the same index
+    share its pages.
+    """
+
+    def __init__(
+        self,
+        gene_info_file: str,
+        taxa: Optional[Iterable[str]] = None,
+        index_file: Optional[str] = None,
+    ):
+        """Initialize, without opening or building the index yet.
+
+        Args:
+            gene_info_file: Path to gene_info.gz.
+            taxa: NCBI taxon ids of the genes to index [9606].
+            index_file: Path to the index
+                [gene_info_file + .<taxa>.index.sqlite].
+        """
+        self.gene_info_file = gene_info_file
+        self.taxa = sorted(taxa) if taxa else ["9606"]
+        self.index_file = (
+            index_file
+            if index_file
+            else f"{gene_info_file}.{'_'.join(self.taxa)}{INDEX_SUFFIX}"
+        )
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._checked = False
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Get a read-only connection to the index, one per process."""
+        if not self._checked:
+            if not self.is_current():
+                self.build()
+            self._checked = True
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(
+                f"file:{self.index_file}?mode=ro", uri=True, check_same_thread=False
+            )
+            self._connection.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+            self._pid = os.getpid()
+        return self._connection
+
+    def is_current(self) -> bool:
+        """Check whether the index exists and matches gene_info.gz."""
+        if not os.path.exists(self.index_file):
+            return False
+        connection = sqlite3.connect(self.index_file)
+        try:
+            meta = dict(connection.execute("SELECT key, value FROM meta"))
+            if meta["taxa"] != ",".join(self.taxa):
+                return False
+            previous = {
+                "size": int(meta["size"]),
+                "mtime": float(meta["mtime"]),
+                "sha256": meta["sha256"],
+            }
+            current = file_fingerprint(self.gene_info_file, previous)
+            if current is None or current["sha256"] != previous["sha256"]:
+                return False
+            if current != previous:
+                # only touched, remember the new mtime to skip hashing next time
+                self._write_meta(connection, current)
+            return True
+        except (sqlite3.DatabaseError, KeyError, ValueError):
+            return False
+        finally:
+            connection.close()
+
+    def build(self) -> None:
+        """Build the index from gene_info.gz."""
+        logging.info(f"Building gene_info index {self.index_file}")
+        fingerprint = file_fingerprint(self.gene_info_file)
+        if fingerprint is None:
+            raise FileNotFoundError(self.gene_info_file)
+
+        with atomic_path(self.index_file) as tmp_file, closing(
+            sqlite3.connect(tmp_file)
+        ) as connection:
+            connection.execute("PRAGMA journal_mode=OFF")
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+            connection.execute(
+                "CREATE TABLE genes (ncbi TEXT PRIMARY KEY, line INTEGER, "
+                "symbol TEXT, description TEXT, hgnc TEXT) WITHOUT ROWID"
+            )
+            batch = []
+            for line_number, line in enumerate(
+                iter_taxon_lines(self.gene_info_file, self.taxa)
+            ):
+                records = line.decode("utf-8").split("\t")
+                batch.append(
+                    (
+                        records[NCBI_COLUMN],
+                        line_number,
+                        records[SYMBOL_COLUMN],
+                        records[DESCRIPTION_COLUMN],
+                        hgnc_id(records[DB_XREFS_COLUMN]),
+                    )
+                )
+                if len(batch) >= BATCH_SIZE:
+                    self._insert(connection, batch)
+                    batch = []
+            self._insert(connection, batch)
+            connection.execute("CREATE INDEX genes_symbol ON genes (symbol, line)")
+            connection.execute("CREATE INDEX genes_hgnc ON genes (hgnc, line)")
+            self._write_meta(connection, {**fingerprint, "taxa": ",".join(self.taxa)})
+            connection.commit()
+
+    @staticmethod
+    def _insert(connection: sqlite3.Connection, batch: list) -> None:
+        # later lines of a gene win, as they did with the in-memory dicts
+        connection.executemany(
+            "INSERT OR REPLACE INTO genes (ncbi, line, symbol, description, hgnc) "
+            "VALUES (?, ?, ?, ?, ?)",
+            batch,
+        )
+
+    @staticmethod
+    def _write_meta(connection: sqlite3.Connection, meta: dict) -> None:
+        connection.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [(k, str(v)) for k, v in meta.items()],
+        )
+        connection.commit()
+
+    def _first(self, column: str, value: str) -> Optional[GeneInfo]:
+        row = self.connection.execute(
+            f"SELECT ncbi, symbol, description, hgnc FROM genes WHERE {column} = ? "
+            "ORDER BY line LIMIT 1",
+            (value,),
+        ).fetchone()
+        return GeneInfo(*row) if row else None
+
+    def by_ncbi(self, ncbi_id: str) -> Optional[GeneInfo]:
+        """Get a gene by its NCBI Gene id, like 1017."""
+        return self._first("ncbi", ncbi_id)
+
+    def by_symbol(self, symbol: str) -> Optional[GeneInfo]:
+        """Get the first gene with a symbol, like CDK2."""
+        return self._first("symbol", symbol)
+
+    def by_hgnc(self, hgnc: str) -> Optional[GeneInfo]:
+        """Get the first gene with an HGNC id, like HGNC:1771."""
+        return self._first("hgnc", hgnc)
+
+    def __iter__(self) -> Iterator[GeneInfo]:
+        """Iterate over all genes, in gene_info order."""
+        for row in self.connection.execute(
+            "SELECT ncbi, symbol, description, hgnc FROM genes ORDER BY line"
+        ):
+            yield GeneInfo(*row)
+
+    def __len__(self) -> int:
+        """Count the genes in the index."""
+        return self.connection.execute("SELECT COUNT(*) FROM genes").fetchone()[0]
+
+    def __getstate__(self) -> dict:
+        """Drop the connection when pickling, workers reopen their own."""
+        state = self.__dict__.copy()
+        state["_connection"] = None
+        state["_pid"] = None
+        return state
@@ -0,0 +1,215 @@
+"""Interning of strings as integer codes, and tables of interned columns."""
+
+from itertools import chain
+from typing import (Dict, Iterable, Iterator, List, Mapping, Optional,
+                    Sequence, Tuple)
+
+import numpy as np  # type: ignore
+
+# code of "" (a missing value) in the interners of InternedTable
+EMPTY = 0
+
+# dtype of codes in tables
+CODE_DTYPE = np.int32
+
+# rows decoded at a time when iterating over a table
+DECODE_ROWS = 10_000
+
+LIST_DELIMITER = "|"
+
+
+class Interner(dict):
+    """Map strings to consecutive integer codes, assigned in order of first use.
+
+    Looking a string up interns it:
+
+        >>> ids = Interner()
+        >>> ids["HGNC:5"], ids["HGNC:7"], ids["HGNC:5"]
+        (0, 1, 0)
+        >>> ids.strings[1]
+        'HGNC:7'
+    """
+
+    def __init__(self, strings: Iterable[str] = ()):
+        """Initialize.
+
+        Args:
+            strings: Strings to intern first, so they get the smallest codes.
+        """
+        super().__init__()
+        self.strings: List[str] = []
+        for string in strings:
+            self[string]
+
+    def __missing__(self, string: str) -> int:
+        """Intern a new string."""
+        code = self[string] = len(self.strings)
+        self.strings.append(string)
+        return code
+
+    def encode(self, strings: Iterable[str], count: int = -1) -> np.ndarray:
+        """Intern strings and get their codes.
+
+        Args:
+            strings: The strings.
+            count: Number of strings, if known, to allocate the array once.
+        Returns:
+            An array of the codes of the strings.
+        """
+        return np.fromiter(map(self.__getitem__, strings), CODE_DTYPE, count)
+
+    def decode(self, codes: Iterable[int]) -> List[str]:
+        """Get the strings of codes.
+
+        Args:
+            codes: Codes of this interner, e.g. an array.
+        Returns:
+            A list of the strings.
+        """
+        if isinstance(codes, np.ndarray):
+            codes = codes.tolist()
+        return list(map(self.strings.__getitem__, codes))
+
+
+class InternedTable:
+    """A table of string columns, stored as arrays of interned codes.
+
+    Every column has an interner, which columns can share (like node ids in
+    the subject and object of edges). A row without a value for a column
+    gets "", which is code EMPTY in every interner of the table.
+    """
+
+    def __init__(self, interners: Optional[Mapping[str, Interner]] = None):
+        """Initialize an empty table.
+
+        Args:
+            interners: Interners of columns; other columns get their own.
+        """
+        self.interners: Dict[str, Interner] = dict(interners or {})
+        for interner in self.interners.values():
+            if interner[""] != EMPTY:
+                raise ValueError("Interners of a table must have code 0 for ''")
+        self._chunks: Dict[str, List[np.ndarray]] = {}
+        self.length = 0
+
+    def __len__(self) -> int:
+        """Count the rows."""
+        return self.length
+
+    @property
+    def column_names(self) -> List[str]:
+        """Get the columns, in order of first use."""
+        return list(self._chunks)
+
+    def interner(self, column: str) -> Interner:
+        """Get the interner of a column."""
+        if column not in self.interners:
+            self.interners[column] = Interner([""])
+        return self.interners[column]
+
+    def append(self, records: Sequence[Mapping[str, str]]) -> None:
+        """Append rows given as dicts of column to value.
+
+        Args:
+            records: The rows, missing columns are "".
+        """
+        if not records:
+            return
+        count = len(records)
+        columns = dict.fromkeys(chain.from_iterable(records))
+        for column in columns:
+            if column not in self._chunks:
+                self._chunks[column] = [np.zeros(self.length, CODE_DTYPE)]
+            self._chunks[column].append(
+                self.interner(column).encode(
+                    (record.get(column, "") for record in records), count
+                )
+            )
+        for column, chunks in self._chunks.items():
+            if column not in columns:
+                chunks.append(np.zeros(count, CODE_DTYPE))
+        self.length += count
+
+    def column(self, column: str) -> np.ndarray:
+        """Get the codes of a column as one array."""
+        if column not in self._chunks:
+            return np.zeros(self.length, CODE_DTYPE)
+        chunks = self._chunks[column]
+        if len(chunks) > 1:
+            chunks[:] = [np.concatenate(chunks)]
+        return chunks[0]
+
+    def merge_duplicates(
+        self, key_columns: List[str], core: Iterable[str]
+    ) -> "InternedTable":
+        """Merge the rows with equal keys into one.
+
+        Rows are merged the way stream_merge merges records: core columns
+        keep their first non-empty value, other columns collect the distinct
+        "|"-separated values of all rows, in order.
+        Args:
+            key_columns: Columns whose codes make up the key of a row.
+            core: Columns that keep their first value.
+        Returns:
+            A table sharing the interners of this one, with a row per key,
+            in order of the key codes.
+        """
+        merged = InternedTable(self.interners)
+        if not self.length:
+            merged._chunks = {column: [] for column in self._chunks}
+            return merged
+        keys = [self.column(column) for column in key_columns]
+        # stable, so duplicates stay in the order they were appended in
+        order = np.lexsort(keys[::-1])
+        new_key = np.zeros(self.length, dtype=bool)
+        new_key[0] = True
+        for key in keys:
+            sorted_key = key[order]
+            new_key[1:] |= sorted_key[1:] != sorted_key[:-1]
+        starts = np.flatnonzero(new_key)
+        ends = np.append(starts[1:], self.length)
+        first_rows = order[starts]
+        merged.length = len(starts)
+
+        duplicates = np.flatnonzero(ends - starts > 1)
+        core = set(core)
+        for column in self._chunks:
+            codes = self.column(column)
+            merged_codes = codes[first_rows]
+            for group in duplicates:
+                merged_codes[group] = self._merge_codes(
+                    column,
+                    codes[order[starts[group] : ends[group]]],
+                    column in core,
+                )
+            merged._chunks[column] = [merged_codes]
+        return merged
+
+    def _merge_codes(self, column: str, codes: np.ndarray, core: bool) -> int:
+        distinct = dict.fromkeys(code for code in codes.tolist() if code != EMPTY)
+        if len(distinct) <= 1 or core:
+            return next(iter(distinct), EMPTY)
+        strings = self.interner(column).strings
+        values = dict.fromkeys(
+            chain.from_iterable(
+                strings[code].split(LIST_DELIMITER) for code in distinct
+            )
+        )
+        return self.interner(column)[LIST_DELIMITER.join(values)]
+
+    def rows(self, columns: List[str]) -> Iterator[Tuple[str, ...]]:
+        """Decode the rows of the table, in batches.
+
+        Args:
+            columns: Columns of the rows, in order.
+        Returns:
+            An iterator of rows, tuples of one value per column.
+        """
+        arrays = [(self.interner(column), self.column(column)) for column in columns]
+        for start in range(0, self.length, DECODE_ROWS):
+            yield from zip(
+                *[
+                    interner.decode(codes[start : start + DECODE_ROWS])
+                    for interner, codes in arrays
+                ]
+            )
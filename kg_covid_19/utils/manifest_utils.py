@@ -0,0 +1,125 @@
+"""Utilities for tracking which transform outputs are up to date."""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from kg_covid_19.utils.file_utils import atomic_write
+
+MANIFEST_FILE = "transform_manifest.json"
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_fingerprint(path: str, previous: Optional[Dict] = None) -> Optional[Dict]:
+    """Fingerprint a file by its size, mtime and content hash.
+
+    Hashing is skipped if size and mtime match a previous fingerprint,
+    so unchanged multi-GB inputs are not re-read on every run.
+    Args:
+        path: Path to the file.
+        previous: A fingerprint of the same file from an earlier run.
+
+    Returns:
+        A dict with size, mtime and sha256, or None if the file is missing.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+
+    if (
+        previous
+        and previous.get("size") == stat.st_size
+        and previous.get("mtime") == stat.st_mtime
+    ):
+        return dict(previous)
+
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": sha256.hexdigest()}
+
+
+def fingerprint_inputs(
+    input_dir: str, input_files: List[str], previous: Optional[Dict] = None
+) -> Dict[str, Optional[Dict]]:
+    """Fingerprint the raw input files of a transform.
+
+    Args:
+        input_dir: A string pointing to the directory with raw data.
+        input_files: File names, relative to input_dir.
+        previous: Fingerprints from an earlier run, keyed by file name.
+
+    Returns:
+        A dict of file name to fingerprint (None for missing files).
+    """
+    previous = previous or {}
+    return {
+        name: file_fingerprint(os.path.join(input_dir, name), previous.get(name))
+        for name in input_files
+    }
+
+
+def is_up_to_date(previous: Optional[Dict], current: Dict) -> bool:
+    """Check whether a transform's recorded inputs match the current ones.
+
+    The transform, its version and the format it writes must match too, and
+    the outputs recorded for the last run must still exist.
+    Only content hashes are compared, so touching a file doesn't force a
+    rebuild. A transform with no known or with missing inputs is never
+    considered up to date.
+    Args:
+        previous: The manifest entry from the last successful run.
+        current: The manifest entry for the inputs as they are now.
+
+    Returns:
+        bool.
+    """
+    if not previous or not current["inputs"]:
+        return False
+    if (
+        previous.get("transform"),
+        previous.get("version"),
+        previous.get("output_format"),
+    ) != (current["transform"], current["version"], current["output_format"]):
+        return False
+    if None in current["inputs"].values():
+        return False
+    outputs = previous.get("outputs")
+    if not outputs or not all(os.path.exists(path) for path in outputs):
+        return False
+    previous_inputs = previous.get("inputs") or {}
+    return set(previous_inputs) == set(current["inputs"]) and all(
+        previous_inputs[name] and previous_inputs[name]["sha256"] == fp["sha256"]
+        for name, fp in current["inputs"].items()
+    )
+
+
+def load_manifest(manifest_file: str) -> Dict[str, Any]:
+    """Load a transform manifest, or an empty one if there is none yet.
+
+    Args:
+        manifest_file: Path to the manifest JSON.
+
+    Returns:
+        A dict of source name to manifest entry.
+    """
+    if not os.path.exists(manifest_file):
+        return {}
+    with open(manifest_file) as f:
+        return json.load(f)
+
+
+def save_manifest(manifest_file: str, manifest: Dict[str, Any]) -> None:
+    """Write a transform manifest, replacing the old one atomically.
+
+    Args:
+        manifest_file: Path to the manifest JSON.
+        manifest: A dict of source name to manifest entry.
+    """
+    os.makedirs(os.path.dirname(manifest_file) or ".", exist_ok=True)
+    with atomic_write(manifest_file) as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
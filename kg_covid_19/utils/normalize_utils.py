@@ -1,7 +1,159 @@
 """Helper functions for normalizing CURIEs."""
 
 import csv
-from typing import List
+import logging
+import os
+import pickle
+from itertools import dropwhile
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from kg_covid_19.utils.file_utils import atomic_write
+from kg_covid_19.utils.manifest_utils import file_fingerprint
+
+DRUGCENTRAL_MAP = "./maps/drugcentral-maps-kg_covid_19-0.1.sssom.tsv"
+
+CACHE_SUFFIX = ".cache.pickle"
+
+# bump when the cached form of a map changes
+CACHE_VERSION = 1
+
+
+class NormalizationMap:
+    """Subject to object id mappings of an SSSOM map file.
+
+    The map file is parsed once, and kept in a binary cache next to it that is
+    reused until the content hash of the map file changes. Maps are shared by
+    everything in a process that loads them with NormalizationMap.load(), so
+    transforms in a run don't parse the same map again.
+    """
+
+    # maps loaded in this process, by absolute path
+    _loaded: Dict[str, "NormalizationMap"] = {}
+
+    def __init__(self, map_path: str, cache_file: Optional[str] = None):
+        """Initialize, reading the map from its cache if that is current.
+
+        Args:
+            map_path: Path to the SSSOM map file.
+            cache_file: Path to the cache [map_path + .cache.pickle].
+        """
+        self.map_path = map_path
+        self.cache_file = cache_file if cache_file else map_path + CACHE_SUFFIX
+
+        cached = self.read_cache()
+        fingerprint = file_fingerprint(
+            map_path, cached["fingerprint"] if cached else None
+        )
+        if fingerprint is None:
+            raise FileNotFoundError(map_path)
+        if cached and cached["fingerprint"]["sha256"] == fingerprint["sha256"]:
+            self.subjects, self.objects = cached["subjects"], cached["objects"]
+        else:
+            self.subjects, self.objects = self.parse()
+            self.write_cache(fingerprint)
+        self.fingerprint = fingerprint
+
+        # later rows win, as they did when the map was read into a dict
+        self.mapping = dict(zip(self.subjects, self.objects))
+        self._by_prefix: Optional[Dict[str, List[str]]] = None
+
+    @classmethod
+    def load(cls, map_path: str = DRUGCENTRAL_MAP) -> "NormalizationMap":
+        """Get the map of a file, parsing it only if this process hasn't yet.
+
+        Args:
+            map_path: Path to the SSSOM map file [the DrugCentral map].
+
+        Returns:
+            The NormalizationMap.
+        """
+        key = os.path.abspath(map_path)
+        loaded = cls._loaded.get(key)
+        if loaded is None or not loaded.is_current():
+            loaded = cls._loaded[key] = cls(map_path)
+        return loaded
+
+    def is_current(self) -> bool:
+        """Check whether the map file is unchanged since it was read."""
+        fingerprint = file_fingerprint(self.map_path, self.fingerprint)
+        return (
+            fingerprint is not None
+            and fingerprint["sha256"] == self.fingerprint["sha256"]
+        )
+
+    def parse(self) -> Tuple[List[str], List[str]]:
+        """Parse the subject and object ids of the map file, in file order."""
+        logging.info(f"Parsing SSSOM map {self.map_path}")
+        subjects = []
+        objects = []
+        with open(self.map_path) as map_file:
+            # skip the commented metadata block before the header
+            lines = dropwhile(lambda line: line.startswith("#"), map_file)
+            for row in csv.DictReader(lines, delimiter="\t"):
+                subjects.append(row["subject_id"])
+                objects.append(row["object_id"])
+        return subjects, objects
+
+    def read_cache(self) -> Optional[Dict]:
+        """Read the cached map, or None if there is no usable cache."""
+        try:
+            with open(self.cache_file, "rb") as f:
+                cached = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if not isinstance(cached, dict) or cached.get("version") != CACHE_VERSION:
+            return None
+        return cached
+
+    def write_cache(self, fingerprint: Dict) -> None:
+        """Write the parsed map to its cache, next to the map file."""
+        cached = {
+            "version": CACHE_VERSION,
+            "fingerprint": fingerprint,
+            "subjects": self.subjects,
+            "objects": self.objects,
+        }
+        try:
+            with atomic_write(self.cache_file, "wb") as f:
+                pickle.dump(cached, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError as e:
+            logging.warning(f"Could not cache {self.map_path}: {e}")
+
+    def normalize(self, curie: str) -> str:
+        """Get the id a CURIE maps to, or the CURIE itself if it has no mapping."""
+        new_id = self.mapping.get(curie, "")
+        return curie if new_id == "" else new_id
+
+    def normalize_entry(self, entry: Dict) -> Dict:
+        """Replace the id of an entry (a dict) with its mapping, in place."""
+        new_id = self.mapping.get(entry["id"], "")
+        if new_id != "":  # Empty value if there isn't a mapping
+            entry["id"] = new_id
+        return entry
+
+    def normalize_entries(self, entries: List) -> List:
+        """Replace the ids of entries (dicts) with their mappings, in place."""
+        return [self.normalize_entry(entry) for entry in entries]
+
+    def subjects_with_prefix(self, prefix: str) -> List[str]:
+        """Get the subject ids with a prefix, in file order without repeats.
+
+        Args:
+            prefix: The id prefix, without the colon.
+
+        Returns:
+            A list of subject ids.
+        """
+        if self._by_prefix is None:
+            by_prefix: Dict[str, Dict[str, None]] = {}
+            for subject in self.subjects:
+                by_prefix.setdefault(subject.split(":")[0], {})[subject] = None
+            self._by_prefix = {p: list(s) for p, s in by_prefix.items()}
+        return list(self._by_prefix.get(prefix, []))
+
+    def pairs(self) -> Iterator[Tuple[str, str]]:
+        """Iterate over the (subject id, object id) rows, in file order."""
+        return zip(self.subjects, self.objects)
 
 
 def normalize_curies(map_path: str, entries: List) -> List:
@@ -19,31 +171,7 @@ def normalize_curies(map_path: str, entries: List) -> List:
     :param entries: list of entries (dicts) to normalize
                     with ids as prefix:value
     """
-    new_entries = []
-
-    # Load the map
-    with open(map_path) as map_file:
-
-        # Load map, skip header
-        for _ in range(11):
-            next(map_file)
-        norm_map = csv.DictReader(map_file, delimiter="\t")
-
-        # Filter map to ids
-        norm_id_map = {row["subject_id"]: row["object_id"] for row in norm_map}
-
-    # Convert those input ids
-    for entry in entries:
-        new_entry = entry
-        try:  # Input ID may not be in map
-            new_id = norm_id_map[entry["id"]]
-            if new_id != "":  # Empty value if there isn't a mapping
-                new_entry["id"] = new_id
-        except KeyError:
-            pass
-        new_entries.append(new_entry)
-
-    return new_entries
+    return NormalizationMap.load(map_path).normalize_entries(entries)
 
 
 def load_ids_from_map(map_path: str, prefix: str) -> List:
@@ -57,19 +185,4 @@ def load_ids_from_map(map_path: str, prefix: str) -> List:
     :param map_path: path to the mapping file
     :param prefix: desired id prefix, without the colon
     """
-    new_ids = []
-
-    # Load the map
-    with open(map_path) as map_file:
-
-        # Load map, skip header
-        for _ in range(11):
-            next(map_file)
-        norm_map = csv.DictReader(map_file, delimiter="\t")
-
-        # Filter map to ids
-        for row in norm_map:
-            if (row["subject_id"].split(":"))[0] == prefix:
-                new_ids.append(row["subject_id"])
-
-    return new_ids
+    return NormalizationMap.load(map_path).subjects_with_prefix(prefix)
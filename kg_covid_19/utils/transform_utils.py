@@ -1,13 +1,23 @@
 """Utilities for assisting data transformations."""
+
 import gzip
 import logging
 import os
 import re
 import shutil
+import sys
 import zipfile
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, Iterable, Iterator, List, Union
+
+from kg_covid_19.utils.uniprot_utils import UniprotIdMapping
 
-from tqdm import tqdm  # type: ignore
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None  # type: ignore
+
+# bytes of decompressed data scanned at a time by iter_taxon_lines()
+TAXON_SCAN_CHUNK_SIZE = 16 * 1024 * 1024
 
 
 class TransformError(Exception):
@@ -117,7 +127,7 @@ def data_to_dict(these_keys, these_values) -> dict:
     return dict(zip(these_keys, these_values))
 
 
-def uniprot_make_name_to_id_mapping(dat_gz_file: str) -> dict:
+def uniprot_make_name_to_id_mapping(dat_gz_file: str) -> UniprotIdMapping:
     """
     Convert UniProtKB id maps to dict of maps.
 
@@ -125,17 +135,14 @@ def uniprot_make_name_to_id_mapping(dat_gz_file: str) -> dict:
     ftp://ftp.uniprot.org/pub/databases/uniprot/
     current_release/knowledgebase/idmapping/by_organism/
     HUMAN_9606_idmapping.dat.gz
-    makes dict with name to id mapping
+    makes a dict-like name to id mapping. It is backed by an index persisted
+    next to the dat.gz file, so it is only parsed once per version of the file
+    and shared by all transforms that need it.
     :param dat_gz_file:
-    :return: dict with mapping
-    """ ""
-    name_to_id_map = dict()
+    :return: read-only mapping of name to id
+    """
     logging.info("Making uniprot name to id map")
-    with gzip.open(dat_gz_file, mode="rb") as file:
-        for line in tqdm(file):
-            items = line.decode().strip().split("\t")
-            name_to_id_map[items[2]] = items[0]
-    return name_to_id_map
+    return UniprotIdMapping(dat_gz_file)
 
 
 def uniprot_name_to_id(name_to_id_map: dict, name: str) -> Union[str, None]:
@@ -182,6 +189,46 @@ def ungzip_to_tempdir(gzipped_file: str, tempdir: str) -> str:
     return ungzipped_file
 
 
+def iter_taxon_lines(
+    gzipped_file: str,
+    taxa: Iterable[str],
+    chunk_size: int = TAXON_SCAN_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Iterate over the lines of a gzipped NCBI file for some taxa.
+
+    NCBI gene files (gene_info.gz, gene2ensembl.gz, ...) start every line
+    with a tax_id and a tab. The file is scanned as raw bytes in large
+    chunks: a chunk without any line of the taxa is rejected with a single
+    substring search, and only the lines of chunks that have one are split
+    and tested with startswith(). As lines of a taxon are contiguous in these
+    files, almost all of the data is skipped without being split or decoded.
+    Args:
+        gzipped_file: Path to the gzipped file.
+        taxa: NCBI taxon ids, like ["9606"].
+        chunk_size: Bytes of decompressed data to scan at a time.
+    Returns:
+        An iterator of lines, as bytes without the trailing newline.
+    """
+    prefixes = tuple(f"{taxon}\t".encode() for taxon in taxa)
+    needles = [b"\n" + prefix for prefix in prefixes]
+    with gzip.open(gzipped_file, "rb") as f:
+        tail = b""
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            # cut at the last newline, so the block holds whole lines only
+            data = tail + chunk
+            cut = data.rfind(b"\n") + 1
+            block, tail = data[:cut], data[cut:]
+            if not block.startswith(prefixes) and not any(
+                needle in block for needle in needles
+            ):
+                continue
+            for line in block.split(b"\n"):
+                if line.startswith(prefixes):
+                    yield line
+        if tail.startswith(prefixes):
+            yield tail
+
+
 def guess_bl_category(identifier: str) -> str:
     """Guess Biolink category for a given identifier.
 
@@ -216,3 +263,18 @@ def collapse_uniprot_curie(uniprot_curie: str) -> str:
     if re.match(r"^uniprotkb:", uniprot_curie, re.IGNORECASE):
         uniprot_curie = re.sub(r"\-\d+$", "", uniprot_curie)
     return uniprot_curie
+
+
+def peak_rss() -> float:
+    """Get the peak resident set size of this process in MB.
+
+    Returns:
+        Peak RSS in MB, or 0.0 where it can't be measured.
+    """
+    if resource is None:
+        return 0.0
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    if sys.platform == "darwin":
+        return maxrss / (1024 * 1024)
+    return maxrss / 1024
@@ -0,0 +1,163 @@
+"""Persisted lookup index for UniProtKB id mapping files."""
+
+import gzip
+import logging
+import os
+import sqlite3
+from collections.abc import Mapping
+from contextlib import closing
+from typing import Iterator, Optional
+
+from tqdm import tqdm  # type: ignore
+
+from kg_covid_19.utils.file_utils import atomic_path
+from kg_covid_19.utils.manifest_utils import file_fingerprint
+
+INDEX_SUFFIX = ".index.sqlite"
+
+BATCH_SIZE = 100_000
+
+# let SQLite serve lookups from a shared memory map of the index
+MMAP_SIZE = 1 << 32
+
+
+class UniprotIdMapping(Mapping):
+    """Read-only name to UniProtKB id mapping backed by an on-disk index.
+
+    Given a Uniprot dat.gz file, like this:
+    ftp://ftp.uniprot.org/pub/databases/uniprot/
+    current_release/knowledgebase/idmapping/by_organism/
+    HUMAN_9606_idmapping.dat.gz
+    the name (3rd column) to id (1st column) mapping is built once into an
+    SQLite file next to it, and rebuilt only when the content hash of the
+    dat.gz file changes. Opening an existing index takes milliseconds, and
+    since lookups go through a memory map, processes using the same index
+    share its pages.
+    """
+
+    def __init__(self, dat_gz_file: str, index_file: Optional[str] = None):
+        """Initialize, building the index if it is missing or stale.
+
+        Args:
+            dat_gz_file: Path to the UniProt idmapping dat.gz file.
+            index_file: Path to the index [dat_gz_file + .index.sqlite].
+        """
+        self.dat_gz_file = dat_gz_file
+        self.index_file = index_file if index_file else dat_gz_file + INDEX_SUFFIX
+        if not self.is_current():
+            self.build()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Get a read-only connection to the index, one per process."""
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(
+                f"file:{self.index_file}?mode=ro", uri=True, check_same_thread=False
+            )
+            self._connection.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+            self._pid = os.getpid()
+        return self._connection
+
+    def is_current(self) -> bool:
+        """Check whether the index exists and matches the dat.gz file."""
+        if not os.path.exists(self.index_file):
+            return False
+        connection = sqlite3.connect(self.index_file)
+        try:
+            meta = dict(connection.execute("SELECT key, value FROM meta"))
+            previous = {
+                "size": int(meta["size"]),
+                "mtime": float(meta["mtime"]),
+                "sha256": meta["sha256"],
+            }
+            current = file_fingerprint(self.dat_gz_file, previous)
+            if current is None or current["sha256"] != previous["sha256"]:
+                return False
+            if current != previous:
+                # only touched, remember the new mtime to skip hashing next time
+                self._write_meta(connection, current)
+            return True
+        except (sqlite3.DatabaseError, KeyError, ValueError):
+            return False
+        finally:
+            connection.close()
+
+    def build(self) -> None:
+        """Build the index from the dat.gz file."""
+        logging.info(f"Building UniProt id mapping index {self.index_file}")
+        fingerprint = file_fingerprint(self.dat_gz_file)
+        if fingerprint is None:
+            raise FileNotFoundError(self.dat_gz_file)
+
+        with atomic_path(self.index_file) as tmp_file, closing(
+            sqlite3.connect(tmp_file)
+        ) as connection, gzip.open(self.dat_gz_file, mode="rb") as file:
+            connection.execute("PRAGMA journal_mode=OFF")
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+            connection.execute(
+                "CREATE TABLE idmapping (name TEXT PRIMARY KEY, id TEXT) WITHOUT ROWID"
+            )
+            batch = []
+            for line in tqdm(file, desc="Indexing UniProt id mapping"):
+                items = line.decode().strip().split("\t")
+                batch.append((items[2], items[0]))
+                if len(batch) >= BATCH_SIZE:
+                    self._insert(connection, batch)
+                    batch = []
+            self._insert(connection, batch)
+            self._write_meta(connection, fingerprint)
+            connection.commit()
+
+    @staticmethod
+    def _insert(connection: sqlite3.Connection, batch: list) -> None:
+        # later lines win, as they did with the in-memory dict
+        connection.executemany(
+            "INSERT OR REPLACE INTO idmapping (name, id) VALUES (?, ?)", batch
+        )
+
+    @staticmethod
+    def _write_meta(connection: sqlite3.Connection, fingerprint: dict) -> None:
+        connection.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [(k, str(v)) for k, v in fingerprint.items()],
+        )
+        connection.commit()
+
+    def get(self, name, default=None):
+        """Get the UniProtKB id for a name, or default."""
+        row = self.connection.execute(
+            "SELECT id FROM idmapping WHERE name = ?", (name,)
+        ).fetchone()
+        return row[0] if row else default
+
+    def __getitem__(self, name: str) -> str:
+        """Get the UniProtKB id for a name."""
+        value = self.get(name)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def __contains__(self, name) -> bool:
+        """Check whether a name has a UniProtKB id."""
+        return self.get(name) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over all names, in sorted order."""
+        for (name,) in self.connection.execute(
+            "SELECT name FROM idmapping ORDER BY name"
+        ):
+            yield name
+
+    def __len__(self) -> int:
+        """Count the names in the index."""
+        return self.connection.execute("SELECT COUNT(*) FROM idmapping").fetchone()[0]
+
+    def __getstate__(self) -> dict:
+        """Drop the connection when pickling, workers reopen their own."""
+        state = self.__dict__.copy()
+        state["_connection"] = None
+        state["_pid"] = None
+        return state
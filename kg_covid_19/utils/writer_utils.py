@@ -0,0 +1,373 @@
+"""Buffered writers for KGX node and edge TSV files."""
+
+import gzip
+import io
+from itertools import islice
+from typing import (IO, Any, Callable, Iterable, List, Mapping, Optional,
+                    Sequence)
+
+try:
+    import zstandard  # type: ignore
+except ImportError:  # optional, only needed to write .zst files
+    zstandard = None  # type: ignore
+
+try:
+    import pyarrow  # type: ignore
+    import pyarrow.parquet  # type: ignore
+except ImportError:  # optional, only needed to write .parquet files
+    pyarrow = None
+
+# rows held in memory before they are joined and written in one call
+BUFFER_ROWS = 10_000
+
+GZIP_LEVEL = 6
+
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".zst": "zstd"}
+
+PARQUET_SUFFIX = ".parquet"
+
+# columns with few distinct values, stored dictionary-encoded in Parquet
+DICTIONARY_COLUMNS = ["category", "predicate", "provided_by"]
+
+PARQUET_COMPRESSION = "zstd"
+
+
+def open_output(path: str, compression: Optional[str] = "infer") -> IO[str]:
+    """Open a text file for writing, compressing on the fly if asked to.
+
+    Args:
+        path: Path to the output file.
+        compression: None, "gzip", "zstd" or "infer" (from the file suffix).
+
+    Returns:
+        A writable text file handle.
+    """
+    if compression == "infer":
+        compression = next(
+            (c for s, c in COMPRESSION_SUFFIXES.items() if path.endswith(s)), None
+        )
+    if compression is None:
+        return open(path, "w")
+    if compression == "gzip":
+        return gzip.open(path, "wt", compresslevel=GZIP_LEVEL)
+    if compression == "zstd":
+        if zstandard is None:
+            raise ImportError("Writing zstd output requires the zstandard package")
+        return io.TextIOWrapper(
+            zstandard.ZstdCompressor().stream_writer(open(path, "wb")),
+            encoding="utf-8",
+        )
+    raise ValueError(f"Unknown compression {compression}")
+
+
+def dict_to_row(
+    header: Sequence[str], default: str = ""
+) -> Callable[[Mapping[str, str]], List[str]]:
+    """Make a projection of dicts to rows in the column order of a header.
+
+    Args:
+        header: List of header items.
+        default: Value for columns missing from a dict [""].
+
+    Returns:
+        A function of a dict to its row, ignoring keys not in the header.
+    """
+    columns = list(header)
+    defaults = [default] * len(columns)
+
+    def project(item: Mapping[str, str]) -> List[str]:
+        return list(map(item.get, columns, defaults))
+
+    return project
+
+
+class TableWriter:
+    """Write rows of a TSV file with a fixed header, in buffered batches."""
+
+    def __init__(
+        self,
+        path: str,
+        header: Sequence[str],
+        sep: str = "\t",
+        compression: Optional[str] = "infer",
+        buffer_rows: int = BUFFER_ROWS,
+    ):
+        r"""Open the file and write its header.
+
+        Args:
+            path: Path to the output file.
+            header: List of header items, every row must have as many items.
+            sep: Separator [\t].
+            compression: None, "gzip", "zstd" or "infer" (from the file suffix).
+            buffer_rows: Number of rows to buffer between writes.
+        """
+        self.path = path
+        self.header = list(header)
+        self.width = len(self.header)
+        self.sep = sep
+        self.buffer_rows = buffer_rows
+        self.project = dict_to_row(self.header)
+        self._buffer: List = []
+        # how a row is held in the buffer until the next flush
+        self._encode: Callable[[Sequence[str]], Any] = sep.join
+        self._fh = open_output(path, compression)
+        self._fh.write(sep.join(self.header) + "\n")
+
+    def write(self, row: Sequence[str]) -> None:
+        """Write a single row.
+
+        Args:
+            row: Data for the row, one item per header item.
+        """
+        if len(row) != self.width:
+            raise RowLengthError(f"Header and data are not the same length: {row}")
+        self._buffer.append(self._encode(row))
+        if len(self._buffer) >= self.buffer_rows:
+            self.flush()
+
+    def write_batch(self, rows: Iterable[Sequence[str]]) -> None:
+        """Write many rows, validated and joined in one pass.
+
+        Iterators are consumed in chunks of buffer_rows, so streamed rows are
+        never all held in memory.
+        Args:
+            rows: Rows of data, each with one item per header item.
+        """
+        if not isinstance(rows, list):
+            rows = iter(rows)
+            chunk = list(islice(rows, self.buffer_rows))
+            while chunk:
+                self.write_batch(chunk)
+                chunk = list(islice(rows, self.buffer_rows))
+            return
+        if any(width != self.width for width in set(map(len, rows))):
+            bad = next(row for row in rows if len(row) != self.width)
+            raise RowLengthError(f"Header and data are not the same length: {bad}")
+        self._buffer.extend(map(self._encode, rows))
+        if len(self._buffer) >= self.buffer_rows:
+            self.flush()
+
+    def write_dicts(self, items: Iterable[Mapping[str, str]]) -> None:
+        """Write many dicts as rows, with "" for missing columns.
+
+        Args:
+            items: Dicts keyed by header item, other keys are ignored.
+        """
+        self.write_batch(map(self.project, items))
+
+    def flush(self) -> None:
+        """Write out buffered rows."""
+        if self._buffer:
+            self._buffer.append("")
+            self._fh.write("\n".join(self._buffer))
+            self._buffer = []
+
+    def close(self) -> None:
+        """Write out buffered rows and close the file."""
+        if not self._fh.closed:
+            self.flush()
+            self._fh.close()
+
+
+class ParquetTableWriter(TableWriter):
+    """Write rows of a Parquet file with a fixed header, in buffered batches.
+
+    All columns are strings, and those in DICTIONARY_COLUMNS are
+    dictionary-encoded, so readers get their few distinct values once per
+    batch instead of once per row. Each flush writes one row group.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        header: Sequence[str],
+        buffer_rows: int = BUFFER_ROWS,
+        compression: Optional[str] = PARQUET_COMPRESSION,
+    ):
+        """Open the file.
+
+        Args:
+            path: Path to the output file.
+            header: List of header items, every row must have as many items.
+            buffer_rows: Number of rows per row group.
+            compression: Parquet compression codec, or None [zstd].
+        """
+        if pyarrow is None:
+            raise ImportError("Writing Parquet output requires the pyarrow package")
+        self.path = path
+        self.header = list(header)
+        self.width = len(self.header)
+        self.buffer_rows = buffer_rows
+        self.project = dict_to_row(self.header)
+        self._buffer = []
+        self._encode = tuple
+        self.schema = parquet_schema(self.header)
+        self._writer = pyarrow.parquet.ParquetWriter(
+            path, self.schema, compression=compression
+        )
+        self._closed = False
+
+    def flush(self) -> None:
+        """Write out buffered rows as a row group."""
+        if self._buffer:
+            columns = [
+                pyarrow.array(values, pyarrow.string()) for values in zip(*self._buffer)
+            ]
+            self._writer.write_table(
+                pyarrow.Table.from_arrays(
+                    [
+                        (
+                            column.dictionary_encode()
+                            if pyarrow.types.is_dictionary(field.type)
+                            else column
+                        )
+                        for column, field in zip(columns, self.schema)
+                    ],
+                    schema=self.schema,
+                )
+            )
+            self._buffer = []
+
+    def close(self) -> None:
+        """Write out buffered rows and close the file."""
+        if not self._closed:
+            self.flush()
+            self._writer.close()
+            self._closed = True
+
+
+def parquet_schema(header: Sequence[str]) -> "pyarrow.Schema":
+    """Make the Parquet schema of a KGX table with a header.
+
+    Args:
+        header: List of header items.
+
+    Returns:
+        A schema of string columns, dictionary-encoded for DICTIONARY_COLUMNS.
+    """
+    return pyarrow.schema(
+        [
+            pyarrow.field(
+                column,
+                (
+                    pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+                    if column in DICTIONARY_COLUMNS
+                    else pyarrow.string()
+                ),
+            )
+            for column in header
+        ]
+    )
+
+
+def open_table_writer(
+    path: str,
+    header: Sequence[str],
+    sep: str = "\t",
+    compression: Optional[str] = "infer",
+    buffer_rows: int = BUFFER_ROWS,
+) -> TableWriter:
+    r"""Open a TableWriter, or a ParquetTableWriter for .parquet paths.
+
+    Args:
+        path: Path to the output file.
+        header: List of header items, every row must have as many items.
+        sep: Separator of text output [\t].
+        compression: Compression of text output, as in open_output().
+        buffer_rows: Number of rows to buffer between writes.
+
+    Returns:
+        The writer.
+    """
+    if path.endswith(PARQUET_SUFFIX):
+        return ParquetTableWriter(path, header, buffer_rows)
+    return TableWriter(path, header, sep, compression, buffer_rows)
+
+
+class NodeEdgeWriter:
+    """Write a node file and an edge file, replacing per-row write_node_edge_item().
+
+    Files with a .parquet suffix are written as Parquet, see ParquetTableWriter.
+
+    Use as a context manager, so buffered rows are written out on exit:
+
+        with NodeEdgeWriter(node_file, edge_file, node_header, edge_header) as w:
+            w.write_node([...])
+            w.write_edges(rows)
+    """
+
+    def __init__(
+        self,
+        node_file: str,
+        edge_file: str,
+        node_header: Sequence[str],
+        edge_header: Sequence[str],
+        sep: str = "\t",
+        compression: Optional[str] = "infer",
+        buffer_rows: int = BUFFER_ROWS,
+    ):
+        r"""Open both files and write their headers.
+
+        Args:
+            node_file: Path to the node file.
+            edge_file: Path to the edge file.
+            node_header: List of node header items.
+            edge_header: List of edge header items.
+            sep: Separator [\t].
+            compression: None, "gzip", "zstd" or "infer" (from the file suffix).
+            buffer_rows: Number of rows to buffer between writes.
+        """
+        self.nodes = open_table_writer(
+            node_file, node_header, sep, compression, buffer_rows
+        )
+        self.edges = open_table_writer(
+            edge_file, edge_header, sep, compression, buffer_rows
+        )
+
+    def write_node(self, row: Sequence[str]) -> None:
+        """Write a single node."""
+        self.nodes.write(row)
+
+    def write_edge(self, row: Sequence[str]) -> None:
+        """Write a single edge."""
+        self.edges.write(row)
+
+    def write_nodes(self, rows: Iterable[Sequence[str]]) -> None:
+        """Write a batch of nodes."""
+        self.nodes.write_batch(rows)
+
+    def write_edges(self, rows: Iterable[Sequence[str]]) -> None:
+        """Write a batch of edges."""
+        self.edges.write_batch(rows)
+
+    def write_node_dicts(self, items: Iterable[Mapping[str, str]]) -> None:
+        """Write a batch of nodes given as dicts keyed by header item."""
+        self.nodes.write_dicts(items)
+
+    def write_edge_dicts(self, items: Iterable[Mapping[str, str]]) -> None:
+        """Write a batch of edges given as dicts keyed by header item."""
+        self.edges.write_dicts(items)
+
+    def flush(self) -> None:
+        """Write out buffered nodes and edges."""
+        self.nodes.flush()
+        self.edges.flush()
+
+    def close(self) -> None:
+        """Write out buffered nodes and edges and close both files."""
+        self.nodes.close()
+        self.edges.close()
+
+    def __enter__(self) -> "NodeEdgeWriter":
+        """Enter the context."""
+        return self
+
+    def __exit__(self, *exc) -> None:
+        """Close both files."""
+        self.close()
+
+
+class RowLengthError(Exception):
+    """Error for when a row doesn't match the header."""
+
+    pass
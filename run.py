@@ -5,9 +5,10 @@ import click
 from kg_covid_19 import download as kg_download
 from kg_covid_19 import transform as kg_transform
 from kg_covid_19.make_holdouts import make_holdouts
-from kg_covid_19.merge_utils.merge_kg import load_and_merge
+from kg_covid_19.merge_utils.merge_kg import MERGE_ENGINES, load_and_merge
 from kg_covid_19.query import parse_query_rq, result_dict_to_tsv, run_query
-from kg_covid_19.transform import DATA_SOURCES
+from kg_covid_19.transform import DATA_SOURCES, format_transform_stats
+from kg_covid_19.transform_utils.transform import OUTPUT_FORMATS
 
 
 @click.group()
@@ -56,6 +57,38 @@ def download(*args, **kwargs) -> None:
 @click.option(
     "sources", "-s", default=None, multiple=True, type=click.Choice(DATA_SOURCES.keys())
 )
+@click.option(
+    "jobs",
+    "-j",
+    "--jobs",
+    default=1,
+    type=int,
+    help="number of sources to transform in parallel processes [1]",
+)
+@click.option(
+    "incremental",
+    "-n",
+    "--incremental",
+    is_flag=True,
+    default=False,
+    help="skip sources whose raw inputs are unchanged since the last run [false]",
+)
+@click.option(
+    "output_format",
+    "-f",
+    "--output-format",
+    default="tsv",
+    type=click.Choice(list(OUTPUT_FORMATS)),
+    help="format of the node and edge files, parquet needs pyarrow [tsv]",
+)
+@click.option(
+    "processes",
+    "-p",
+    "--processes",
+    default=1,
+    type=int,
+    help="number of processes each source parses in, if it can [1]",
+)
 def transform(*args, **kwargs) -> None:
     """Calls scripts in kg_covid_19/transform/[source name]/ to transform each source
     into nodes and edges.
@@ -64,6 +97,10 @@ def transform(*args, **kwargs) -> None:
         input_dir: A string pointing to the directory to import data from.
         output_dir: A string pointing to the directory to output data to.
         sources: A list of sources to transform.
+        jobs: Number of sources to transform in parallel processes.
+        incremental: Skip sources whose raw inputs are unchanged since the last run.
+        output_format: Format of the node and edge files, tsv or parquet.
+        processes: Number of processes each source parses in, if it can.
 
     Returns:
         None.
@@ -71,7 +108,8 @@ def transform(*args, **kwargs) -> None:
     """
 
     # call transform script for each source
-    kg_transform(*args, **kwargs)
+    stats = kg_transform(*args, **kwargs)
+    click.echo(format_transform_stats(stats))
 
     return None
 
@@ -79,19 +117,30 @@ def transform(*args, **kwargs) -> None:
 @cli.command()
 @click.option("yaml", "-y", default="merge.yaml", type=click.Path(exists=True))
 @click.option("processes", "-p", default=1, type=int)
-def merge(yaml: str, processes: int) -> None:
+@click.option(
+    "engine",
+    "-e",
+    "--engine",
+    default="kgx",
+    type=click.Choice(MERGE_ENGINES),
+    help="kgx merges in memory, stream merges sorted TSV runs on disk, "
+    "interned merges in memory as integer codes [kgx]",
+)
+def merge(yaml: str, processes: int, engine: str) -> None:
     """Use KGX to load subgraphs to create a merged graph.
 
     Args:
         yaml: A string pointing to a KGX compatible config YAML.
-        processes: Number of processes to use.
+        processes: Number of processes to use, for the stream engine the
+            number of sources read and sorted in parallel.
+        engine: Merge engine, kgx, stream or interned.
 
     Returns:
         None.
 
     """
 
-    load_and_merge(yaml, processes)
+    load_and_merge(yaml, processes, engine)
 
 
 @cli.command()
@@ -1,9 +1,27 @@
 """Tests for the CHEMBL data parsing."""
 
 import ast
-from unittest import TestCase
+import copy
+import json
+import os
+import time
+from unittest import TestCase, mock, skipUnless
 
-from kg_covid_19.transform_utils.chembl import ChemblTransform
+from parameterized import parameterized
+
+from kg_covid_19.transform_utils.chembl import (ChemblTransform,
+                                                chembl_transform)
+
+# record kind, data file key, and names of its properties and remap
+FLATTENING_CASES = [
+    ("molecule", "molecules_data", "MOLECULE_PROPERTIES", "MOLECULE_REMAP"),
+    ("assay", "assay_data", "ASSAY_PROPERTIES", None),
+    ("document", "document_data", "DOCUMENT_PROPERTIES", None),
+    ("activity", "activity_data", "ACTIVITY_PROPERTIES", "ACTIVITY_REMAP"),
+]
+
+# times each record is parsed in the benchmark
+BENCHMARK_REPEATS = 200
 
 
 class TestChembl(TestCase):
@@ -63,3 +81,64 @@ class TestChembl(TestCase):
         ca = self.chembl.parse_chembl_activity(self.chembl_activities)
         self.assertEqual(len(ca), 5)
         self.assertEqual(self.expected_ca_keys, list(ca[0].keys()))
+
+    @parameterized.expand([("ijson", chembl_transform.ijson), ("json", None)])
+    def test_iter_json(self, name, ijson):
+        """Test that records are streamed the same with and without ijson."""
+        json_file = self.chembl_data_files["activity_data"]
+        with open(json_file) as f:
+            expected = json.load(f)
+        with mock.patch.object(chembl_transform, "ijson", ijson):
+            if ijson is None:
+                with self.assertLogs(level="WARNING"):
+                    records = list(self.chembl.iter_json(json_file))
+            else:
+                records = list(self.chembl.iter_json(json_file))
+        self.assertEqual(expected, records)
+
+    @parameterized.expand(FLATTENING_CASES)
+    def test_flattening_plan(self, kind, data, properties, remap):
+        """Test that a flattening plan parses records like parse_doc_fields()."""
+        properties = getattr(chembl_transform, properties)
+        remap = getattr(chembl_transform, remap) if remap else None
+        records = [
+            r["_source"] for r in self.chembl.iter_json(self.chembl_data_files[data])
+        ]
+        plan = self.chembl.plans[kind]
+        for record in records:
+            expected = self.chembl.parse_doc_fields(
+                copy.deepcopy(record), properties, remap
+            )
+            parsed = plan(record)
+            self.assertEqual(expected, parsed)
+            self.assertEqual(list(expected), list(parsed))
+
+    @parameterized.expand(FLATTENING_CASES)
+    @skipUnless(os.environ.get("BENCHMARK"), "set BENCHMARK=1 to run benchmarks")
+    def test_benchmark_flattening_plan(self, kind, data, properties, remap):
+        """Benchmark a flattening plan against parse_doc_fields()."""
+        properties = getattr(chembl_transform, properties)
+        remap = getattr(chembl_transform, remap) if remap else None
+        records = [
+            r["_source"] for r in self.chembl.iter_json(self.chembl_data_files[data])
+        ] * BENCHMARK_REPEATS
+        # parse_doc_fields() changes the records it parses
+        copies = copy.deepcopy(records)
+
+        start = time.perf_counter()
+        expected = [
+            self.chembl.parse_doc_fields(record, properties, remap) for record in copies
+        ]
+        recursive_rate = len(records) / (time.perf_counter() - start)
+
+        plan = self.chembl.plans[kind]
+        start = time.perf_counter()
+        parsed = [plan(record) for record in records]
+        plan_rate = len(records) / (time.perf_counter() - start)
+
+        self.assertEqual(expected, parsed)
+        print(
+            f"\n{kind}: parse_doc_fields {recursive_rate:,.0f} records/s, "
+            f"FlatteningPlan {plan_rate:,.0f} records/s "
+            f"({plan_rate / recursive_rate:.2f}x)"
+        )
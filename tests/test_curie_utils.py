@@ -0,0 +1,39 @@
+"""Test contracting IRIs to CURIEs."""
+
+import unittest
+
+from parameterized import parameterized
+from prefixcommons import contract_uri  # type: ignore
+
+from kg_covid_19.transform_utils.scibite_cord.scibite_cord import CUSTOM_CMAP
+from kg_covid_19.utils.curie_utils import PrefixTrie
+
+
+class TestPrefixTrie(unittest.TestCase):
+    """Tests for PrefixTrie."""
+
+    @parameterized.expand(
+        [
+            ("http://purl.obolibrary.org/obo/GO_0005634",),
+            ("http://purl.obolibrary.org/obo/CHEBI_15377",),
+            ("http://identifiers.org/ncbigene/1017",),
+            ("http://www.ncbi.nlm.nih.gov/gene/1017",),
+            ("http://purl.obolibrary.org/obo/",),
+            ("https://example.org/no/prefix",),
+            ("",),
+        ]
+    )
+    def test_contract_default_maps(self, iri):
+        """Test that the trie gives the same CURIEs as prefixcommons."""
+        self.assertEqual(sorted(contract_uri(iri)), PrefixTrie().contract(iri))
+
+    @parameterized.expand(
+        [
+            ("https://www.uniprot.org/uniprot/P0DTC2", ["UniProtKB:P0DTC2"]),
+            ("http://purl.obolibrary.org/obo/GO_0005634", []),
+        ]
+    )
+    def test_contract_custom_map(self, iri, expected):
+        """Test contracting with a custom prefix map."""
+        self.assertEqual(expected, PrefixTrie([CUSTOM_CMAP]).contract(iri))
+        self.assertEqual(sorted(contract_uri(iri, cmaps=[CUSTOM_CMAP])), expected)
@@ -0,0 +1,62 @@
+"""Test writing files atomically."""
+
+import gzip
+import os
+import tempfile
+import unittest
+
+from kg_covid_19.utils.file_utils import atomic_path, atomic_write
+
+
+class TestAtomicWrite(unittest.TestCase):
+    """Tests for atomic_write and atomic_path."""
+
+    def setUp(self) -> None:
+        """Write an existing file to a temp directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "out.txt")
+        with open(self.path, "w") as f:
+            f.write("old\n")
+
+    def tearDown(self) -> None:
+        """Remove the temp directory."""
+        self.tmpdir.cleanup()
+
+    def test_replaces_file(self):
+        """Test that the file is replaced once the temp file is closed."""
+        with atomic_write(self.path) as f:
+            f.write("new\n")
+            with open(self.path) as old:
+                self.assertEqual("old\n", old.read())
+        with open(self.path) as f:
+            self.assertEqual("new\n", f.read())
+        self.assertEqual(["out.txt"], os.listdir(self.tmpdir.name))
+
+    def test_error_keeps_file(self):
+        """Test that a failed write leaves the file and no temp file behind."""
+        with self.assertRaises(ValueError):
+            with atomic_write(self.path) as f:
+                f.write("partial")
+                raise ValueError("failed")
+        with open(self.path) as f:
+            self.assertEqual("old\n", f.read())
+        self.assertEqual(["out.txt"], os.listdir(self.tmpdir.name))
+
+    def test_opener(self):
+        """Test writing through another opener, with its arguments."""
+        path = self.path + ".gz"
+        with atomic_write(path, "wt", gzip.open, compresslevel=1) as f:
+            f.write("new\n")
+        with gzip.open(path, "rt") as f:
+            self.assertEqual("new\n", f.read())
+
+    def test_stale_temp_file(self):
+        """Test that a temp file left by a crashed writer is not reused."""
+        with open(f"{self.path}.{os.getpid()}.tmp", "w") as f:
+            f.write("stale")
+        with atomic_path(self.path) as tmp_path:
+            self.assertFalse(os.path.exists(tmp_path))
+            with open(tmp_path, "w") as f:
+                f.write("new\n")
+        with open(self.path) as f:
+            self.assertEqual("new\n", f.read())
@@ -0,0 +1,77 @@
+"""Test the persisted NCBI gene_info index."""
+
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from parameterized import parameterized
+
+from kg_covid_19.utils.gene_info_utils import GeneInfo, GeneInfoIndex, hgnc_id
+
+
+class TestGeneInfoIndex(unittest.TestCase):
+    """Tests for the gene_info index."""
+
+    def setUp(self) -> None:
+        """Copy the gene_info file to a temp directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.gene_info_file = os.path.join(self.tmpdir.name, "gene_info.gz")
+        shutil.copy("tests/resources/string/gene_info.gz", self.gene_info_file)
+        self.index_file = self.gene_info_file + ".9606.index.sqlite"
+
+    def tearDown(self) -> None:
+        """Remove the temp directory."""
+        self.tmpdir.cleanup()
+
+    def test_matches_file(self):
+        """Test that the index holds the human genes of the file, in order."""
+        with gzip.open(self.gene_info_file, "rt") as f:
+            expected = [
+                GeneInfo(r[1], r[2], r[8], hgnc_id(r[5]))
+                for r in (line.split("\t") for line in f)
+                if r[0] == "9606"
+            ]
+        genes = GeneInfoIndex(self.gene_info_file)
+        self.assertEqual(expected, list(genes))
+        self.assertEqual(len(expected), len(genes))
+
+    @parameterized.expand(
+        [
+            ("by_ncbi", "1", "A1BG"),
+            ("by_symbol", "NAT2", "NAT2"),
+            ("by_hgnc", "HGNC:15", "NATP"),
+            ("by_symbol", "NOT_A_GENE", None),
+        ]
+    )
+    def test_lookups(self, method, key, symbol):
+        """Test looking genes up by NCBI Gene id, symbol and HGNC id."""
+        gene = getattr(GeneInfoIndex(self.gene_info_file), method)(key)
+        self.assertEqual(symbol, gene.symbol if gene else None)
+
+    def test_index_is_lazy_and_reused(self):
+        """Test that the index is built on first use, and rebuilt on change."""
+        genes = GeneInfoIndex(self.gene_info_file)
+        self.assertFalse(os.path.exists(self.index_file))
+        genes.by_ncbi("1")
+        built = os.stat(self.index_file).st_ino
+        os.utime(self.gene_info_file, (0, 0))
+        GeneInfoIndex(self.gene_info_file).by_ncbi("1")
+        self.assertEqual(built, os.stat(self.index_file).st_ino)
+
+        with gzip.open(self.gene_info_file, mode="ab") as file:
+            file.write(b"9606\t99\tNEWGENE\t-\t-\t-\t-\t-\tnew gene\t-\n")
+        self.assertEqual(
+            "new gene", GeneInfoIndex(self.gene_info_file).by_ncbi("99").description
+        )
+
+    @parameterized.expand(
+        [
+            ("MIM:138670|HGNC:HGNC:5|Ensembl:ENSG00000121410", "HGNC:5"),
+            ("Ensembl:ENSG00000121410", None),
+        ]
+    )
+    def test_hgnc_id(self, db_xrefs, expected):
+        """Test getting the HGNC id from dbXrefs."""
+        self.assertEqual(expected, hgnc_id(db_xrefs))
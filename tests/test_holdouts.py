@@ -9,8 +9,8 @@ from numpy import NaN
 from pandas import np
 from parameterized import parameterized
 
-from kg_covid_19.make_holdouts import (df_to_tsv, make_holdouts,
-                                       make_negative_edges,
+from kg_covid_19.make_holdouts import (_generate_negative_edges, df_to_tsv,
+                                       make_holdouts, make_negative_edges,
                                        make_positive_edges, tsv_to_df)
 
 
@@ -311,6 +311,16 @@ class TestEdges(unittest.TestCase):
             ne = make_negative_edges(nodes_df=self.nodes, edges_df=self.edges)
             self.assertEqual(self.edges.shape[0], ne.shape[0])
 
+    def test_generate_negative_edges_seed(self):
+        """Test that a seed gives the negative edges it always gave."""
+        ne = _generate_negative_edges(
+            self.nodes, self.edges, "negative_edge", "negative_edge", rseed="42"
+        )
+        self.assertEqual(
+            [["p1", "g12"], ["g95", "d14"], ["g55", "g39"]],
+            ne[["subject", "object"]].head(3).values.tolist(),
+        )
+
     def test_make_negative_edges_check_column_names(self):
         """Test to check column names of negative edges."""
         expected_columns = ["subject", "predicate", "object", "relation"]
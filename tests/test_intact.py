@@ -1,7 +1,9 @@
 """Tests for parsing IntAct data."""
 
+import os
+import tempfile
 import unittest
-from xml.dom import minidom
+from zipfile import ZipFile
 
 from parameterized import parameterized
 
@@ -15,6 +17,37 @@ class TestIntAct(unittest.TestCase):
         """Set up for IntAct tests."""
         self.intact = IntAct()
 
+    def make_zip(self, tmpdir: str) -> str:
+        """Zip the test XML files, like intact_coronavirus.zip."""
+        zip_file = os.path.join(tmpdir, "intact_coronavirus.zip")
+        with ZipFile(zip_file, "w") as z:
+            z.writestr("intact/README.txt", "not xml")
+            for xml_file in [
+                "tests/resources/intact_test.xml",
+                "tests/resources/intact_3_participants.xml",
+                "tests/resources/31315999_weird_chebi_id.xml",
+            ]:
+                z.write(xml_file, "intact/" + os.path.basename(xml_file))
+        return zip_file
+
+    @parameterized.expand([(1,), (2,)])
+    def test_run(self, processes):
+        """Test that running from a zip file writes the parsed rows in file order."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            zip_file = self.make_zip(tmpdir)
+            intact = IntAct(output_dir=tmpdir)
+            expected = {"nodes": [], "edges": []}
+            with ZipFile(zip_file) as z:
+                for name in intact.xml_members(z):
+                    with z.open(name) as xml_file:
+                        parsed = intact.parse_xml_to_nodes_edges(xml_file)
+                    for kind in expected:
+                        expected[kind].extend("\t".join(row) for row in parsed[kind])
+            intact.run(data_file=zip_file, processes=processes)
+            for kind in expected:
+                with open(os.path.join(intact.output_dir, f"{kind}.tsv")) as f:
+                    self.assertEqual(expected[kind], f.read().splitlines()[1:])
+
     def test_intact_instance(self):
         """Test structure of IntAct input."""
         self.assertEqual(
@@ -157,8 +190,7 @@ class TestIntAct(unittest.TestCase):
     )
     def test_parse_experiment_info(self, xml_file, exp_id, correct_data):
         """Test parsing experiment info from XML."""
-        xmldoc = minidom.parse(xml_file)
-        parsed = self.intact.parse_experiment_info(xmldoc)
+        parsed = self.intact.parse_experiment_info(xml_file)
         self.assertTrue(isinstance(parsed, dict))
         self.assertTrue(exp_id in parsed)
         for key, _ in correct_data.items():
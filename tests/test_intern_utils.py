@@ -0,0 +1,71 @@
+"""Test interning strings as integer codes."""
+
+import unittest
+
+import numpy as np
+from parameterized import parameterized
+
+from kg_covid_19.utils.intern_utils import EMPTY, InternedTable, Interner
+
+
+class TestInterner(unittest.TestCase):
+    """Tests for Interner."""
+
+    def test_codes_in_order_of_first_use(self):
+        """Test that strings get consecutive codes, and decode back."""
+        ids = Interner([""])
+        codes = ids.encode(["HGNC:5", "HGNC:7", "HGNC:5", ""])
+        self.assertEqual([1, 2, 1, EMPTY], codes.tolist())
+        self.assertEqual(np.int32, codes.dtype)
+        self.assertEqual(["HGNC:7", "HGNC:5"], ids.decode(np.array([2, 1])))
+        self.assertEqual(3, len(ids))
+
+
+class TestInternedTable(unittest.TestCase):
+    """Tests for InternedTable."""
+
+    def setUp(self) -> None:
+        """Make an edge table sharing node ids between subject and object."""
+        self.node_ids = Interner([""])
+        self.table = InternedTable({"subject": self.node_ids, "object": self.node_ids})
+        self.table.append(
+            [
+                {"subject": "A", "predicate": "p", "object": "B", "provided_by": "x"},
+                {"subject": "B", "predicate": "p", "object": "A"},
+            ]
+        )
+        self.table.append(
+            [
+                {"subject": "A", "predicate": "p", "object": "B", "id": "e3"},
+                {"subject": "A", "predicate": "q", "object": "B", "provided_by": "y"},
+                {"subject": "A", "predicate": "p", "object": "B", "provided_by": "y|x"},
+            ]
+        )
+
+    def test_append(self):
+        """Test that columns missing from rows or batches are empty."""
+        self.assertEqual(5, len(self.table))
+        self.assertEqual(
+            ["subject", "predicate", "object", "provided_by", "id"],
+            self.table.column_names,
+        )
+        self.assertEqual([0, 0, 1, 0, 0], self.table.column("id").tolist())
+        self.assertEqual(
+            self.table.column("subject")[1], self.table.column("object")[0]
+        )
+
+    @parameterized.expand([(["provided_by"], "x"), ([], "x|y")])
+    def test_merge_duplicates(self, core, provided_by):
+        """Test merging rows with equal keys, in order of the key codes."""
+        merged = self.table.merge_duplicates(
+            ["subject", "predicate", "object"], ["subject", "object"] + core
+        )
+        self.assertIs(self.node_ids, merged.interners["subject"])
+        self.assertEqual(
+            [
+                ("A", "p", "B", provided_by, "e3"),
+                ("A", "q", "B", "y", ""),
+                ("B", "p", "A", "", ""),
+            ],
+            list(merged.rows(["subject", "predicate", "object", "provided_by", "id"])),
+        )
@@ -0,0 +1,92 @@
+"""Test the transform manifest utilities."""
+
+import os
+import tempfile
+import unittest
+
+from kg_covid_19.utils.manifest_utils import (fingerprint_inputs,
+                                              is_up_to_date, load_manifest,
+                                              save_manifest)
+
+
+class TestManifestUtils(unittest.TestCase):
+    """Tests for fingerprinting raw inputs of transforms."""
+
+    def setUp(self) -> None:
+        """Set up a directory with a raw input file."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.input_dir = self.tmpdir.name
+        with open(os.path.join(self.input_dir, "raw.tsv"), "w") as f:
+            f.write("a\tb\n")
+        self.output_file = os.path.join(self.input_dir, "nodes.tsv")
+        with open(self.output_file, "w") as f:
+            f.write("id\n")
+
+    def tearDown(self) -> None:
+        """Remove the temp directory."""
+        self.tmpdir.cleanup()
+
+    def entry(self, previous=None, version="1", output_format="tsv"):
+        """Make a manifest entry for the raw input and the output file."""
+        return {
+            "transform": "SomeTransform",
+            "version": version,
+            "output_format": output_format,
+            "outputs": [self.output_file],
+            "inputs": fingerprint_inputs(
+                self.input_dir,
+                ["raw.tsv"],
+                previous["inputs"] if previous else None,
+            ),
+        }
+
+    def test_unchanged_input_is_up_to_date(self):
+        """Test that an untouched input is up to date."""
+        previous = self.entry()
+        self.assertTrue(is_up_to_date(previous, self.entry(previous)))
+
+    def test_touched_input_is_up_to_date(self):
+        """Test that only content changes make an input stale."""
+        previous = self.entry()
+        os.utime(os.path.join(self.input_dir, "raw.tsv"), (0, 0))
+        self.assertTrue(is_up_to_date(previous, self.entry(previous)))
+
+    def test_changed_input_is_stale(self):
+        """Test that changed content makes an input stale."""
+        previous = self.entry()
+        with open(os.path.join(self.input_dir, "raw.tsv"), "a") as f:
+            f.write("c\td\n")
+        os.utime(os.path.join(self.input_dir, "raw.tsv"), (0, 0))
+        self.assertFalse(is_up_to_date(previous, self.entry(previous)))
+
+    def test_version_bump_is_stale(self):
+        """Test that a new transform version makes a source stale."""
+        previous = self.entry()
+        self.assertFalse(is_up_to_date(previous, self.entry(previous, version="2")))
+
+    def test_output_format_change_is_stale(self):
+        """Test that writing another format makes a source stale."""
+        previous = self.entry()
+        self.assertFalse(
+            is_up_to_date(previous, self.entry(previous, output_format="parquet"))
+        )
+
+    def test_missing_output_is_stale(self):
+        """Test that a source whose output was deleted is stale."""
+        previous = self.entry()
+        os.remove(self.output_file)
+        self.assertFalse(is_up_to_date(previous, self.entry(previous)))
+
+    def test_missing_input_is_stale(self):
+        """Test that a missing input is never up to date."""
+        previous = self.entry()
+        os.remove(os.path.join(self.input_dir, "raw.tsv"))
+        self.assertFalse(is_up_to_date(previous, self.entry(previous)))
+
+    def test_save_and_load_manifest(self):
+        """Test a round trip of the manifest file."""
+        manifest_file = os.path.join(self.input_dir, "out", "manifest.json")
+        self.assertEqual({}, load_manifest(manifest_file))
+        manifest = {"SomeTransform": self.entry()}
+        save_manifest(manifest_file, manifest)
+        self.assertEqual(manifest, load_manifest(manifest_file))
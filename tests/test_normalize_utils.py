@@ -0,0 +1,89 @@
+"""Test normalizing CURIEs with an SSSOM map."""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from parameterized import parameterized
+
+from kg_covid_19.utils import (NormalizationMap, load_ids_from_map,
+                               normalize_curies)
+
+SSSOM_MAP = """# curie_map:
+#   CHEBI: http://purl.obolibrary.org/obo/CHEBI_
+#   DRUGBANK: http://identifiers.org/drugbank/
+# license: https://creativecommons.org/publicdomain/zero/1.0/
+subject_id\tpredicate_id\tobject_id
+CHEBI:1\tskos:exactMatch\tDrugCentral:10
+DRUGBANK:DB01\tskos:exactMatch\tDrugCentral:10
+CHEBI:2\tskos:exactMatch\t
+CHEBI:1\tskos:exactMatch\tDrugCentral:11
+DRUGBANK:DB02\tskos:exactMatch\tDrugCentral:20
+"""
+
+
+class TestNormalizationMap(unittest.TestCase):
+    """Tests for NormalizationMap."""
+
+    def setUp(self) -> None:
+        """Write a map file to a temp directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.map_path = os.path.join(self.tmpdir.name, "map.sssom.tsv")
+        with open(self.map_path, "w") as f:
+            f.write(SSSOM_MAP)
+
+    def tearDown(self) -> None:
+        """Remove the temp directory."""
+        self.tmpdir.cleanup()
+
+    @parameterized.expand(
+        [
+            ("CHEBI:1", "DrugCentral:11"),
+            ("DRUGBANK:DB01", "DrugCentral:10"),
+            ("CHEBI:2", "CHEBI:2"),
+            ("CHEBI:3", "CHEBI:3"),
+        ]
+    )
+    def test_normalize(self, curie, expected):
+        """Test lookups, with later rows winning and empty mappings ignored."""
+        norm_map = NormalizationMap(self.map_path)
+        self.assertEqual(expected, norm_map.normalize(curie))
+        entries = normalize_curies(self.map_path, [{"id": curie, "name": "x"}])
+        self.assertEqual([{"id": expected, "name": "x"}], entries)
+
+    @parameterized.expand(
+        [
+            ("CHEBI", ["CHEBI:1", "CHEBI:2"]),
+            ("DRUGBANK", ["DRUGBANK:DB01", "DRUGBANK:DB02"]),
+            ("MESH", []),
+        ]
+    )
+    def test_subjects_with_prefix(self, prefix, expected):
+        """Test getting subject ids by prefix."""
+        self.assertEqual(expected, load_ids_from_map(self.map_path, prefix))
+
+    def test_cache(self):
+        """Test that the cache is reused, and ignored once the map changes."""
+        NormalizationMap(self.map_path)
+        self.assertTrue(os.path.exists(self.map_path + ".cache.pickle"))
+        with mock.patch.object(NormalizationMap, "parse") as parse:
+            norm_map = NormalizationMap(self.map_path)
+            parse.assert_not_called()
+        self.assertEqual("DrugCentral:20", norm_map.normalize("DRUGBANK:DB02"))
+
+        with open(self.map_path, "a") as f:
+            f.write("DRUGBANK:DB02\tskos:exactMatch\tDrugCentral:21\n")
+        self.assertEqual(
+            "DrugCentral:21", NormalizationMap(self.map_path).normalize("DRUGBANK:DB02")
+        )
+
+    def test_load_shared(self):
+        """Test that load() shares one map per file until the file changes."""
+        norm_map = NormalizationMap.load(self.map_path)
+        self.assertIs(norm_map, NormalizationMap.load(self.map_path))
+        with open(self.map_path, "a") as f:
+            f.write("CHEBI:4\tskos:exactMatch\tDrugCentral:40\n")
+        reloaded = NormalizationMap.load(self.map_path)
+        self.assertIsNot(norm_map, reloaded)
+        self.assertEqual("DrugCentral:40", reloaded.normalize("CHEBI:4"))
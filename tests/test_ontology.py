@@ -0,0 +1,210 @@
+"""Test the ontology transform."""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from parameterized import parameterized
+
+from kg_covid_19.transform import DATA_SOURCES, transform
+from kg_covid_19.transform_utils.ontology.ontology_transform import (
+    ONTOLOGIES, OntologyTransform)
+from kg_covid_19.utils import NormalizationMap
+
+NODE_HEADER = [
+    "id",
+    "category",
+    "name",
+    "description",
+    "xref",
+    "provided_by",
+    "synonym",
+    "iri",
+    "same_as",
+    "subsets",
+    "deprecated",
+    "has_attribute",
+    "in_taxon",
+    "knowledge_source",
+    "type",
+]
+EDGE_HEADER = ["id", "subject", "predicate", "object", "relation", "provided_by"]
+
+SSSOM_MAP = """# license: https://creativecommons.org/publicdomain/zero/1.0/
+subject_id\tpredicate_id\tobject_id
+CHEBI:1\tskos:exactMatch\tDrugCentral:10
+CHEBI:2\tskos:exactMatch\t
+CHEBI:9\tskos:exactMatch\tDrugCentral:90
+CHEBI:1\tskos:exactMatch\tDrugCentral:11
+"""
+
+
+class PidOntologyTransform(OntologyTransform):
+    """An OntologyTransform that records the process instead of running KGX."""
+
+    def parse(self, name: str, data_file: str, source: str) -> None:
+        """Write the id of the converting process to the node file."""
+        with open(os.path.join(self.output_dir, name + "_nodes.tsv"), "w") as f:
+            f.write(str(os.getpid()))
+
+
+class TestOntologyTransform(unittest.TestCase):
+    """Tests for OntologyTransform."""
+
+    def setUp(self) -> None:
+        """Write ChEBI node and edge files, and a map, to a temp directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.node_file = os.path.join(self.tmpdir.name, "chebi_nodes.tsv")
+        self.edge_file = os.path.join(self.tmpdir.name, "chebi_edges.tsv")
+        map_path = os.path.join(self.tmpdir.name, "map.sssom.tsv")
+        with open(map_path, "w") as f:
+            f.write(SSSOM_MAP)
+        self.norm_map = NormalizationMap(map_path)
+
+    def tearDown(self) -> None:
+        """Remove the temp directory."""
+        self.tmpdir.cleanup()
+
+    def write_input(self) -> None:
+        """Write the ChEBI node and edge files."""
+        with open(self.node_file, "w") as f:
+            f.write("\t".join(NODE_HEADER) + "\n")
+            for curie in ["CHEBI:1", "CHEBI:2", "CHEBI:3"]:
+                f.write(curie + "\tbiolink:ChemicalEntity" + "\t" * 13 + "\n")
+        with open(self.edge_file, "w") as f:
+            f.write("\t".join(EDGE_HEADER) + "\n")
+
+    def test_add_mapping_nodes_edges(self):
+        """Test that only mapped node ids get an edge and a Drug node."""
+        self.write_input()
+        OntologyTransform.add_mapping_nodes_edges(
+            self.node_file, self.edge_file, self.norm_map
+        )
+        with open(self.node_file) as f:
+            new_nodes = f.readlines()[4:]
+        with open(self.edge_file) as f:
+            new_edges = [line.rstrip("\n").split("\t") for line in f][1:]
+        self.assertEqual(
+            [
+                "DrugCentral:11\tbiolink:Drug\t\t\t\t\t\t"
+                "https://drugcentral.org/drugcard/11\t\t\t\t\t\t\t\n"
+            ],
+            new_nodes,
+        )
+        self.assertEqual(1, len(new_edges))
+        self.assertTrue(new_edges[0][0].startswith("urn:uuid:"))
+        self.assertEqual(
+            [
+                "CHEBI:1",
+                "biolink:exact_match",
+                "DrugCentral:11",
+                "skos:exactMatch",
+                "chebi.json.gz",
+            ],
+            new_edges[0][1:],
+        )
+
+    def test_deterministic_edge_ids(self):
+        """Test that repeated runs give identical output."""
+        outputs = []
+        for _ in range(2):
+            self.write_input()
+            OntologyTransform.add_mapping_nodes_edges(
+                self.node_file, self.edge_file, self.norm_map
+            )
+            with open(self.edge_file) as f:
+                outputs.append(f.read())
+        self.assertEqual(outputs[0], outputs[1])
+
+    @parameterized.expand([(1,), (2,)])
+    def test_run_all(self, processes):
+        """Test converting all ontologies, serially and in worker processes."""
+        input_dir = os.path.join(self.tmpdir.name, "raw")
+        os.makedirs(input_dir)
+        for data_file in ONTOLOGIES.values():
+            with open(os.path.join(input_dir, data_file), "w") as f:
+                f.write("{}")
+        t = PidOntologyTransform(input_dir, self.tmpdir.name)
+        t.run(processes=processes)
+
+        names = [data_file.split(".")[0] for data_file in ONTOLOGIES.values()]
+        self.assertEqual(names, [s["ontology"] for s in t.stats])
+        self.assertEqual(
+            [
+                os.path.join(t.output_dir, name + suffix)
+                for name in names
+                for suffix in ["_nodes.tsv", "_edges.tsv"]
+            ],
+            t.output_files(),
+        )
+        pids = set()
+        for name in names:
+            with open(os.path.join(t.output_dir, name + "_nodes.tsv")) as f:
+                pids.add(int(f.read()))
+        if processes == 1:
+            self.assertEqual({os.getpid()}, pids)
+        else:
+            # every ontology is converted in a fresh worker process
+            self.assertEqual(len(names), len(pids))
+            self.assertNotIn(os.getpid(), pids)
+
+    def test_transform_jobs(self):
+        """Test that the pipeline converts ontologies in separate workers."""
+        input_dir = os.path.join(self.tmpdir.name, "raw")
+        os.makedirs(input_dir)
+        for data_file in ONTOLOGIES.values():
+            with open(os.path.join(input_dir, data_file), "w") as f:
+                f.write("{}")
+        sources = list(ONTOLOGIES)
+        with mock.patch.dict(
+            DATA_SOURCES, {source: PidOntologyTransform for source in sources}
+        ):
+            stats = transform(input_dir, self.tmpdir.name, sources, jobs=2)
+
+        self.assertEqual(["ok"] * len(sources), [s["status"] for s in stats])
+        pids = set()
+        for data_file in ONTOLOGIES.values():
+            name = data_file.split(".")[0]
+            with open(
+                os.path.join(self.tmpdir.name, "ontologies", name + "_nodes.tsv")
+            ) as f:
+                pids.add(int(f.read()))
+        self.assertEqual(len(sources), len(pids))
+        self.assertNotIn(os.getpid(), pids)
+
+    def test_conversion_cache(self):
+        """Test that KGX output is restored from the cache for unchanged input."""
+        data_file = os.path.join(self.tmpdir.name, "hp.json")
+        with open(data_file, "w") as f:
+            f.write('{"graphs": []}')
+        t = OntologyTransform(
+            self.tmpdir.name, self.tmpdir.name, os.path.join(self.tmpdir.name, "cache")
+        )
+
+        def kgx_transform(inputs, output, **kwargs):
+            for suffix in ["_nodes.tsv", "_edges.tsv"]:
+                with open(output + suffix, "w") as f:
+                    f.write(f"id\n{len(kgx.mock_calls)}\n")
+
+        with mock.patch(
+            "kg_covid_19.transform_utils.ontology.ontology_transform.transform",
+            side_effect=kgx_transform,
+        ) as kgx:
+            t.parse("hp", data_file, "hp")
+            os.remove(os.path.join(t.output_dir, "hp_nodes.tsv"))
+            t.parse("hp", data_file, "hp")
+            self.assertEqual(1, kgx.call_count)
+            with open(os.path.join(t.output_dir, "hp_nodes.tsv")) as f:
+                self.assertEqual("id\n1\n", f.read())
+
+            # new content or a new KGX version is a miss
+            with open(data_file, "a") as f:
+                f.write("\n")
+            t.parse("hp", data_file, "hp")
+            with mock.patch(
+                "kg_covid_19.transform_utils.ontology.ontology_transform.kgx_version",
+                return_value="0.0.0",
+            ):
+                t.parse("hp", data_file, "hp")
+            self.assertEqual(3, kgx.call_count)
@@ -1,6 +1,6 @@
 """Tests for the run.py script defining the CLI."""
 
-from unittest import TestCase
+from unittest import TestCase, mock
 
 from click.testing import CliRunner
 
@@ -19,6 +19,15 @@ class TestRun(TestCase):
         result = self.runner.invoke(cli=transform, args=["-i", "tests/data/raw"])
         self.assertNotEqual(result.exit_code, 0)
 
+    def test_transform_processes(self):
+        """Test that the number of processes per source is passed to transform()."""
+        with mock.patch("run.kg_transform", return_value=[]) as kg_transform:
+            result = self.runner.invoke(
+                cli=transform, args=["-s", "ScibiteCordTransform", "-p", "2"]
+            )
+        self.assertEqual(0, result.exit_code)
+        self.assertEqual(2, kg_transform.call_args.kwargs["processes"])
+
     def test_merge_missing_file_error(self):
         """Test case in which a file is missing."""
         with self.assertRaises(FileNotFoundError):
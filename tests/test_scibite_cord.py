@@ -1,23 +1,148 @@
 """Tests for parsing Scibite CORD data."""
 
+import os
+import shutil
 import tempfile
 from unittest import TestCase
+from zipfile import ZipFile
+
+from parameterized import parameterized
 
 from kg_covid_19.transform_utils.scibite_cord import ScibiteCordTransform
+from kg_covid_19.utils import NodeEdgeWriter
+from kg_covid_19.utils.gene_info_utils import GeneInfoIndex
+from kg_covid_19.utils.writer_utils import pyarrow
+
+GO_IRI = "http://purl.obolibrary.org/obo/GO_0005634"
+
+COOCCURRENCES = [
+    ("doc1.xml", f"{GO_IRI}|MESH:D000086382|US"),
+    ("doc2", f"{GO_IRI}|MESH:D000086382"),
+    ("doc1", "MESH:D000086382|XX"),
+    ("doc3", ""),
+    ("doc3", f"MESH:D017934|{GO_IRI}|AD"),
+]
+
+# written by the row by row parse of COOCCURRENCES, with doc2 and
+# MESH:D017934 already seen in the annotations
+COOCCURRENCE_NODES = [
+    ("CORD:doc1", "", "biolink:Publication"),
+    ("GO:0005634", "", "biolink:OntologyClass"),
+    ("MESH:D000086382", "", "biolink:OntologyClass"),
+    (":US", "", "biolink:NamedThing"),
+    ("GO:0005634", "", "biolink:OntologyClass"),
+    (":XX", "", "biolink:NamedThing"),
+    ("CORD:doc3", "", "biolink:Publication"),
+    ("WD:Q228", "Andorra", "biolink:NamedThing"),
+    ("GO:0005634", "", "biolink:OntologyClass"),
+]
+COOCCURRENCE_EDGES = [
+    ("GO:0005634", "CORD:doc1"),
+    ("MESH:D000086382", "CORD:doc1"),
+    (":US", "CORD:doc1"),
+    ("GO:0005634", "CORD:doc2"),
+    (":XX", "CORD:doc1"),
+    ("WD:Q228", "CORD:doc3"),
+    ("GO:0005634", "CORD:doc3"),
+]
 
 
 class TestScibiteCord(TestCase):
     """Test for parsing Scibite CORD data."""
 
     def setUp(self) -> None:
-        """Set up the test class."""
-        self.input_dir = "tests/resources/scibite_cord"
-        self.output_dir = "tests/resources/scibite_cord"
-        self.tmpdir = tempfile.TemporaryDirectory(dir=self.input_dir)
+        """Set up the test class.
+
+        The resources are copied to a temp directory, so the gene_info
+        index isn't built in the source tree.
+        """
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.tmpdir.name, "scibite_cord")
+        shutil.copytree("tests/resources/scibite_cord", self.input_dir)
+        self.output_dir = os.path.join(self.tmpdir.name, "transformed")
         self.scibite = ScibiteCordTransform(
-            input_dir=self.input_dir, output_dir=self.tmpdir.name
+            input_dir=self.input_dir, output_dir=self.output_dir
         )
 
+    def tearDown(self) -> None:
+        """Remove the temp directory."""
+        self.tmpdir.cleanup()
+
     def test_run(self):
         """Test running the scibite transformation."""
         self.scibite.run()
+
+    def test_run_parquet(self):
+        """Test that all node and edge files are written in the selected format."""
+        if pyarrow is None:
+            self.skipTest("pyarrow is not installed")
+        self.scibite.set_output_format("parquet")
+        self.scibite.run()
+        self.assertEqual(
+            [
+                "edges.parquet",
+                "entity_cooccurrence_edges.parquet",
+                "entity_cooccurrence_nodes.parquet",
+                "nodes.parquet",
+            ],
+            sorted(os.listdir(self.scibite.output_dir)),
+        )
+
+    def test_run_parallel(self):
+        """Test that parsing documents in processes gives the serial output."""
+        self.scibite.run()
+        parallel_dir = os.path.join(self.tmpdir.name, "parallel")
+        ScibiteCordTransform(input_dir=self.input_dir, output_dir=parallel_dir).run(
+            processes=2
+        )
+        for filename in ["nodes.tsv", "edges.tsv"]:
+            with open(os.path.join(self.scibite.output_dir, filename)) as serial, open(
+                os.path.join(parallel_dir, "SciBite-CORD-19", filename)
+            ) as parallel:
+                self.assertEqual(serial.read(), parallel.read())
+
+    def test_parse_cooccurrence(self):
+        """Test that co-occurrences are deduplicated as by the row by row parse."""
+        data_file = os.path.join(self.tmpdir.name, "cv19_scc.zip")
+        with ZipFile(data_file, "w") as zipfilehandler:
+            zipfilehandler.writestr(
+                "cv19_scc.tsv",
+                "document_id\tentity_uris\n"
+                + "".join(f"{doc}\t{uris}\n" for doc, uris in COOCCURRENCES),
+            )
+        self.scibite.seen.update(["doc2", "MESH:D017934"])
+        node_file = os.path.join(self.tmpdir.name, "nodes.tsv")
+        edge_file = os.path.join(self.tmpdir.name, "edges.tsv")
+        with NodeEdgeWriter(
+            node_file,
+            edge_file,
+            ["id", "name", "category", "description", "provided_by"],
+            ["subject", "predicate", "object", "relation", "provided_by", "type"],
+        ) as writer:
+            self.scibite.parse_cooccurrence(writer, data_file)
+
+        with open(node_file) as f:
+            nodes = [tuple(line.split("\t")[:3]) for line in f][1:]
+        with open(edge_file) as f:
+            edges = [tuple(line.split("\t")[0:3:2]) for line in f][1:]
+        # the row by row parse wrote the terms of a row in set order
+        self.assertCountEqual(COOCCURRENCE_NODES, nodes)
+        self.assertCountEqual(COOCCURRENCE_EDGES, edges)
+
+    def test_contract_uri_cache(self):
+        """Test that repeated IRIs are served from the contract_uri cache."""
+        iri = "http://purl.obolibrary.org/obo/GO_0005634"
+        self.assertEqual(self.scibite.contract_uri(iri), self.scibite.contract_uri(iri))
+        self.assertEqual(
+            {"hits": 1, "misses": 1, "size": 1}, self.scibite.curie_cache_info()
+        )
+
+    @parameterized.expand([("A1BG", "NCBIGene:1"), ("NOTAGENE", "HGNC:NOTAGENE")])
+    def test_contract_gene_symbol_uri(self, symbol, expected):
+        """Test that HGNC gene symbol IRIs are mapped to NCBI Gene ids."""
+        self.scibite.gene_info = GeneInfoIndex(
+            "tests/resources/string/gene_info.gz",
+            index_file=os.path.join(self.tmpdir.name, "gene_info.index.sqlite"),
+        )
+        iri = f"http://www.genenames.org/cgi-bin/gene_symbol_report?match={symbol}"
+        self.assertEqual(expected, self.scibite.contract_uri(iri))
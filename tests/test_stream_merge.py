@@ -0,0 +1,361 @@
+"""Test the streaming sort-merge of node and edge files."""
+
+import os
+import tarfile
+import tempfile
+import unittest
+from typing import Any, Dict
+
+import yaml
+from parameterized import parameterized
+
+from kg_covid_19.merge_utils.interned_merge import interned_merge
+from kg_covid_19.merge_utils.stream_merge import (CORE_EDGE_PROPERTIES,
+                                                  UnsupportedMergeConfigError,
+                                                  merge_records,
+                                                  prepare_merge_config,
+                                                  pyarrow, stream_merge)
+from kg_covid_19.utils.writer_utils import ParquetTableWriter
+
+SOURCES = {
+    "a": {
+        "nodes": [
+            ["id", "category", "name", "provided_by"],
+            ["HGNC:1", "biolink:Gene", "gene one", "a"],
+            ["CHEBI:1", "biolink:ChemicalEntity", "chem", "a"],
+            ["UniProtKB:P1", "biolink:Protein", "protein", "a"],
+        ],
+        "edges": [
+            ["id", "subject", "predicate", "object", "provided_by"],
+            ["e1", "HGNC:1", "biolink:interacts_with", "UniProtKB:P1", "a"],
+            ["e2", "CHEBI:1", "biolink:interacts_with", "UniProtKB:P1", "a"],
+            ["e3", "HGNC:1", "biolink:related_to", "UniProtKB:P1", "a"],
+        ],
+    },
+    "b": {
+        "nodes": [
+            ["id", "category", "name", "description", "provided_by"],
+            ["UniProtKB:P1", "biolink:Protein|biolink:Polypeptide", "P1", "", "b"],
+            ["HGNC:2", "biolink:Gene", "gene two", "second", "b"],
+            ["HGNC:1", "biolink:Gene", "", "", "b"],
+        ],
+        "edges": [
+            ["id", "subject", "predicate", "object", "provided_by"],
+            ["e4", "HGNC:2", "biolink:interacts_with", "UniProtKB:P1", "b"],
+            ["e5", "HGNC:1", "biolink:interacts_with", "UniProtKB:P1", "b"],
+        ],
+    },
+}
+
+EXPECTED_NODES = [
+    ["id", "category", "name", "description", "provided_by"],
+    ["HGNC:1", "biolink:Gene", "gene one", "", "a|b"],
+    ["HGNC:2", "biolink:Gene", "gene two", "second", "b"],
+    [
+        "UniProtKB:P1",
+        "biolink:Protein|biolink:Polypeptide",
+        "protein",
+        "",
+        "a|b",
+    ],
+]
+
+EXPECTED_EDGES = [
+    ["id", "subject", "predicate", "object", "provided_by"],
+    ["e1", "HGNC:1", "biolink:interacts_with", "UniProtKB:P1", "a|b"],
+    ["e4", "HGNC:2", "biolink:interacts_with", "UniProtKB:P1", "b"],
+]
+
+
+class TestStreamMerge(unittest.TestCase):
+    """Tests for stream_merge."""
+
+    def setUp(self) -> None:
+        """Write the sources and a merge config to a temp directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.output_dir = os.path.join(self.tmpdir.name, "merged")
+        self.config: Dict[str, Any] = {
+            "configuration": {"output_directory": self.output_dir},
+            "merged_graph": {
+                "name": "test",
+                "source": {},
+                "destination": {
+                    "merged-kg-tsv": {"format": "tsv", "filename": "merged-kg"}
+                },
+            },
+        }
+        for name, tables in SOURCES.items():
+            filenames = []
+            for kind, rows in tables.items():
+                filename = os.path.join(self.tmpdir.name, f"{name}_{kind}.tsv")
+                with open(filename, "w") as f:
+                    f.writelines("\t".join(row) + "\n" for row in rows)
+                filenames.append(filename)
+            self.config["merged_graph"]["source"][name] = {
+                "input": {"format": "tsv", "filename": filenames},
+                # only genes and proteins, and their interactions
+                "filters": {
+                    "node_filters": {"category": ["biolink:Gene", "biolink:Protein"]},
+                    "edge_filters": {
+                        "subject_category": ["biolink:Gene"],
+                        "edge_label": ["biolink:interacts_with"],
+                    },
+                },
+            }
+
+    def tearDown(self) -> None:
+        """Remove the temp directory."""
+        self.tmpdir.cleanup()
+
+    def merge(self, engine=stream_merge, **kwargs):
+        """Write the config and merge it."""
+        yaml_file = os.path.join(self.tmpdir.name, "merge.yaml")
+        with open(yaml_file, "w") as f:
+            yaml.dump(self.config, f)
+        return engine(yaml_file, **kwargs)
+
+    def read(self, suffix: str) -> list:
+        """Read a merged TSV file into rows."""
+        with open(os.path.join(self.output_dir, "merged-kg" + suffix)) as f:
+            return [line.rstrip("\n").split("\t") for line in f]
+
+    @parameterized.expand([(2, 1), (1000, 1), (2, 2), (1000, 2)])
+    def test_merge(self, buffer_records, processes):
+        """Test merging, with and without spilling runs and worker processes."""
+        stats = self.merge(buffer_records=buffer_records, processes=processes)
+        self.assertEqual(EXPECTED_NODES, self.read("_nodes.tsv"))
+        self.assertEqual(EXPECTED_EDGES, self.read("_edges.tsv"))
+        sources = stats.pop("sources")
+        self.assertEqual(
+            {"nodes_read": 5, "edges_read": 3, "nodes": 3, "edges": 2}, stats
+        )
+        self.assertEqual(
+            [("a", 2, 1), ("b", 3, 2)],
+            [(s["source"], s["nodes_read"], s["edges_read"]) for s in sources],
+        )
+
+    def test_interned_merge(self):
+        """Test that merging into interned tables gives the same rows."""
+        graph = self.merge(engine=interned_merge)
+        for suffix, expected in [
+            ("_nodes.tsv", EXPECTED_NODES),
+            ("_edges.tsv", EXPECTED_EDGES),
+        ]:
+            rows = self.read(suffix)
+            self.assertEqual(expected[0], rows[0])
+            self.assertCountEqual(expected[1:], rows[1:])
+        self.assertEqual(
+            [["HGNC:1", "UniProtKB:P1"], ["HGNC:2", "UniProtKB:P1"]],
+            [graph.node_ids.decode(edge) for edge in graph.edge_array()],
+        )
+
+    def test_parquet(self):
+        """Test merging Parquet sources into a Parquet destination."""
+        if pyarrow is None:
+            self.skipTest("pyarrow is not installed")
+        for source in self.config["merged_graph"]["source"].values():
+            filenames = []
+            for filename in source["input"]["filename"]:
+                with open(filename) as f:
+                    rows = [line.rstrip("\n").split("\t") for line in f]
+                parquet_file = filename.replace(".tsv", ".parquet")
+                writer = ParquetTableWriter(parquet_file, rows[0])
+                writer.write_batch(rows[1:])
+                writer.close()
+                os.remove(filename)
+                filenames.append(parquet_file)
+            source["input"] = {"format": "parquet", "filename": filenames}
+        self.config["merged_graph"]["destination"]["merged-kg-tsv"][
+            "format"
+        ] = "parquet"
+        self.merge()
+        for suffix, expected in [
+            ("_nodes.parquet", EXPECTED_NODES),
+            ("_edges.parquet", EXPECTED_EDGES),
+        ]:
+            table = pyarrow.parquet.read_table(
+                os.path.join(self.output_dir, "merged-kg" + suffix)
+            )
+            self.assertEqual(
+                expected,
+                [table.column_names]
+                + [list(row) for row in zip(*table.to_pydict().values())],
+            )
+
+    def test_tar_gz_destination(self):
+        """Test packing the merged files into a tar.gz archive."""
+        self.config["merged_graph"]["destination"]["merged-kg-tsv"][
+            "compression"
+        ] = "tar.gz"
+        self.merge()
+        with tarfile.open(os.path.join(self.output_dir, "merged-kg.tar.gz")) as tar:
+            self.assertEqual(
+                ["merged-kg_nodes.tsv", "merged-kg_edges.tsv"], tar.getnames()
+            )
+        self.assertFalse(
+            os.path.exists(os.path.join(self.output_dir, "merged-kg_nodes.tsv"))
+        )
+
+    def test_unsupported_operation(self):
+        """Test that source operations without a streaming version are refused."""
+        self.config["merged_graph"]["source"]["a"]["operations"] = [
+            {"name": "kgx.utils.graph_utils.not_streamable", "args": {}}
+        ]
+        with self.assertRaises(UnsupportedMergeConfigError):
+            self.merge()
+
+    def test_missing_column(self):
+        """Test that sources are checked before any is read."""
+        filename = self.config["merged_graph"]["source"]["b"]["input"]["filename"][1]
+        with open(filename, "w") as f:
+            f.write("id\tsubject\tpredicate\n")
+        with self.assertRaisesRegex(UnsupportedMergeConfigError, "no object column"):
+            self.merge()
+        os.remove(filename)
+        with self.assertRaises(FileNotFoundError):
+            self.merge()
+
+    def test_merge_records(self):
+        """Test that core properties keep their first value."""
+        self.assertEqual(
+            {"id": "X:1", "name": "one", "xref": "Y:1|Y:2"},
+            merge_records(
+                [
+                    {"id": "X:1", "name": "one", "xref": "Y:1"},
+                    {"id": "X:1", "name": "uno", "xref": "Y:2|Y:1"},
+                ],
+                ["id", "name"],
+            ),
+        )
+
+    def test_merge_edge_type(self):
+        """Test that edges keep their first type, as KGX does."""
+        edge = {"subject": "X:1", "predicate": "biolink:related_to", "object": "X:2"}
+        self.assertEqual(
+            "biolink:Association",
+            merge_records(
+                [
+                    {**edge, "type": "biolink:Association"},
+                    {**edge, "type": "biolink:ChemicalToGeneAssociation"},
+                ],
+                CORE_EDGE_PROPERTIES,
+            )["type"],
+        )
+
+
+STRING_NODES = [
+    ["id", "category", "xrefs", "provided_by"],
+    ["ENSEMBL:ENSP1", "biolink:Protein", "Other:1|UniProtKB:P1|UniProtKB:P2", "s"],
+    ["ENSEMBL:ENSP2", "biolink:Protein", "", "s"],
+    ["NCBIGene:5", "biolink:Gene", "UniProtKB:P5", "s"],
+]
+STRING_EDGES = [
+    ["subject", "predicate", "object", "provided_by"],
+    ["ENSEMBL:ENSP1", "biolink:interacts_with", "ENSEMBL:ENSP2", "s"],
+    ["NCBIGene:5", "biolink:interacts_with", "ENSEMBL:ENSP1", "s"],
+]
+REMAP = {
+    "name": "kgx.utils.graph_utils.remap_node_identifier",
+    "args": {
+        "category": "biolink:Protein",
+        "alternative_property": "xrefs",
+        "prefix": "UniProtKB",
+    },
+}
+
+
+class TestRemapNodeIdentifier(unittest.TestCase):
+    """Tests for remapping node ids to xrefs before merging."""
+
+    def setUp(self) -> None:
+        """Write STRING-like node and edge files and a merge config."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        filenames = []
+        for kind, rows in [("nodes", STRING_NODES), ("edges", STRING_EDGES)]:
+            filename = os.path.join(self.tmpdir.name, f"{kind}.tsv")
+            with open(filename, "w") as f:
+                f.writelines("\t".join(row) + "\n" for row in rows)
+            filenames.append(filename)
+        self.output_dir = os.path.join(self.tmpdir.name, "merged")
+        self.config = {
+            "configuration": {"output_directory": self.output_dir},
+            "merged_graph": {
+                "name": "test",
+                "source": {
+                    "STRING": {
+                        "input": {"format": "tsv", "filename": filenames},
+                        "operations": [REMAP],
+                    },
+                    "other": {
+                        "input": {"format": "tsv", "filename": filenames[:1]},
+                    },
+                },
+                "destination": {
+                    "merged-kg-tsv": {"format": "tsv", "filename": "merged-kg"}
+                },
+            },
+        }
+        self.yaml_file = os.path.join(self.tmpdir.name, "merge.yaml")
+        with open(self.yaml_file, "w") as f:
+            yaml.dump(self.config, f)
+
+    def tearDown(self) -> None:
+        """Remove the temp directory."""
+        self.tmpdir.cleanup()
+
+    def read(self, filename: str) -> list:
+        """Read the ids, or subjects and objects, of a TSV file."""
+        with open(filename) as f:
+            rows = [line.rstrip("\n").split("\t") for line in f]
+        columns = [
+            rows[0].index(c) for c in ["id", "subject", "object"] if c in rows[0]
+        ]
+        return [[row[c] for c in columns] for row in rows[1:]]
+
+    def test_stream_merge(self):
+        """Test that proteins get their first UniProtKB xref, in edges too."""
+        stream_merge(self.yaml_file)
+        self.assertEqual(
+            [
+                ["ENSEMBL:ENSP1"],
+                ["ENSEMBL:ENSP2"],
+                ["NCBIGene:5"],
+                ["UniProtKB:P1"],
+            ],
+            self.read(os.path.join(self.output_dir, "merged-kg_nodes.tsv")),
+        )
+        self.assertEqual(
+            [
+                ["", "NCBIGene:5", "UniProtKB:P1"],
+                ["", "UniProtKB:P1", "ENSEMBL:ENSP2"],
+            ],
+            self.read(os.path.join(self.output_dir, "merged-kg_edges.tsv")),
+        )
+
+    def test_prepare_merge_config(self):
+        """Test running the remapping as a stage before a KGX merge."""
+        prepared_dir = os.path.join(self.tmpdir.name, "prepared")
+        os.makedirs(prepared_dir)
+        prepared_file = prepare_merge_config(self.yaml_file, prepared_dir)
+        with open(prepared_file) as f:
+            sources = yaml.safe_load(f)["merged_graph"]["source"]
+        self.assertEqual(
+            self.config["merged_graph"]["source"]["other"], sources["other"]
+        )
+        self.assertNotIn("operations", sources["STRING"])
+        node_file, edge_file = sources["STRING"]["input"]["filename"]
+        self.assertEqual(
+            [["UniProtKB:P1"], ["ENSEMBL:ENSP2"], ["NCBIGene:5"]], self.read(node_file)
+        )
+        self.assertEqual(
+            [["", "UniProtKB:P1", "ENSEMBL:ENSP2"], ["", "NCBIGene:5", "UniProtKB:P1"]],
+            self.read(edge_file),
+        )
+
+        # nothing to prepare
+        del self.config["merged_graph"]["source"]["STRING"]["operations"]
+        with open(self.yaml_file, "w") as f:
+            yaml.dump(self.config, f)
+        self.assertEqual(
+            self.yaml_file, prepare_merge_config(self.yaml_file, prepared_dir)
+        )
@@ -1,6 +1,7 @@
 """Tests for parsing STRING prortein interaction data."""
 
 import os
+import shutil
 import tempfile
 from unittest import TestCase
 
@@ -14,12 +15,22 @@ class TestString(TestCase):
     """Tests for the STRING ingest."""
 
     def setUp(self) -> None:
-        """Set up for the STRING ingest tests."""
-        self.input_dir = "tests/resources/string/"
-        self.output_dir = tempfile.gettempdir()
+        """Set up for the STRING ingest tests.
+
+        The resources are copied to a temp directory, so the gene_info and
+        id mapping indexes aren't built in the source tree.
+        """
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.tmpdir.name, "string")
+        shutil.copytree("tests/resources/string", self.input_dir)
+        self.output_dir = os.path.join(self.tmpdir.name, "transformed")
         self.string_output_dir = os.path.join(self.output_dir, "STRING")
         self.string = StringTransform(self.input_dir, self.output_dir)
 
+    def tearDown(self) -> None:
+        """Remove the temp directory."""
+        self.tmpdir.cleanup()
+
     @parameterized.expand(
         [
             ["ensembl2ncbi_map", dict, "ENSG00000121410", 1],
@@ -138,3 +149,16 @@ class TestString(TestCase):
             ],
             list(edge_df.columns),
         )
+
+    def test_run_chunked(self):
+        """Test that output doesn't depend on the interaction batch size."""
+        self.string.run()
+        with open(self.string.output_node_file) as n, open(
+            self.string.output_edge_file
+        ) as e:
+            expected = (n.read(), e.read())
+        self.string.run(chunk_size=2)
+        with open(self.string.output_node_file) as n, open(
+            self.string.output_edge_file
+        ) as e:
+            self.assertEqual(expected, (n.read(), e.read()))
@@ -1,12 +1,16 @@
 """Test the parent Transform class."""
 
 import os
-from unittest import TestCase
+import shutil
+import tempfile
+from unittest import TestCase, mock
 
 from parameterized import parameterized
 
-from kg_covid_19.transform import DATA_SOURCES
+from kg_covid_19.transform import (DATA_SOURCES, group_sources, manifest_entry,
+                                   run_source, transform)
 from kg_covid_19.transform_utils.transform import Transform
+from kg_covid_19.utils.normalize_utils import DRUGCENTRAL_MAP
 
 
 class TestTransform(TestCase):
@@ -74,18 +78,128 @@ class TestTransform(TestCase):
         :param src_name:
         :return: None
         """
-        input_dir = os.path.join("tests", "resources")
         output_dir = os.path.join("output")
         def_input_dir = os.path.join("data", "raw")
         def_output_dir = os.path.join("data", "transformed")
 
-        t = DATA_SOURCES[src_name](input_dir=input_dir, output_dir=output_dir)
+        # copied, so indexes built by the constructors stay out of the tree
+        with tempfile.TemporaryDirectory() as tmpdir:
+            input_dir = os.path.join(tmpdir, "resources")
+            shutil.copytree(os.path.join("tests", "resources"), input_dir)
+            t = DATA_SOURCES[src_name](input_dir=input_dir, output_dir=output_dir)
         self.assertEqual(t.input_base_dir, input_dir)
         self.assertEqual(t.output_base_dir, output_dir)
         self.assertTrue(hasattr(t, "run"))
         self.assertEqual(t.DEFAULT_INPUT_DIR, def_input_dir)
         self.assertEqual(t.DEFAULT_OUTPUT_DIR, def_output_dir)
 
+    @parameterized.expand(
+        [("TTDTransform", "nodes.parquet"), ("GoTransform", "nodes.tsv")]
+    )
+    def test_set_output_format(self, src_name, node_file):
+        """Test switching to Parquet output, for transforms that can write it."""
+        t = DATA_SOURCES[src_name](input_dir="tests/resources", output_dir="output")
+        t.set_output_format("parquet")
+        self.assertEqual(os.path.join(t.output_dir, node_file), t.output_node_file)
+        with self.assertRaises(ValueError):
+            t.set_output_format("csv")
+
+    @parameterized.expand(
+        [
+            ("TTDTransform", True),
+            ("PharmGKB", True),
+            ("ChemblTransform", True),
+            ("ChebiTransform", True),
+            ("DrugCentralTransform", False),
+        ]
+    )
+    def test_manifest_entry_map_files(self, src_name, reads_map):
+        """Test that the DrugCentral map is fingerprinted for transforms reading it."""
+        entry = manifest_entry(os.path.join("tests", "resources"), src_name)
+        self.assertEqual(reads_map, DRUGCENTRAL_MAP in entry["inputs"])
+
+    @parameterized.expand(
+        [("TTDTransform", "parquet"), ("ChebiTransform", "tsv")],
+    )
+    def test_manifest_entry_output_format(self, src_name, output_format):
+        """Test that the format a transform actually writes is recorded."""
+        entry = manifest_entry(
+            os.path.join("tests", "resources"), src_name, output_format="parquet"
+        )
+        self.assertEqual(output_format, entry["output_format"])
+
+    @parameterized.expand(
+        [
+            (
+                "ScibiteCordTransform",
+                "tests/resources/scibite_cord",
+                2,
+                {"processes": 2},
+            ),
+            ("ScibiteCordTransform", "tests/resources/scibite_cord", 1, {}),
+            ("IntAct", "tests/resources", 2, {"processes": 2}),
+            ("DrugCentralTransform", "tests/resources/drug_central", 2, {}),
+        ]
+    )
+    def test_run_source_processes(self, src_name, input_dir, processes, kwargs):
+        """Test that processes are passed to transforms that can parse in a pool."""
+        with tempfile.TemporaryDirectory() as output_dir, mock.patch.object(
+            DATA_SOURCES[src_name], "run"
+        ) as run:
+            stats = run_source(input_dir, output_dir, src_name, processes=processes)
+        run.assert_called_once_with(**kwargs)
+        self.assertEqual("ok", stats["status"])
+
+    def test_incremental_missing_output(self):
+        """Test that a source whose outputs were deleted is rebuilt."""
+        with tempfile.TemporaryDirectory() as tmpdir, mock.patch.dict(
+            DATA_SOURCES, {"FileTransform": FileTransform}
+        ):
+            with open(os.path.join(tmpdir, "raw.tsv"), "w") as f:
+                f.write("a\tb\n")
+            output_dir = os.path.join(tmpdir, "transformed")
+            statuses = []
+            for delete in [False, False, True]:
+                if delete:
+                    os.remove(os.path.join(output_dir, "file_transform", "edges.tsv"))
+                stats = transform(
+                    tmpdir, output_dir, ["FileTransform"], incremental=True
+                )
+                statuses.append(stats[0]["status"])
+            self.assertTrue(
+                os.path.exists(os.path.join(output_dir, "file_transform", "edges.tsv"))
+            )
+        self.assertEqual(["ok", "up to date", "ok"], statuses)
+
+    def test_group_sources(self):
+        """Test that sources are grouped by transform, ontologies one by one."""
+        groups = group_sources(
+            ["GoTransform", "ZhouTransform", "HpTransform", "TTDTransform"]
+        )
+        self.assertEqual(
+            [["GoTransform"], ["ZhouTransform"], ["HpTransform"], ["TTDTransform"]],
+            groups,
+        )
+
+
+class FileTransform(Transform):
+    """A Transform that writes empty node and edge files from one raw file."""
+
+    INPUT_FILES = ["raw.tsv"]
+
+    def __init__(self, input_dir=None, output_dir=None):
+        """Initialize."""
+        super().__init__("file_transform", input_dir, output_dir)
+
+    def run(self, data_file=None):
+        """Write the headers of the node and edge files."""
+        for path, header in [
+            (self.output_node_file, self.node_header),
+            (self.output_edge_file, self.edge_header),
+        ]:
+            with open(path, "w") as f:
+                f.write("\t".join(header) + "\n")
+
 
 class TransformChildClass(Transform):
     """An example Transform class."""
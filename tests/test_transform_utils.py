@@ -1,11 +1,13 @@
 """Test the transformation utilities."""
 
+import gzip
 import unittest
 
 from parameterized import parameterized
 
 from kg_covid_19.utils.transform_utils import (collapse_uniprot_curie,
-                                               guess_bl_category)
+                                               guess_bl_category,
+                                               iter_taxon_lines)
 
 
 class TestTransformUtils(unittest.TestCase):
@@ -35,3 +37,18 @@ class TestTransformUtils(unittest.TestCase):
     def test_collapse_uniprot_curie(self, curie, collapsed_curie):
         """Test for collapsing a UniProtKB curie."""
         self.assertEqual(collapsed_curie, collapse_uniprot_curie(curie))
+
+    @parameterized.expand([(16,), (64,), (1024 * 1024,)])
+    def test_iter_taxon_lines(self, chunk_size):
+        """Test that taxon lines are found across chunk boundaries."""
+        gene_info = "tests/resources/string/gene_info.gz"
+        with gzip.open(gene_info, "rb") as f:
+            expected = [
+                line.rstrip(b"\n")
+                for line in f
+                if line.split(b"\t")[0] in (b"9606", b"9598")
+            ]
+        self.assertTrue(expected)
+        self.assertEqual(
+            expected, list(iter_taxon_lines(gene_info, ["9606", "9598"], chunk_size))
+        )
@@ -0,0 +1,140 @@
+"""Test that transforms bump their VERSION when their output changes."""
+
+import glob
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+from zipfile import ZipFile
+
+from parameterized import parameterized
+
+from kg_covid_19.transform import DATA_SOURCES
+from kg_covid_19.utils.normalize_utils import DRUGCENTRAL_MAP
+
+RESOURCES = os.path.abspath(os.path.join("tests", "resources"))
+
+SSSOM_MAP = """# curie_map:
+#   CHEBI: http://purl.obolibrary.org/obo/CHEBI_
+subject_id\tpredicate_id\tobject_id
+CHEBI:15365\tskos:exactMatch\tDrugCentral:74
+CHEMBL.COMPOUND:CHEMBL25\tskos:exactMatch\tDrugCentral:74
+"""
+
+# digest of the sorted lines of the node and edge files each transform writes
+# from tests/resources, by transform version. Incremental transforms only
+# rebuild a source when its inputs or VERSION change, so a change to the
+# output of a transform needs a new VERSION, and a new digest for it here.
+# Transforms that need KGX (ontologies, GO-CAMs) can't run from
+# tests/resources and are not checked here. Their VERSION has to be bumped
+# by hand, as for the uuid5 ids of the chebi mapping edges.
+OUTPUT_DIGESTS = {
+    "DrugCentralTransform": {
+        "1": "cbd2559b8b1bc7eb7f580ee4cdc34a08b4c83133ba5c197eb9cc3200df775ea6"
+    },
+    "TTDTransform": {
+        "1": "55c8801dd5108808ac20b563320f669a6030825cdd64fef4eef0571422fd5653"
+    },
+    "StringTransform": {
+        "1": "ea6e88f36bd2681e961175f4881607a255f5441b0348d34d3f02856753126b3e"
+    },
+    "ScibiteCordTransform": {
+        "2": "3d020d2ce5daa87db75f44f17e74bef3ad8029e3794545c7f03c09c30194d56b"
+    },
+    "PharmGKB": {
+        "1": "501e8bd72e41c7dcedc5dfb73793dfdaa28489c93e8ee220f20175c61c9b17e6"
+    },
+    "SARSCoV2GeneAnnot": {
+        "1": "32fcd7518d80f6195a08c3c756b7130a45f2d952e43b2674a7a31f5d8f31e838"
+    },
+    "IntAct": {"1": "28cec85e7383f3ba919c1ee4974ba8e742db1088c45d66d1290f64faa8f4e5b1"},
+    "ChemblTransform": {
+        "1": "51640ff2825514e303af19935d6efb243acfe3efede8ab8e0b45aeb589afeca6"
+    },
+}
+
+
+def make_raw_dir(raw_dir: str) -> None:
+    """Lay out the test resources under the file names transforms read."""
+    os.makedirs(raw_dir)
+    copies = {
+        "drug_central/drug.target.interaction_SNIPPET.tsv.gz": (
+            "drug.target.interaction.tsv.gz"
+        ),
+        "P1-01-TTD_target_download_SNIPPET.txt": "P1-01-TTD_target_download.txt",
+        "uniprot_sars-cov-2_SNIPPET.gpi": "uniprot_sars-cov-2.gpi",
+        "uniprot_sars-cov-2_SNIPPET.gpa": "uniprot_sars-cov-2.gpa",
+    }
+    for name in os.listdir(os.path.join(RESOURCES, "string")):
+        copies[os.path.join("string", name)] = name
+    for name in os.listdir(os.path.join(RESOURCES, "scibite_cord")):
+        copies.setdefault(os.path.join("scibite_cord", name), name)
+    for name in os.listdir(os.path.join(RESOURCES, "chembl")):
+        if name.endswith(".json"):
+            copies[os.path.join("chembl", name)] = name
+    for resource, name in copies.items():
+        if not resource.endswith(".sqlite"):
+            shutil.copy(os.path.join(RESOURCES, resource), os.path.join(raw_dir, name))
+
+    members = {
+        "relationships.zip": {"relationships.tsv": "relationships_SNIPPET.tsv"},
+        "pharmgkb_genes.zip": {"genes.tsv": "pharmgkb_gene_SNIPPET.tsv"},
+        "pharmgkb_drugs.zip": {"drugs.tsv": "drugs.tsv"},
+        "intact_coronavirus.zip": {
+            "intact/intact_test.xml": "intact_test.xml",
+            "intact/intact_3_participants.xml": "intact_3_participants.xml",
+        },
+    }
+    for zip_name, files in members.items():
+        with ZipFile(os.path.join(raw_dir, zip_name), "w") as z:
+            for member, resource in files.items():
+                z.write(os.path.join(RESOURCES, resource), member)
+
+
+def output_digest(output_dir: str) -> str:
+    """Hash the sorted lines of all files in a transform's output directory."""
+    sha256 = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(output_dir, "*.tsv"))):
+        sha256.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            for line in sorted(f):
+                sha256.update(line)
+    return sha256.hexdigest()
+
+
+class TestTransformVersions(unittest.TestCase):
+    """Tests that output changes come with a VERSION bump."""
+
+    def setUp(self) -> None:
+        """Set up raw data and the DrugCentral map in a temp working directory."""
+        self.cwd = os.getcwd()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.chdir(self.tmpdir.name)
+        make_raw_dir(os.path.join("data", "raw"))
+        os.makedirs(os.path.dirname(DRUGCENTRAL_MAP))
+        with open(DRUGCENTRAL_MAP, "w") as f:
+            f.write(SSSOM_MAP)
+
+    def tearDown(self) -> None:
+        """Go back to the working directory and remove the temp one."""
+        os.chdir(self.cwd)
+        self.tmpdir.cleanup()
+
+    @parameterized.expand([(source,) for source in OUTPUT_DIGESTS])
+    def test_output_digest(self, source):
+        """Test that the output of a transform is the one of its VERSION."""
+        t = DATA_SOURCES[source](
+            os.path.join("data", "raw"), os.path.join("data", "transformed")
+        )
+        t.run()
+        self.assertIn(
+            t.VERSION,
+            OUTPUT_DIGESTS[source],
+            f"Record the output digest of {source} version {t.VERSION}",
+        )
+        self.assertEqual(
+            OUTPUT_DIGESTS[source][t.VERSION],
+            output_digest(t.output_dir),
+            f"The output of {source} changed, bump {source}.VERSION",
+        )
@@ -0,0 +1,60 @@
+"""Test the persisted UniProt id mapping index."""
+
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from kg_covid_19.utils.uniprot_utils import UniprotIdMapping
+
+
+class TestUniprotIdMapping(unittest.TestCase):
+    """Tests for the UniProt id mapping index."""
+
+    def setUp(self) -> None:
+        """Copy the id mapping file to a temp directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dat_gz_file = os.path.join(
+            self.tmpdir.name, "HUMAN_9606_idmapping.dat.gz"
+        )
+        shutil.copy(
+            "tests/resources/string/HUMAN_9606_idmapping.dat.gz", self.dat_gz_file
+        )
+
+    def tearDown(self) -> None:
+        """Remove the temp directory."""
+        self.tmpdir.cleanup()
+
+    def expected_mapping(self) -> dict:
+        """Parse the id mapping file into a dict."""
+        name_to_id_map = {}
+        with gzip.open(self.dat_gz_file, mode="rb") as file:
+            for line in file:
+                items = line.decode().strip().split("\t")
+                name_to_id_map[items[2]] = items[0]
+        return name_to_id_map
+
+    def test_matches_dict(self):
+        """Test that the index holds the same mapping as a parsed dict."""
+        mapping = UniprotIdMapping(self.dat_gz_file)
+        expected = self.expected_mapping()
+        self.assertEqual(expected, dict(mapping))
+        self.assertEqual("P31946", mapping["1433B_HUMAN"])
+        self.assertTrue("YWHAB" in mapping)
+        self.assertFalse("NOT_A_NAME" in mapping)
+        self.assertIsNone(mapping.get("NOT_A_NAME"))
+
+    def test_index_is_reused(self):
+        """Test that the index is only rebuilt when the file changes."""
+        UniprotIdMapping(self.dat_gz_file)
+        index_file = self.dat_gz_file + ".index.sqlite"
+        built = os.stat(index_file).st_ino
+        os.utime(self.dat_gz_file, (0, 0))
+        UniprotIdMapping(self.dat_gz_file)
+        self.assertEqual(built, os.stat(index_file).st_ino)
+
+        with gzip.open(self.dat_gz_file, mode="ab") as file:
+            file.write(b"P00000\tGene_Name\tNEWGENE\n")
+        mapping = UniprotIdMapping(self.dat_gz_file)
+        self.assertEqual("P00000", mapping["NEWGENE"])
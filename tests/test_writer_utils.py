@@ -0,0 +1,207 @@
+"""Test the buffered node and edge writer."""
+
+import gzip
+import os
+import tempfile
+import time
+import unittest
+
+from parameterized import parameterized
+
+from kg_covid_19.utils import NodeEdgeWriter, write_node_edge_item
+from kg_covid_19.utils.writer_utils import (RowLengthError, TableWriter,
+                                            open_output, pyarrow, zstandard)
+
+NODE_HEADER = ["id", "name", "category"]
+EDGE_HEADER = ["subject", "predicate", "object"]
+
+NODES = [["CHEBI:1", "one", "biolink:ChemicalEntity"], ["HGNC:2", "two", ""]]
+EDGES = [["CHEBI:1", "biolink:interacts_with", "HGNC:2"]]
+
+EXPECTED_NODES = (
+    "id\tname\tcategory\nCHEBI:1\tone\tbiolink:ChemicalEntity\nHGNC:2\ttwo\t\n"
+)
+EXPECTED_EDGES = "subject\tpredicate\tobject\nCHEBI:1\tbiolink:interacts_with\tHGNC:2\n"
+
+# rows written by each method in the benchmark
+BENCHMARK_ROWS = 200_000
+
+
+class TestNodeEdgeWriter(unittest.TestCase):
+    """Tests for NodeEdgeWriter."""
+
+    def setUp(self) -> None:
+        """Set up a temp output directory."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.node_file = os.path.join(self.tmpdir.name, "nodes.tsv")
+        self.edge_file = os.path.join(self.tmpdir.name, "edges.tsv")
+
+    def tearDown(self) -> None:
+        """Remove the temp directory."""
+        self.tmpdir.cleanup()
+
+    def read(self, path: str) -> str:
+        """Read back a plain or compressed output file."""
+        if path.endswith(".gz"):
+            with gzip.open(path, "rt") as f:
+                return f.read()
+        if path.endswith(".zst"):
+            with open(path, "rb") as f:
+                reader = zstandard.ZstdDecompressor().stream_reader(f)
+                return reader.read().decode("utf-8")
+        with open(path) as f:
+            return f.read()
+
+    def test_write_rows(self):
+        """Test writing single rows, with a buffer smaller than the data."""
+        with NodeEdgeWriter(
+            self.node_file, self.edge_file, NODE_HEADER, EDGE_HEADER, buffer_rows=1
+        ) as writer:
+            for node in NODES:
+                writer.write_node(node)
+            writer.write_edge(EDGES[0])
+        self.assertEqual(EXPECTED_NODES, self.read(self.node_file))
+        self.assertEqual(EXPECTED_EDGES, self.read(self.edge_file))
+
+    def test_write_batches(self):
+        """Test writing batches, including generators and empty batches."""
+        with NodeEdgeWriter(
+            self.node_file, self.edge_file, NODE_HEADER, EDGE_HEADER
+        ) as writer:
+            writer.write_nodes(NODES[:1])
+            writer.write_nodes([])
+            writer.write_nodes(node for node in NODES[1:])
+            writer.write_edges(EDGES)
+        self.assertEqual(EXPECTED_NODES, self.read(self.node_file))
+        self.assertEqual(EXPECTED_EDGES, self.read(self.edge_file))
+
+    def test_write_dicts(self):
+        """Test projecting dicts to rows, with missing and extra keys."""
+        with NodeEdgeWriter(
+            self.node_file, self.edge_file, NODE_HEADER, EDGE_HEADER
+        ) as writer:
+            writer.write_node_dicts(
+                [
+                    {
+                        "category": "biolink:ChemicalEntity",
+                        "id": "CHEBI:1",
+                        "name": "one",
+                    },
+                    {"id": "HGNC:2", "name": "two", "symbol": "TWO"},
+                ]
+            )
+            writer.write_edge_dicts(dict(zip(EDGE_HEADER, edge)) for edge in EDGES)
+        self.assertEqual(EXPECTED_NODES, self.read(self.node_file))
+        self.assertEqual(EXPECTED_EDGES, self.read(self.edge_file))
+
+    def test_headers_only(self):
+        """Test that files without rows still get their headers."""
+        NodeEdgeWriter(self.node_file, self.edge_file, NODE_HEADER, EDGE_HEADER).close()
+        self.assertEqual("id\tname\tcategory\n", self.read(self.node_file))
+
+    @parameterized.expand([("write_node", NODES[0][:2]), ("write_nodes", NODES + [[]])])
+    def test_row_length_mismatch(self, method, data):
+        """Test that rows not matching the header are rejected."""
+        with NodeEdgeWriter(
+            self.node_file, self.edge_file, NODE_HEADER, EDGE_HEADER
+        ) as writer:
+            with self.assertRaises(RowLengthError):
+                getattr(writer, method)(data)
+
+    @parameterized.expand([(".gz",), (".zst",)])
+    def test_compressed_output(self, suffix):
+        """Test that compression is inferred from the file suffix."""
+        if suffix == ".zst" and zstandard is None:
+            self.skipTest("zstandard is not installed")
+        node_file, edge_file = self.node_file + suffix, self.edge_file + suffix
+        with NodeEdgeWriter(node_file, edge_file, NODE_HEADER, EDGE_HEADER) as writer:
+            writer.write_nodes(NODES)
+            writer.write_edges(EDGES)
+        self.assertEqual(EXPECTED_NODES, self.read(node_file))
+        self.assertEqual(EXPECTED_EDGES, self.read(edge_file))
+
+    def test_parquet_output(self):
+        """Test writing Parquet, with dictionary-encoded category and predicate."""
+        if pyarrow is None:
+            self.skipTest("pyarrow is not installed")
+        node_file = self.node_file.replace(".tsv", ".parquet")
+        edge_file = self.edge_file.replace(".tsv", ".parquet")
+        with NodeEdgeWriter(
+            node_file, edge_file, NODE_HEADER, EDGE_HEADER, buffer_rows=1
+        ) as writer:
+            writer.write_nodes(NODES)
+            writer.write_edge_dicts(dict(zip(EDGE_HEADER, edge)) for edge in EDGES)
+        for path, header, rows in [
+            (node_file, NODE_HEADER, NODES),
+            (edge_file, EDGE_HEADER, EDGES),
+        ]:
+            table = pyarrow.parquet.read_table(path)
+            self.assertEqual(header, table.column_names)
+            self.assertEqual(
+                [list(row) for row in zip(*table.to_pydict().values())], rows
+            )
+        schema = pyarrow.parquet.read_schema(node_file)
+        self.assertTrue(pyarrow.types.is_dictionary(schema.field("category").type))
+        self.assertEqual(pyarrow.string(), schema.field("name").type)
+
+    @parameterized.expand([(False,), (True,)])
+    def test_matches_write_node_edge_item(self, batch):
+        """Test that buffered writes give the output of write_node_edge_item()."""
+        rows = [
+            [f"ENSEMBL:ENSP{i:011d}", "biolink:interacts_with", f"UniProtKB:P{i:05d}"]
+            for i in range(100)
+        ]
+        with open(self.edge_file, "w") as edge:
+            edge.write("\t".join(EDGE_HEADER) + "\n")
+            for row in rows:
+                write_node_edge_item(edge, EDGE_HEADER, row)
+        expected = self.read(self.edge_file)
+
+        with NodeEdgeWriter(
+            self.node_file, self.edge_file, NODE_HEADER, EDGE_HEADER, buffer_rows=7
+        ) as writer:
+            if batch:
+                writer.write_edges(rows)
+            else:
+                for row in rows:
+                    writer.write_edge(row)
+        self.assertEqual(expected, self.read(self.edge_file))
+
+    @parameterized.expand([("",), (".gz",), (".zst",)])
+    @unittest.skipUnless(
+        os.environ.get("BENCHMARK"), "set BENCHMARK=1 to run benchmarks"
+    )
+    def test_benchmark_rows_per_second(self, suffix):
+        """Benchmark TableWriter against write_node_edge_item(), in rows/s."""
+        if suffix == ".zst" and zstandard is None:
+            self.skipTest("zstandard is not installed")
+        rows = [
+            [f"ENSEMBL:ENSP{i:011d}", "biolink:interacts_with", f"UniProtKB:P{i:05d}"]
+            for i in range(BENCHMARK_ROWS)
+        ]
+        edge_file = self.edge_file + suffix
+
+        start = time.perf_counter()
+        with open_output(edge_file) as edge:
+            edge.write("\t".join(EDGE_HEADER) + "\n")
+            for row in rows:
+                write_node_edge_item(edge, EDGE_HEADER, row)
+        rates = {"write_node_edge_item": len(rows) / (time.perf_counter() - start)}
+        expected = self.read(edge_file)
+
+        for method in ["write", "write_batch"]:
+            start = time.perf_counter()
+            writer = TableWriter(edge_file, EDGE_HEADER)
+            if method == "write_batch":
+                writer.write_batch(rows)
+            else:
+                for row in rows:
+                    writer.write(row)
+            writer.close()
+            rates[method] = len(rows) / (time.perf_counter() - start)
+            self.assertEqual(expected, self.read(edge_file))
+
+        print(
+            f"\n{suffix or '.tsv'}: "
+            + ", ".join(f"{m} {r:,.0f} rows/s" for m, r in rates.items())
+        )